@@ -0,0 +1,15 @@
+"""
+Benchmarks for far_history_toolset.
+
+- generator.py: deterministic synthetic .hst files (all four kinds, 10**2..10**7 entries)
+- runner.py:    times export / import_ / detect_header / the CLI and reports JSON
+
+Run from a checkout with `python -m benchmarks --help`; src/ is put on sys.path
+when the package is not installed.
+"""
+from pathlib import Path
+import sys
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if SRC.is_dir() and str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
@@ -0,0 +1,136 @@
+"""
+Command line for the benchmarks.
+
+  python -m benchmarks run --sizes 1000 100000 --out bench.json
+  python -m benchmarks compare bench.json --budget 10 --budget CommandsHistory.export/1000000=5
+  python -m benchmarks generate commands 1000000 /tmp/commands.hst
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.compare import DEFAULT_BUDGET, compare_results, parse_budgets, rerun_baseline, select
+from benchmarks.generator import KINDS, write_hst
+from benchmarks.runner import DEFAULT_SIZES, SCENARIOS, run_benchmarks
+
+
+def _print_result(r: Dict[str, Any]) -> None:
+    peak = f"{r['peakBytes'] / 1e6:8.1f} MB" if r["peakBytes"] is not None else "       -   "
+    sys.stderr.write(f"{r['id']:<45} {r['seconds']:10.4f}s {r['entriesPerSec']:14,.0f} entries/s {peak}\n")
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    text = json.dumps(data, indent=2) + "\n"
+    if path == "-":
+        sys.stdout.write(text)
+    else:
+        Path(path).write_text(text, encoding="utf-8")
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    data = run_benchmarks(kinds=args.kinds, sizes=args.sizes, scenarios=args.scenarios, repeat=args.repeat,
+                          warmup=args.warmup, seed=args.seed, memory=not args.no_memory,
+                          workdir=Path(args.workdir) if args.workdir else None, progress=_print_result)
+    _write_json(args.out, data)
+    return 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    try:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        default_budget = DEFAULT_BUDGET
+        overrides: List[str] = []
+        for b in args.budget:
+            if "=" in b:
+                overrides.append(b)
+            else:
+                default_budget = float(b) / 100
+        budgets = parse_budgets(overrides)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"bench compare: {e}\n")
+        return 2
+    if args.only:
+        baseline = select(baseline, args.only)
+    if not baseline.get("results"):
+        sys.stderr.write("bench compare: no baseline scenarios to run\n")
+        return 2
+
+    base_meta = baseline.get("meta", {})
+    current = rerun_baseline(baseline, repeat=args.repeat, warmup=args.warmup)
+    for key in ("python", "machine"):
+        if base_meta.get(key) != current["meta"].get(key):
+            sys.stderr.write(f"note: baseline {key} {base_meta.get(key)!r} differs from {current['meta'].get(key)!r}\n")
+    if args.out:
+        _write_json(args.out, current)
+
+    comparisons, missing = compare_results(baseline, current, budget=default_budget, budgets=budgets)
+    sys.stdout.write(f"{'scenario':<45} {'baseline':>10} {'current':>10} {'change':>8} {'median':>8} "
+                     f"{'noise':>7} {'budget':>7}\n")
+    for c in comparisons:
+        flag = "  REGRESSED" if c.regressed else ""
+        sys.stdout.write(f"{c.id:<45} {c.baseline:>9.4f}s {c.current:>9.4f}s {c.change:>+8.1%} "
+                         f"{c.median_change:>+8.1%} {c.noise:>7.1%} {c.budget:>7.0%}{flag}\n")
+    for sid in missing:
+        sys.stdout.write(f"{sid:<45} missing from the current run\n")
+    regressed = [c.id for c in comparisons if c.regressed]
+    if regressed:
+        sys.stderr.write(f"bench compare: {len(regressed)} scenario(s) over budget: {', '.join(regressed)}\n")
+        return 1
+    return 0
+
+
+def cmd_generate(args: argparse.Namespace) -> int:
+    size = write_hst(args.out, args.kind, args.entries, args.seed)
+    sys.stderr.write(f"{args.out}: {args.entries} entries, {size / 1e6:.2f} MB\n")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m benchmarks", description="far_history_toolset benchmarks")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    pr = sub.add_parser("run", help="Run the benchmark scenarios and write results as JSON")
+    pr.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS), help="History kinds (default: all).")
+    pr.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                    help=f"Entry counts (default: {' '.join(map(str, DEFAULT_SIZES))}).")
+    pr.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS),
+                    help="Scenarios to run (default: all).")
+    pr.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario (default: 3).")
+    pr.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing (default: 1).")
+    pr.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0).")
+    pr.add_argument("--no-memory", action="store_true", help="Skip the extra peak-memory run.")
+    pr.add_argument("--workdir", help="Keep generated files here instead of a temporary directory.")
+    pr.add_argument("--out", default="-", help="Results JSON path (default: stdout).")
+    pr.set_defaults(func=cmd_run)
+
+    pc = sub.add_parser("compare", help="Re-run a stored baseline and fail if scenarios got slower than budgeted")
+    pc.add_argument("baseline", help="Results JSON written by 'run'")
+    pc.add_argument("--budget", action="append", default=[], metavar="PCT|ID=PCT",
+                    help=f"Allowed slowdown in percent, for all scenarios (default: {DEFAULT_BUDGET:.0%}) or, as "
+                         "ID=PCT, for one scenario id such as CommandsHistory.export/1000000=5. Repeatable.")
+    pc.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario (default: 5).")
+    pc.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing (default: 1).")
+    pc.add_argument("--only", nargs="+", metavar="SUBSTRING", help="Only scenarios whose id contains one of these.")
+    pc.add_argument("--out", help="Also write the fresh results as JSON (usable as the next baseline).")
+    pc.set_defaults(func=cmd_compare)
+
+    pg = sub.add_parser("generate", help="Write one synthetic .hst file")
+    pg.add_argument("kind", choices=KINDS)
+    pg.add_argument("entries", type=int)
+    pg.add_argument("out", help="Output .hst path")
+    pg.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0).")
+    pg.set_defaults(func=cmd_generate)
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Regression gate: re-run a stored benchmark baseline and compare.
+
+rerun_baseline() repeats exactly the scenarios of a baseline results file
+(same kinds, sizes and generator seed). compare_results() then matches
+results by id and computes, per scenario, the relative change of the fastest
+sample and of the median:
+
+    change = current / baseline - 1        (+0.12 means 12% slower)
+
+The fastest sample is the least noisy estimate of the code's cost; the median
+guards against a single lucky or unlucky run. A scenario regresses only when
+both changes exceed its budget, so one noisy sample cannot fail the gate
+while a real slowdown (which moves every sample) does. `noise` is the larger
+of the two runs' relative sample spread ((max - min) / min) and is reported
+to show how far a change can be trusted.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from benchmarks.runner import run_benchmarks
+
+DEFAULT_BUDGET = 0.10
+
+
+class Comparison(NamedTuple):
+    """Baseline vs. current timings of one scenario."""
+    id: str
+    baseline: float             # fastest baseline sample, seconds
+    current: float              # fastest current sample, seconds
+    change: float               # current / baseline - 1 (fastest samples)
+    median_change: float        # same for the medians
+    noise: float                # larger relative sample spread of the two runs
+    budget: float               # allowed slowdown as a fraction
+    regressed: bool
+
+
+def _spread(result: Mapping[str, Any]) -> float:
+    samples = result.get("samples") or [result["seconds"]]
+    lo = min(samples)
+    return (max(samples) - lo) / lo if lo > 0 else 0.0
+
+
+def _ratio(current: float, baseline: float) -> float:
+    return current / baseline - 1 if baseline > 0 else 0.0
+
+
+def parse_budgets(specs: Iterable[str]) -> Dict[str, float]:
+    """Parse 'ID=PERCENT' strings (e.g. 'CommandsHistory.export/1000000=10') into fractions."""
+    budgets: Dict[str, float] = {}
+    for spec in specs:
+        sid, sep, pct = spec.rpartition("=")
+        if not sep or not sid:
+            raise ValueError(f"budget must look like ID=PERCENT, got {spec!r}")
+        budgets[sid] = float(pct) / 100
+    return budgets
+
+
+def compare_results(
+    baseline: Mapping[str, Any],
+    current: Mapping[str, Any],
+    budget: float = DEFAULT_BUDGET,
+    budgets: Optional[Mapping[str, float]] = None,
+) -> Tuple[List[Comparison], List[str]]:
+    """Compare two results files scenario by scenario.
+
+    :param baseline: Stored results (as written by `python -m benchmarks run`).
+    :param current: Fresh results for the same scenarios.
+    :param budget: Allowed slowdown as a fraction (0.10 = 10%).
+    :param budgets: Per-scenario overrides of budget, keyed by result id.
+    :returns: (comparisons in baseline order, ids present in baseline but not in current).
+    """
+    budgets = budgets or {}
+    now = {r["id"]: r for r in current.get("results", [])}
+    comparisons: List[Comparison] = []
+    missing: List[str] = []
+    for base in baseline.get("results", []):
+        sid = base["id"]
+        cur = now.get(sid)
+        if cur is None:
+            missing.append(sid)
+            continue
+        allowed = budgets.get(sid, budget)
+        change = _ratio(cur["seconds"], base["seconds"])
+        median_change = _ratio(cur.get("median", cur["seconds"]), base.get("median", base["seconds"]))
+        comparisons.append(Comparison(
+            id=sid,
+            baseline=base["seconds"],
+            current=cur["seconds"],
+            change=change,
+            median_change=median_change,
+            noise=max(_spread(base), _spread(cur)),
+            budget=allowed,
+            regressed=change > allowed and median_change > allowed,
+        ))
+    return comparisons, missing
+
+
+def select(results: Mapping[str, Any], only: Iterable[str]) -> Dict[str, Any]:
+    """Copy of a results dict keeping only scenarios whose id contains one of the substrings."""
+    filters = list(only)
+    kept = [r for r in results.get("results", []) if any(f in r["id"] for f in filters)]
+    return {**results, "results": kept}
+
+
+def rerun_baseline(
+    baseline: Mapping[str, Any],
+    repeat: int = 5,
+    warmup: int = 1,
+    progress: Any = None,
+) -> Dict[str, Any]:
+    """Run the scenarios recorded in a baseline again, with the baseline's generator seed.
+
+    :param baseline: Stored results.
+    :param repeat: Timed runs per scenario.
+    :param warmup: Untimed runs before the timed ones.
+    :param progress: Passed to run_benchmarks().
+    :returns: A results dict like run_benchmarks() returns.
+    """
+    plan: Dict[Tuple[str, int], List[str]] = {}
+    for r in baseline.get("results", []):
+        plan.setdefault((r["kind"], r["entries"]), []).append(r["scenario"])
+    seed = int(baseline.get("meta", {}).get("seed", 0))
+    return run_benchmarks(repeat=repeat, warmup=warmup, seed=seed, memory=False, progress=progress,
+                          plan=[(kind, n, scenarios) for (kind, n), scenarios in plan.items()])
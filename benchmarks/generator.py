@@ -0,0 +1,201 @@
+"""
+Deterministic synthetic .hst files for benchmarks.
+
+Every column (Lines, Extras, Times, Types, Locks) is drawn from its own
+random.Random seeded with (seed, kind, column, category), so a file can be
+written column by column in bounded memory, and the same arguments always
+produce the same bytes. Sizes up to 10**7 entries are practical with
+write_hst(); generate_hst() builds the whole text in memory.
+
+The data exercises the decoder's slow paths on purpose:
+- unicode paths and commands (Cyrillic, CJK, accented Latin)
+- backslashes, double quotes and '=' inside values
+- about 1% of item separators use the nested "\\\\n" encoding and 0.5% are
+  real newlines (multi-line values)
+"""
+from __future__ import annotations
+
+import random
+import re
+from pathlib import Path
+from typing import Callable, Iterator, List, Union
+
+KINDS = ("commands", "dialogs", "folders", "view")
+
+HEADERS = {
+    "commands": "[SavedHistory]",
+    "dialogs": "[SavedDialogHistory]",
+    "folders": "[SavedFolderHistory]",
+    "view": "[SavedViewHistory]",
+}
+
+_BASE_FILETIME = 133_500_000_000_000_000      # early 2024
+_CHUNK = 10_000
+
+_DIRS = ("home", "src", "projects", "work", "tmp", "var", "opt", "Documents", "Downloads",
+         "Документы", "写真", "Müller", "café", "日本語", "backup-2024", "build", "node_modules")
+# No name starts with 'n': after a Windows backslash that would read as an item separator
+_FILES = ("main.py", "README.md", "Makefile", "report.pdf", "отчёт.txt", "图片.png", "résumé.c",
+          "data.json", "index.html", "config.yaml", "todo.md", "archive.tar.gz")
+_COMMANDS = (
+    "ls -la {d}", "cd {d}", "git status", "git commit -m \"fix {w}\"", "make -j8 {w}",
+    "grep -rn \"{w}\" {d}", "python3 {f}", "vim {d}/{f}", "tar czf {w}.tgz {d}",
+    "find {d} -name '*.py' | xargs wc -l", "echo \"{w}=1\" >> .env", "ssh build@{w}.example.org",
+    "docker run --rm -v {d}:/src {w}:latest", "sed -i 's/\\t/    /g' {f}", "printf '%s\\\\t%s' {w} {w}",
+)
+_WORDS = ("alpha", "beta", "gamma", "delta", "release", "hotfix", "тест", "测试", "überall", "prod",
+          "staging", "cache", "index", "worker", "queue")
+_WIN_SEGMENTS = ("Users", "Program Files", "Temp", "Projekte", "Données", "Work")   # no segment starts with 'n'
+_DIALOG_NAMES = ("Copy", "Move", "NewFolder", "Find", "ApplyCmd", "Search", "Rename", "Edit",
+                 "Masks", "Filter", "Link", "Attributes", "GoTo", "Replace", "Execute")
+
+# A real-newline separator must not start a line the lexer would read as a key or section
+_LOOKS_LIKE_KEY_RE = re.compile(r"^(?:[A-Za-z0-9_]+=|[ \t]*\[)")
+
+
+def _rng(seed: int, kind: str, column: str, part: int = 0) -> random.Random:
+    return random.Random(f"{seed}:{kind}:{column}:{part}")
+
+
+def _unix_path(rng: random.Random) -> str:
+    depth = rng.randint(1, 5)
+    return "/" + "/".join(rng.choice(_DIRS) for _ in range(depth))
+
+
+def _path(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return "C:\\" + "\\".join(rng.choice(_WIN_SEGMENTS) for _ in range(rng.randint(1, 3)))
+    return _unix_path(rng)
+
+
+def _command(rng: random.Random) -> str:
+    return rng.choice(_COMMANDS).format(d=_unix_path(rng), f=rng.choice(_FILES), w=rng.choice(_WORDS))
+
+
+def _file_path(rng: random.Random) -> str:
+    folder = _path(rng)
+    return folder + ("\\" if folder.startswith("C:") else "/") + rng.choice(_FILES)
+
+
+def _dialog_line(rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.5:
+        return _path(rng)
+    if r < 0.8:
+        return rng.choice(_WORDS) + "*" + rng.choice((".py", ".txt", ".log", ""))
+    return _command(rng)
+
+
+def _encoded_items(items: Iterator[str], rng: random.Random) -> Iterator[str]:
+    """Yield a quoted list value in chunks, mostly '\\n'-separated with some nested/real newlines."""
+    first = True
+    buf: List[str] = []
+    for item in items:
+        if not first:
+            r = rng.random()
+            if r < 0.01:
+                buf.append("\\\\n")
+            elif r < 0.015 and not _LOOKS_LIKE_KEY_RE.match(item):
+                buf.append("\n")
+            else:
+                buf.append("\\n")
+        first = False
+        buf.append(item)
+        if len(buf) >= 2 * _CHUNK:
+            yield "".join(buf)
+            buf.clear()
+    if buf:
+        yield "".join(buf)
+
+
+def _column(n: int, rng: random.Random, make: Callable[[random.Random], str]) -> Iterator[str]:
+    return (make(rng) for _ in range(n))
+
+
+def _times(n: int, rng: random.Random) -> Iterator[str]:
+    """Space-separated little-endian FILETIME tokens, strictly increasing."""
+    t = _BASE_FILETIME
+    buf: List[str] = []
+    sep = ""    # separates a chunk from the previous one
+    for _ in range(n):
+        t += 1 + rng.randrange(600 * 10_000_000)      # up to 10 minutes apart
+        buf.append(t.to_bytes(8, "little").hex())
+        if len(buf) >= _CHUNK:
+            yield sep + " ".join(buf)
+            buf.clear()
+            sep = " "
+    if buf:
+        yield sep + " ".join(buf)
+
+
+def _flags(n: int, rng: random.Random, p_one: float) -> str:
+    return "".join("1" if rng.random() < p_one else "0" for _ in range(n))
+
+
+def _list_history(kind: str, n: int, seed: int) -> Iterator[str]:
+    """commands.hst / folders.hst / view.hst text in chunks."""
+    yield HEADERS[kind] + "\n"
+    if kind == "commands":
+        yield 'Extras="'
+        yield from _encoded_items(_column(n, _rng(seed, kind, "Extras"), _path), _rng(seed, kind, "ExtrasSep"))
+        yield f'"\nHistoryCount={n}\nLines="'
+        yield from _encoded_items(_column(n, _rng(seed, kind, "Lines"), _command), _rng(seed, kind, "LinesSep"))
+    else:
+        make = _path if kind == "folders" else _file_path
+        yield f'HistoryCount={n}\nLines="'
+        yield from _encoded_items(_column(n, _rng(seed, kind, "Lines"), make), _rng(seed, kind, "LinesSep"))
+    yield f'"\nLocks={_flags(n, _rng(seed, kind, "Locks"), 0.02)}\nPosition={n - 1 if n else -1}\nTimes='
+    yield from _times(n, _rng(seed, kind, "Times"))
+    yield "\n"
+    if kind != "commands":
+        yield f"Types={_flags(n, _rng(seed, kind, 'Types'), 0.5)}\n"
+
+
+def dialog_categories(n: int) -> int:
+    """Number of categories generated for a dialogs.hst of n entries."""
+    return max(1, min(1000, n // 100))
+
+
+def _dialogs(n: int, seed: int) -> Iterator[str]:
+    cats = dialog_categories(n)
+    yield f"{HEADERS['dialogs']}\nHistoryCount={n}\n"
+    for c in range(cats):
+        name = _DIALOG_NAMES[c % len(_DIALOG_NAMES)] + (str(c // len(_DIALOG_NAMES)) if c >= len(_DIALOG_NAMES) else "")
+        size = n // cats + (1 if c < n % cats else 0)
+        yield f'\n[SavedDialogHistory/{name}]\nLines="'
+        yield from _encoded_items(_column(size, _rng(seed, "dialogs", "Lines", c), _dialog_line),
+                                  _rng(seed, "dialogs", "LinesSep", c))
+        yield f'"\nLocks={_flags(size, _rng(seed, "dialogs", "Locks", c), 0.02)}\nPosition=-1\nTimes='
+        yield from _times(size, _rng(seed, "dialogs", "Times", c))
+        yield "\n"
+
+
+def iter_hst_chunks(kind: str, n: int, seed: int = 0) -> Iterator[str]:
+    """Yield the text of a synthetic .hst file of the given kind and entry count in chunks.
+
+    :param kind: One of KINDS.
+    :param n: Number of entries (split over dialog_categories(n) sections for dialogs).
+    :param seed: Different seeds give different, equally deterministic files.
+    :returns: Iterator over text chunks; their concatenation is the file.
+    :raises ValueError: If kind is unknown or n is negative.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind {kind!r}; expected one of {', '.join(KINDS)}")
+    if n < 0:
+        raise ValueError(f"entry count must be >= 0, got {n}")
+    return _dialogs(n, seed) if kind == "dialogs" else _list_history(kind, n, seed)
+
+
+def generate_hst(kind: str, n: int, seed: int = 0) -> str:
+    """Return a whole synthetic .hst text (see iter_hst_chunks())."""
+    return "".join(iter_hst_chunks(kind, n, seed))
+
+
+def write_hst(path: Union[str, Path], kind: str, n: int, seed: int = 0) -> int:
+    """Write a synthetic .hst file chunk by chunk; returns its size in bytes."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("w", encoding="utf-8", newline="\n") as f:
+        for chunk in iter_hst_chunks(kind, n, seed):
+            f.write(chunk)
+    return p.stat().st_size
@@ -0,0 +1,221 @@
+"""
+Benchmark runner.
+
+For every (kind, size) the runner generates a synthetic file (generator.py),
+then times these scenarios:
+    detect_header(<kind>)     detect_header() on the whole text
+    <Service>.export          svc.export(text)
+    <Service>.import_         svc.import_(data) on the export of the same text
+    cli export(<kind>)        `far_history_editor.py export FILE OUT.json` in a subprocess
+
+Each scenario runs `warmup` untimed times, then `repeat` timed times; the
+result keeps every sample and reports the fastest (`seconds`) as the
+headline figure, with entries/sec and MB/sec derived from it. Peak memory is
+measured in one extra run: tracemalloc's peak for in-process scenarios (so it
+does not slow the timed runs), the child's max RSS for the CLI.
+
+Results are plain JSON (see run_benchmarks()); a scenario is identified by
+"<label>/<entries>", e.g. "CommandsHistory.export/1000000".
+"""
+from __future__ import annotations
+
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.generator import HEADERS, KINDS, write_hst
+from far_history_toolset.core.hst_lexer import detect_header
+from far_history_toolset.services import get_service_for_header
+
+ROOT = Path(__file__).resolve().parents[1]
+CLI = ROOT / "cli" / "far_history_editor.py"
+
+SCENARIOS = ("detect_header", "export", "import_", "cli-export")
+DEFAULT_SIZES = (100, 10_000, 100_000)
+SCHEMA_VERSION = 1
+
+
+def _time_once(fn: Callable[[], Any]) -> float:
+    gc.collect()
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def _tracemalloc_peak(fn: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Runs the CLI script given as argv[1] and reports the process's own peak RSS.
+# VmHWM belongs to the exec'd image; rusage max RSS would also count the
+# benchmark process the child was forked from.
+_CLI_CHILD = """
+import atexit, runpy, sys
+
+def _report_peak():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    sys.stderr.write("\\n@@peak %d\\n" % (int(line.split()[1]) * 1024))
+    except OSError:
+        pass
+
+atexit.register(_report_peak)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def _run_cli(args: List[str]) -> Tuple[float, Optional[int]]:
+    """Run the CLI in a child process; returns (wall seconds, peak RSS bytes or None off Linux)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")]))
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _CLI_CHILD, str(CLI)] + args, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    seconds = time.perf_counter() - t0
+    err = proc.stderr.decode("utf-8", "replace")
+    if proc.returncode != 0:
+        raise RuntimeError(f"CLI failed ({proc.returncode}): {err.strip()}")
+    peak = None
+    for line in err.splitlines():
+        if line.startswith("@@peak "):
+            peak = int(line.split()[1])
+    return seconds, peak
+
+
+def _label(kind: str, scenario: str) -> str:
+    if scenario in ("export", "import_"):
+        return f"{get_service_for_header(HEADERS[kind]).__class__.__name__}.{scenario}"
+    if scenario == "cli-export":
+        return f"cli export({kind})"
+    return f"{scenario}({kind})"
+
+
+def scenario_id(kind: str, scenario: str, entries: int) -> str:
+    """Stable identifier of one benchmark, e.g. 'CommandsHistory.export/1000000'."""
+    return f"{_label(kind, scenario)}/{entries}"
+
+
+def run_scenario(kind: str, scenario: str, entries: int, hst_path: Path, text: str,
+                 repeat: int = 3, warmup: int = 1, memory: bool = True) -> Dict[str, Any]:
+    """Time one scenario on an already generated file; returns its result dict."""
+    svc = get_service_for_header(HEADERS[kind])
+    peak: Optional[int] = None
+    if scenario == "cli-export":
+        out = hst_path.with_suffix(".bench.json")
+        samples: List[float] = []
+        for k in range(warmup + repeat):
+            seconds, rss = _run_cli(["export", str(hst_path), str(out)])
+            if k >= warmup:
+                samples.append(seconds)
+                if rss is not None:
+                    peak = max(peak or 0, rss)
+        memory_kind = "rss"
+    else:
+        if scenario == "detect_header":
+            fn: Callable[[], Any] = lambda: detect_header(text)
+        elif scenario == "export":
+            fn = lambda: svc.export(text)
+        elif scenario == "import_":
+            data = svc.export(text)
+            fn = lambda: svc.import_(data)
+        else:
+            raise ValueError(f"unknown scenario {scenario!r}; expected one of {', '.join(SCENARIOS)}")
+        for _ in range(warmup):
+            fn()
+        samples = [_time_once(fn) for _ in range(repeat)]
+        if memory:
+            peak = _tracemalloc_peak(fn)
+        memory_kind = "tracemalloc"
+
+    best = min(samples)
+    size = len(text.encode("utf-8"))
+    return {
+        "id": scenario_id(kind, scenario, entries),
+        "kind": kind,
+        "scenario": scenario,
+        "entries": entries,
+        "bytes": size,
+        "samples": [round(s, 6) for s in samples],
+        "seconds": round(best, 6),
+        "median": round(statistics.median(samples), 6),
+        "entriesPerSec": round(entries / max(best, 1e-9), 1),
+        "mbPerSec": round(size / 1e6 / max(best, 1e-9), 3),
+        "peakBytes": peak,
+        "memory": memory_kind if peak is not None else None,
+    }
+
+
+def run_benchmarks(
+    kinds: Sequence[str] = KINDS,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    scenarios: Sequence[str] = SCENARIOS,
+    repeat: int = 3,
+    warmup: int = 1,
+    seed: int = 0,
+    memory: bool = True,
+    workdir: Optional[Path] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    plan: Optional[Sequence[Tuple[str, int, Sequence[str]]]] = None,
+) -> Dict[str, Any]:
+    """Run every scenario for every kind and size.
+
+    :param kinds: History kinds to generate (see generator.KINDS).
+    :param sizes: Entry counts.
+    :param scenarios: Subset of SCENARIOS.
+    :param repeat: Timed runs per scenario.
+    :param warmup: Untimed runs before the timed ones.
+    :param seed: Generator seed.
+    :param memory: Also measure peak memory (one extra run per in-process scenario).
+    :param workdir: Where generated files go (default: a temporary directory).
+    :param progress: Called with each result as soon as it is available.
+    :param plan: Explicit (kind, entries, scenarios) triples; overrides kinds/sizes/scenarios.
+    :returns: {"schema", "meta", "results": [result, ...]}.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be >= 1")
+    if plan is None:
+        plan = [(kind, n, scenarios) for kind in kinds for n in sizes]
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="fh-bench-") as tmp:
+        base = Path(workdir) if workdir else Path(tmp)
+        for kind, n, kind_scenarios in plan:
+            path = base / f"{kind}-{n}-{seed}.hst"
+            write_hst(path, kind, n, seed)
+            text = path.read_text(encoding="utf-8")
+            for scenario in kind_scenarios:
+                result = run_scenario(kind, scenario, n, path, text, repeat=repeat, warmup=warmup, memory=memory)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+            del text
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "seed": seed,
+            "repeat": repeat,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
@@ -13,38 +13,113 @@ Usage examples:
   far_history_editor.py export ~/.config/far2l/history/folders.hst - --pretty | jq .HistoryCount
   far_history_editor.py import - out.hst < edited.json
 
+  # JSON Lines: a header object, then one record per line (streams both ways)
+  far_history_editor.py export commands.hst - --format jsonl | grep -v secret > commands.jsonl
+  far_history_editor.py import commands.jsonl commands.hst --format jsonl
+
+  # Decode only some dialog categories; the others round-trip as raw text
+  far_history_editor.py export dialogs.hst copy.json --category Copy --category SearchText
+
+  # Decode the categories of a big dialogs.hst on 8 worker processes
+  far_history_editor.py export dialogs.hst dialogs.json --workers 8 --pool process
+
+  # Follow live histories: every new entry as one JSON line
+  far_history_editor.py export ~/.config/far2l/history/ - --watch --interval 2
+
+  # Load histories into SQLite for ad-hoc queries, and rebuild one from it
+  far_history_editor.py export ~/.config/far2l/history/commands.hst histories.db --format sqlite
+  far_history_editor.py import histories.db commands.hst --from-sqlite --sqlite-name ~/.config/far2l/history/commands.hst
+
+  # Where does an export spend its time? Per-phase breakdown on stderr, plus a cProfile dump
+  far_history_editor.py export commands.hst commands.json --profile --profile-out export.pstats
+  far_history_editor.py export commands.hst commands.json --profile-memory
+
+  # Re-export unchanged files from a persistent parse cache
+  far_history_editor.py export commands.hst commands.json --cache-dir ~/.cache/far-history --cache-stats
+
+  # Append one command in place (no full rewrite of the file)
+  far_history_editor.py append ~/.config/far2l/history/commands.hst "make test" --dir ~/src/project
+
+  # Drop entries in place, without going through JSON
+  far_history_editor.py patch commands.hst commands.hst --delete 3 --delete-match 'password='
+  far_history_editor.py patch dialogs.hst dialogs.hst --replace Copy:0=/mnt/backup
+
+  # Collapse repeated (dir, command) / path entries
+  far_history_editor.py dedup commands.hst commands.hst --keep newest
+
+  # Merge the same history from several hosts by time, keeping the newest 1000
+  far_history_editor.py merge commands.hst host1/commands.hst host2/commands.hst --limit 1000
+
+  # Compliance redaction with a pattern file (hit counts go to stderr)
+  far_history_editor.py redact commands.hst commands.hst --patterns redact.txt --ignore-case
+
+  # Look for credentials left in command/dialog history (exit code 3 if any)
+  far_history_editor.py scan-secrets ~/.config/far2l/history/
+
+  # Substring search across many histories through a trigram index
+  far_history_editor.py index histories.idx /backups/far2l-history/
+  far_history_editor.py search histories.idx "kubectl delete" /prod
+
+  # Whole directory trees (recursive), using a pool of worker processes
+  far_history_editor.py export-dir snapshots/ json/ --jobs 8
+  far_history_editor.py import-dir json/ restored/ --jobs 8
+
 Exit codes:
   0 success
   1 usage/argument error
   2 parse/serialization error
+  3 scan-secrets found suspected secrets
 """
 from __future__ import annotations
 
 import argparse
+import cProfile
 import json
+import os
+import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Type
 
-from far_history_toolset.core.hst_lexer import detect_header
+from far_history_toolset.core.cache import DEFAULT_MAX_BYTES, ParseCache
+from far_history_toolset.core.hst_lexer import HstDocument, detect_header
 from far_history_toolset.core.errors import UnknownHeaderError, ParseError, SchemaError, RoundtripError
-from far_history_toolset.services import get_service_for_header
-
-
-def _read_text(path: str) -> str:
+from far_history_toolset.core.filetime import filetime_int_to_iso, iso_to_filetime_int
+from far_history_toolset.core.patterns import PatternSet
+from far_history_toolset.services import HistoryFile, detect_header_stream, export_file, get_service_for_header
+from far_history_toolset.services.commands import append_command
+from far_history_toolset.services.dialogs import DialogsHistory
+from far_history_toolset.services.merge import merge_histories
+from far_history_toolset.services.profiling import PhaseProfiler
+from far_history_toolset.services.redact import DEFAULT_REPLACEMENT, redact
+from far_history_toolset.services.registry import REGISTRY
+from far_history_toolset.services.secrets import SCAN_HEADERS, scan_secrets
+from far_history_toolset.services.sqlite_store import HistoryDatabase
+from far_history_toolset.services.trigram_index import TrigramIndex
+from far_history_toolset.services.watch import HistoryWatcher
+from far_history_toolset.services.base import EntryIndex, Record, Source
+
+
+def _read_text(path: str, raw: bool = False) -> str:
+    """Read a text file (or stdin); raw=True keeps line endings untranslated."""
     if path == "-":
         return sys.stdin.read()
     p = Path(path).expanduser()
-    return p.read_text(encoding="utf-8", errors="replace")
+    with p.open("r", encoding="utf-8", errors="replace", newline="" if raw else None) as f:
+        return f.read()
 
 
-def _write_text(path: str, text: str) -> None:
+def _write_text(path: str, text: str, raw: bool = False) -> None:
+    """Write a text file (or stdout); raw=True writes line endings as they are in text."""
     if path == "-":
         sys.stdout.write(text)
         return
     p = Path(path).expanduser()
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(text, encoding="utf-8", newline="\n")
+    p.write_text(text, encoding="utf-8", newline="" if raw else "\n")
 
 
 def _read_json(path: str) -> Dict[str, Any]:
@@ -69,25 +144,260 @@ def _write_json(path: str, data: Dict[str, Any], pretty: bool, ensure_ascii: boo
             f.write("\n")
 
 
-def cmd_export(args: argparse.Namespace) -> int:
-    try:
-        text = _read_text(args.hst_in)
-        header = detect_header(text)
-        if header is None and not args.header:
-            raise UnknownHeaderError("Header not found; specify --header to force a parser.")
-        if args.header:
-            header = args.header
-        assert header is not None
+def _write_jsonl(path: str, header: Dict[str, Any], records: Iterable[Dict[str, Any]], ensure_ascii: bool) -> None:
+    """Write the header object and then one compact JSON record per line."""
+    def dump(f: TextIO) -> None:
+        f.write(json.dumps(header, ensure_ascii=ensure_ascii) + "\n")
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=ensure_ascii) + "\n")
 
-        svc = get_service_for_header(header)
-        data = svc.export(text)
+    if path == "-":
+        dump(sys.stdout)
+        return
+    p = Path(path).expanduser()
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("w", encoding="utf-8") as f:
+        dump(f)
+
+
+def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield JSON objects from a JSON Lines file one line at a time (blank lines skipped)."""
+    def parse(f: TextIO) -> Iterator[Dict[str, Any]]:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+    if path == "-":
+        yield from parse(sys.stdin)
+        return
+    p = Path(path).expanduser()
+    with p.open("r", encoding="utf-8") as f:
+        yield from parse(f)
+
+
+def _jsonl_records(svc: HistoryFile, source: Source, iso: bool = True, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """Flatten iter_records() into JSONL rows; dialog rows carry their 'category'."""
+    for category, rec in svc.iter_records(source, iso=iso, **kwargs):
+        if category is None:
+            yield rec
+        else:
+            yield {"category": category, **rec}
+
+
+def _records_from_jsonl(rows: Iterator[Dict[str, Any]]) -> Iterator[Record]:
+    """Turn JSONL rows back into (category, record) pairs."""
+    for row in rows:
+        category = row.pop("category", None)
+        yield category, row
+
+
+def _count_entries(data: Dict[str, Any]) -> int:
+    """Number of records in an export dict (dialogs: summed over categories)."""
+    if "Categories" in data:
+        return sum(len(c.get("History") or []) for c in data.get("Categories") or [])
+    return len(data.get("History") or [])
+
+
+def _counted(rows: Iterable[Any], counter: List[int]) -> Iterator[Any]:
+    """Pass rows through while counting them into counter[0]."""
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def _split_export(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Split an export dict into the JSONL header object and its flattened rows."""
+    meta = dict(data)
+    rows: List[Dict[str, Any]] = []
+    if "Categories" in data:
+        meta["Categories"] = []
+        for cat in data.get("Categories") or []:
+            cat = dict(cat)
+            rows.extend({"category": cat["name"], **rec} for rec in cat.pop("History", None) or [])
+            meta["Categories"].append(cat)
+    else:
+        rows = list(meta.pop("History", None) or [])
+    return meta, rows
+
+
+def _warn_missing_categories(data: Dict[str, Any], categories: Optional[List[str]]) -> None:
+    """Tell on stderr about --category names the file does not have."""
+    if not categories:
+        return
+    present = {c.get("name") for c in data.get("Categories") or []}
+    for name in categories:
+        if name not in present:
+            sys.stderr.write(f"[far_history_editor.py] export: category not found: {name}\n")
+
+
+def _export_file(hst_in: str, json_out: str, *, fmt: str = "json", pretty: bool = False,
+                 ensure_ascii: bool = True, header: Optional[str] = None, include_header: bool = False,
+                 iso: bool = True, cache: Optional[ParseCache] = None, sqlite_name: Optional[str] = None,
+                 profiler: Optional[PhaseProfiler] = None, categories: Optional[List[str]] = None,
+                 workers: int = 1, pool: str = "thread") -> int:
+    """Export one .hst file to JSON/JSONL/SQLite; returns the number of exported records.
+
+    With a profiler (plain json/jsonl exports), reading, header detection,
+    the service's own phases and writing are reported to it. categories
+    (dialogs.hst, json/jsonl) limits decoding to those sections; the rest are
+    exported as raw text. workers/pool decode dialogs.hst categories
+    concurrently (json format; JSONL streams them in order instead).
+    """
+    if fmt == "sqlite":
+        name = sqlite_name or ("<stdin>" if hst_in == "-" else hst_in)
+        with HistoryDatabase(json_out) as db:
+            return db.add_text(name, _read_text(hst_in), header=header)
+
+    if cache is not None and hst_in != "-":
+        data = export_file(hst_in, iso=iso, header=header, cache=cache, categories=categories,
+                           workers=workers, pool=pool)
+        _warn_missing_categories(data, categories)
+        cli_info = {"detectedHeader": data.get("Header", header)}
+        if fmt == "jsonl":
+            meta, rows = _split_export(data)
+            if include_header:
+                meta["_cli"] = cli_info
+            _write_jsonl(json_out, meta, rows, ensure_ascii=ensure_ascii)
+            return len(rows)
+        if include_header:
+            data["_cli"] = cli_info
+        _write_json(json_out, data, pretty=pretty, ensure_ascii=ensure_ascii)
+        return _count_entries(data)
+
+    def phase(name: str, entries: int = 0) -> ContextManager[None]:
+        return profiler.phase(name, entries) if profiler is not None else nullcontext()
+
+    svc_cls: Optional[Type[HistoryFile]] = REGISTRY[header] if header else None
+    if hst_in == "-":
+        with phase("read"):
+            text = _read_text(hst_in)
+        if svc_cls is None:
+            with phase("detect_header"):
+                detected = detect_header(text)
+            svc_cls = REGISTRY[detected] if detected else None
+    else:
+        with Path(hst_in).expanduser().open("r", encoding="utf-8", errors="replace") as f:
+            # Dispatch on the first few KB; a file without a header is rejected unread
+            if svc_cls is None:
+                with phase("detect_header"):
+                    svc_cls = detect_header_stream(f)
+            if svc_cls is not None:
+                with phase("read"):
+                    text = f.read()
+    if svc_cls is None:
+        raise UnknownHeaderError("Header not found; specify --header to force a parser.")
+    header = svc_cls.HEADER
+
+    svc = svc_cls()
+    svc.hooks = profiler
+    selection: Dict[str, Any] = {}
+    if categories is not None:
+        if not isinstance(svc, DialogsHistory):
+            raise ValueError(f"--category only applies to {DialogsHistory.HEADER} files, not {header}")
+        selection["categories"] = categories
+    if fmt == "jsonl":
+        # One scan of the text serves both the header fields and the records
+        with phase("lex"):
+            doc = HstDocument(text)
+        meta = svc.export_meta(doc, **selection)
+        _warn_missing_categories(meta, categories)
+        if include_header:
+            meta["_cli"] = {"detectedHeader": header}
+        counter = [0]
+        rows = _jsonl_records(svc, doc, iso, **selection)
+        # Records are decoded while they are written, so this phase includes their decoding
+        with phase("json.dump"):
+            _write_jsonl(json_out, meta, _counted(rows, counter), ensure_ascii=ensure_ascii)
+        return counter[0]
+
+    if isinstance(svc, DialogsHistory):
+        selection.update(workers=workers, pool=pool)
+    data = svc.export(text, iso=iso, **selection)
+    _warn_missing_categories(data, categories)
+
+    if include_header:
+        data["_cli"] = {"detectedHeader": header}
+
+    count = _count_entries(data)
+    with phase("json.dump", count):
+        _write_json(json_out, data, pretty=pretty, ensure_ascii=ensure_ascii)
+    return count
+
+
+def _import_file(json_in: str, hst_out: str, *, fmt: str = "json", header: Optional[str] = None,
+                 sqlite_name: Optional[str] = None) -> int:
+    """Import one JSON/JSONL file (or a file stored in SQLite) into .hst; returns the number of imported records."""
+    counter = [0]
+    if fmt == "sqlite":
+        if not Path(json_in).expanduser().is_file():
+            raise FileNotFoundError(json_in)
+        with HistoryDatabase(json_in) as db:
+            _write_text(hst_out, db.build_text(sqlite_name))
+            return db.count(sqlite_name)
+    if fmt == "jsonl":
+        rows = _iter_jsonl(json_in)
+        data = next(rows, None)
+        if data is None:
+            raise SchemaError("JSON Lines input is empty; expected a header object on the first line.")
+    else:
+        data = _read_json(json_in)
+
+    # Prefer explicit override, else JSON["Header"]
+    header = header or data.get("Header")
+    if not header:
+        raise UnknownHeaderError("JSON lacks 'Header' and no --header override was provided.")
+    svc = get_service_for_header(header)
+
+    if fmt == "jsonl":
+        hst_text = svc.import_records(data, _counted(_records_from_jsonl(rows), counter))
+    else:
+        hst_text = svc.import_(data)
+        counter[0] = _count_entries(data)
+    _write_text(hst_out, hst_text)
+    return counter[0]
 
-        if args.include_header:
-            data["_cli"] = {"detectedHeader": header}
 
-        _write_json(args.json_out, data, pretty=args.pretty, ensure_ascii=not args.no_ascii)
+def _open_cache(args: argparse.Namespace) -> Optional[ParseCache]:
+    """ParseCache for --cache-dir/--cache-max-mb, or None when caching is off."""
+    if not args.cache_dir:
+        return None
+    return ParseCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+
+def _print_cache_stats(cache: ParseCache) -> None:
+    entries, size = cache.usage()
+    st = cache.stats
+    sys.stderr.write(
+        f"[far_history_editor.py] cache: {st['hits']} hits, {st['misses']} misses, "
+        f"{st['evictions']} evicted; {entries} entries, {size / 1e6:.2f} MB in {cache.directory}\n"
+    )
+
+
+def _watch_export(args: argparse.Namespace) -> int:
+    """export --watch: poll hst_in and write new entries as JSON Lines until interrupted."""
+    watcher = HistoryWatcher(args.hst_in, iso=not args.no_iso)
+    if args.hst_in == "-" or not watcher.path.exists():
+        sys.stderr.write(f"[far_history_editor.py] --watch needs an existing file or directory: {args.hst_in}\n")
+        return 1
+    out: Optional[TextIO] = None
+    try:
+        out = sys.stdout if args.json_out == "-" else Path(args.json_out).expanduser().open("a", encoding="utf-8")
+        while True:
+            for ev in watcher.poll():
+                row = {"file": ev.path, **({"category": ev.category} if ev.category is not None else {}), **ev.record}
+                out.write(json.dumps(row, ensure_ascii=not args.no_ascii) + "\n")
+            out.flush()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+    except BrokenPipeError:
+        # the reader went away (`export DIR - --watch | head`): stop quietly and keep
+        # the interpreter from failing again when it flushes stdout at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
         return 0
-    except (UnknownHeaderError, ParseError) as e:
+    except (UnknownHeaderError, ParseError, ValueError) as e:
         sys.stderr.write(f"[far_history_editor.py] export error: {e}\n")
         return 2
     except FileNotFoundError as e:
@@ -96,20 +406,62 @@ def cmd_export(args: argparse.Namespace) -> int:
     except Exception as e:
         sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
         return 2
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
 
 
-def cmd_import(args: argparse.Namespace) -> int:
+def cmd_export(args: argparse.Namespace) -> int:
+    if args.category and (args.watch or args.format == "sqlite"):
+        sys.stderr.write("[far_history_editor.py] --category works with json/jsonl exports, not --watch or sqlite\n")
+        return 1
+    if args.watch:
+        return _watch_export(args)
+    if args.format == "sqlite" and args.json_out == "-":
+        sys.stderr.write("[far_history_editor.py] --format sqlite needs a database path, not stdout\n")
+        return 1
+    if (args.profile or args.profile_memory or args.profile_out) and (args.format == "sqlite" or args.cache_dir):
+        sys.stderr.write("[far_history_editor.py] --profile works with json/jsonl exports without --cache-dir\n")
+        return 1
     try:
-        data = _read_json(args.json_in)
+        cache = _open_cache(args)
+        profiler = (PhaseProfiler(memory=args.profile_memory)
+                    if args.profile or args.profile_memory else None)
+        cprof = cProfile.Profile() if args.profile_out else None
+        with profiler if profiler is not None else nullcontext():
+            if cprof is not None:
+                cprof.enable()
+            try:
+                _export_file(args.hst_in, args.json_out, fmt=args.format, pretty=args.pretty,
+                             ensure_ascii=not args.no_ascii, header=args.header, include_header=args.include_header,
+                             iso=not args.no_iso, cache=cache, sqlite_name=args.sqlite_name, profiler=profiler,
+                             categories=args.category, workers=args.workers, pool=args.pool)
+            finally:
+                if cprof is not None:
+                    cprof.disable()
+        if cache is not None and args.cache_stats:
+            _print_cache_stats(cache)
+        if cprof is not None:
+            cprof.dump_stats(args.profile_out)
+            sys.stderr.write(f"[far_history_editor.py] cProfile stats written to {args.profile_out}\n")
+        if profiler is not None:
+            sys.stderr.write(profiler.format_report() + "\n")
+        return 0
+    except (UnknownHeaderError, ParseError, ValueError) as e:
+        sys.stderr.write(f"[far_history_editor.py] export error: {e}\n")
+        return 2
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[far_history_editor.py] file not found: {e}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
 
-        # Prefer explicit override, else JSON["Header"]
-        header: Optional[str] = args.header or data.get("Header")
-        if not header:
-            raise UnknownHeaderError("JSON lacks 'Header' and no --header override was provided.")
-        svc = get_service_for_header(header)
 
-        hst_text = svc.import_(data)
-        _write_text(args.hst_out, hst_text)
+def cmd_import(args: argparse.Namespace) -> int:
+    try:
+        fmt = "sqlite" if args.from_sqlite else args.format
+        _import_file(args.json_in, args.hst_out, fmt=fmt, header=args.header, sqlite_name=args.sqlite_name)
         return 0
     except (UnknownHeaderError, SchemaError, RoundtripError, ParseError) as e:
         sys.stderr.write(f"[far_history_editor.py] import error: {e}\n")
@@ -125,6 +477,331 @@ def cmd_import(args: argparse.Namespace) -> int:
         return 2
 
 
+def cmd_append(args: argparse.Namespace) -> int:
+    try:
+        filetime = iso_to_filetime_int(args.time) if args.time else None
+        append_command(Path(args.hst).expanduser(), args.dir, args.command, filetime)
+        return 0
+    except ValueError as e:
+        sys.stderr.write(f"[far_history_editor.py] append error: {e}\n")
+        return 2
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
+
+
+def _parse_entry_index(spec: str) -> EntryIndex:
+    """'N' -> N; 'CATEGORY:N' -> (CATEGORY, N) for dialogs.hst."""
+    category, sep, index = spec.rpartition(":")
+    if not index.lstrip("-").isdigit():
+        raise ValueError(f"invalid entry index {spec!r} (expected N or CATEGORY:N)")
+    return (category, int(index)) if sep else int(index)
+
+
+def cmd_patch(args: argparse.Namespace) -> int:
+    try:
+        text = _read_text(args.hst_in, raw=True)
+        header = args.header or detect_header(text)
+        if header is None:
+            raise UnknownHeaderError("Header not found; specify --header to force a parser.")
+        svc = get_service_for_header(header)
+
+        delete = [_parse_entry_index(spec) for spec in args.delete]
+        replace: Dict[EntryIndex, str] = {}
+        for spec in args.replace:
+            index, sep, line = spec.partition("=")
+            if not sep:
+                raise ValueError(f"invalid replacement {spec!r} (expected INDEX=TEXT)")
+            replace[_parse_entry_index(index)] = line
+        where = None
+        if args.delete_match:
+            pattern = re.compile("|".join(f"(?:{p})" for p in args.delete_match))
+            field = svc.LINE_FIELD
+            where = lambda _cat, rec: pattern.search(rec.get(field) or "") is not None  # noqa: E731
+
+        _write_text(args.hst_out, svc.patch(text, delete=delete, replace=replace, where=where), raw=True)
+        return 0
+    except (UnknownHeaderError, ValueError, re.error) as e:
+        sys.stderr.write(f"[far_history_editor.py] patch error: {e}\n")
+        return 2
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[far_history_editor.py] file not found: {e}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
+
+
+def cmd_dedup(args: argparse.Namespace) -> int:
+    try:
+        text = _read_text(args.hst_in, raw=True)
+        header = args.header or detect_header(text)
+        if header is None:
+            raise UnknownHeaderError("Header not found; specify --header to force a parser.")
+        svc = get_service_for_header(header)
+        dups = svc.duplicate_indices(text, keep=args.keep)
+        _write_text(args.hst_out, svc.patch(text, delete=dups) if dups else text, raw=True)
+        sys.stderr.write(f"[far_history_editor.py] dedup: removed {len(dups)} repeated entries (kept {args.keep})\n")
+        return 0
+    except (UnknownHeaderError, ValueError) as e:
+        sys.stderr.write(f"[far_history_editor.py] dedup error: {e}\n")
+        return 2
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[far_history_editor.py] file not found: {e}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    try:
+        result = merge_histories([_read_text(path) for path in args.hst_in], limit=args.limit,
+                                 dedup=not args.no_dedup, header=args.header)
+        _write_text(args.hst_out, result.text)
+        sys.stderr.write(
+            f"[far_history_editor.py] merge: {len(args.hst_in)} files, {result.entries_in} entries in, "
+            f"{result.entries_out} out\n"
+        )
+        return 0
+    except (UnknownHeaderError, ValueError) as e:
+        sys.stderr.write(f"[far_history_editor.py] merge error: {e}\n")
+        return 2
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[far_history_editor.py] file not found: {e}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
+
+
+def cmd_redact(args: argparse.Namespace) -> int:
+    try:
+        lines: List[str] = []
+        for path in args.patterns:
+            lines.extend(_read_text(path).splitlines())
+        lines.extend(f"re:{p}" for p in args.pattern)
+        lines.extend(f"lit:{p}" for p in args.literal)
+        patterns = PatternSet.from_lines(lines, ignore_case=args.ignore_case)
+        if not len(patterns):
+            sys.stderr.write("[far_history_editor.py] redact: no patterns given\n")
+            return 1
+
+        text = _read_text(args.hst_in, raw=True)
+        header = args.header or detect_header(text)
+        if header is None:
+            raise UnknownHeaderError("Header not found; specify --header to force a parser.")
+        out, report = redact(get_service_for_header(header), text, patterns,
+                             replacement=args.replacement, drop=args.drop)
+        _write_text(args.hst_out, out, raw=True)
+
+        summary = report.as_dict()
+        sys.stderr.write(
+            f"[far_history_editor.py] redact: {summary['entries']} entries, {summary['matched']} matched, "
+            f"{summary['dropped']} dropped in {report.seconds:.3f}s "
+            f"({summary['entriesPerSec']:.0f} entries/s, {summary['mbPerSec']:.2f} MB/s)\n"
+        )
+        for pattern, n in report.top_hits():
+            sys.stderr.write(f"  {n:8d}  {pattern}\n")
+        if args.report:
+            _write_json(args.report, summary, pretty=True, ensure_ascii=False)
+        return 0
+    except (UnknownHeaderError, ValueError) as e:
+        sys.stderr.write(f"[far_history_editor.py] redact error: {e}\n")
+        return 2
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[far_history_editor.py] file not found: {e}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
+
+
+def cmd_scan_secrets(args: argparse.Namespace) -> int:
+    files: List[Path] = []
+    for name in args.paths:
+        p = Path(name).expanduser()
+        if p.is_dir():
+            files.extend(f for f in sorted(p.rglob("*.hst")) if f.is_file())
+        elif p.is_file():
+            files.append(p)
+        else:
+            sys.stderr.write(f"[far_history_editor.py] file not found: {p}\n")
+            return 1
+
+    t0 = time.perf_counter()
+    total_bytes = total_hits = errors = skipped = 0
+    for path in files:
+        try:
+            with path.open("r", encoding="utf-8", errors="replace") as fp:
+                # Dispatch on the first few KB; files of other history types are not read
+                svc_cls = detect_header_stream(fp)
+                if svc_cls is None:
+                    raise UnknownHeaderError("Header not found")
+                if not args.all_kinds and svc_cls.HEADER not in SCAN_HEADERS:
+                    skipped += 1
+                    continue
+                text = fp.read()
+            total_bytes += len(text)
+            for hit in scan_secrets(svc_cls(), text):
+                total_hits += 1
+                f = hit.finding
+                if args.json:
+                    row = {"file": str(path), "category": hit.category, "index": hit.index,
+                           "field": hit.field, "rule": f.rule, "start": f.start, "end": f.end, "preview": f.preview}
+                    sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+                else:
+                    where = f"{hit.category}:{hit.index}" if hit.category is not None else str(hit.index)
+                    sys.stdout.write(f"{path}:{where}: {f.rule}: {f.preview}\n")
+        except Exception as e:
+            errors += 1
+            sys.stderr.write(f"[far_history_editor.py] scan-secrets failed: {path}: {type(e).__name__}: {e}\n")
+
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    sys.stderr.write(
+        f"[far_history_editor.py] scan-secrets: {len(files) - skipped} files ({skipped} skipped), "
+        f"{total_hits} findings, {total_bytes / 1e6:.2f} MB in {elapsed:.2f}s "
+        f"({total_bytes / 1e6 / elapsed:.2f} MB/s)\n"
+    )
+    if errors:
+        return 2
+    return 3 if total_hits else 0
+
+
+def cmd_index(args: argparse.Namespace) -> int:
+    try:
+        t0 = time.perf_counter()
+        idx = TrigramIndex.build(args.paths)
+        idx.save(Path(args.index_out).expanduser())
+        sys.stderr.write(
+            f"[far_history_editor.py] index: {len(idx.files)} files, {len(idx)} entries, "
+            f"{len(idx.tri_keys)} trigrams in {time.perf_counter() - t0:.2f}s\n"
+        )
+        return 0
+    except UnknownHeaderError as e:
+        sys.stderr.write(f"[far_history_editor.py] index error: {e}\n")
+        return 2
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[far_history_editor.py] file not found: {e}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    try:
+        idx = TrigramIndex.load(Path(args.index).expanduser())
+        for hit in idx.search(args.terms, ignore_case=args.ignore_case, limit=args.limit):
+            service = REGISTRY[hit.header].__name__ if hit.header in REGISTRY else hit.header
+            when = filetime_int_to_iso(hit.filetime) if hit.filetime else None
+            if args.json:
+                row = {"file": hit.path, "service": service, "category": hit.category, "index": hit.index,
+                       "timeISO": when, "text": hit.text}
+                sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+            else:
+                where = f"{hit.category}:{hit.index}" if hit.category is not None else str(hit.index)
+                text = hit.text.replace("\n", "\t")
+                sys.stdout.write(f"{hit.path}\t{service}\t{where}\t{when or '-'}\t{text}\n")
+        return 0
+    except ValueError as e:
+        sys.stderr.write(f"[far_history_editor.py] search error: {e}\n")
+        return 2
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[far_history_editor.py] file not found: {e}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"[far_history_editor.py] unexpected error: {e}\n")
+        return 2
+
+
+# ------------------------------ batch directory mode ------------------------------
+
+# (source path, bytes read, records, error message or None)
+BatchResult = Tuple[str, int, int, Optional[str]]
+
+
+def _export_job(src: str, dst: str, fmt: str, pretty: bool, ensure_ascii: bool, iso: bool,
+                cache_dir: Optional[str] = None, cache_max_bytes: int = DEFAULT_MAX_BYTES) -> BatchResult:
+    """Worker: export a single file; never raises so one bad file can't stop the batch."""
+    try:
+        cache = ParseCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+        n = _export_file(src, dst, fmt=fmt, pretty=pretty, ensure_ascii=ensure_ascii, iso=iso, cache=cache)
+        return src, os.path.getsize(src), n, None
+    except Exception as e:
+        return src, 0, 0, f"{type(e).__name__}: {e}"
+
+
+def _import_job(src: str, dst: str, fmt: str) -> BatchResult:
+    """Worker: import a single file; never raises so one bad file can't stop the batch."""
+    try:
+        n = _import_file(src, dst, fmt=fmt)
+        return src, os.path.getsize(src), n, None
+    except Exception as e:
+        return src, 0, 0, f"{type(e).__name__}: {e}"
+
+
+def _run_batch(label: str, worker: Callable[..., BatchResult], jobs: List[tuple], n_jobs: int) -> int:
+    """Run worker(*job) for every job (in a process pool when n_jobs > 1) and print a summary."""
+    t0 = time.perf_counter()
+    results: List[BatchResult] = []
+    if n_jobs <= 1 or len(jobs) <= 1:
+        results = [worker(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(worker, *job) for job in jobs]
+            results = [f.result() for f in as_completed(futures)]
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+
+    failed = [(src, err) for src, _, _, err in results if err]
+    total_bytes = sum(r[1] for r in results)
+    total_records = sum(r[2] for r in results)
+    sys.stdout.write(
+        f"[far_history_editor.py] {label}: {len(results)} files, {len(results) - len(failed)} ok, "
+        f"{len(failed)} failed, {total_records} records, {total_bytes / 1e6:.2f} MB in {elapsed:.2f}s "
+        f"({len(results) / elapsed:.1f} files/s, {total_records / elapsed:.0f} records/s, "
+        f"{total_bytes / 1e6 / elapsed:.2f} MB/s)\n"
+    )
+    for src, err in sorted(failed):
+        sys.stderr.write(f"[far_history_editor.py] {label} failed: {src}: {err}\n")
+    return 2 if failed else 0
+
+
+def cmd_export_dir(args: argparse.Namespace) -> int:
+    root = Path(args.root).expanduser()
+    if not root.is_dir():
+        sys.stderr.write(f"[far_history_editor.py] not a directory: {root}\n")
+        return 1
+    out_root = Path(args.out_dir).expanduser()
+    suffix = ".jsonl" if args.format == "jsonl" else ".json"
+    jobs = [
+        (str(src), str((out_root / src.relative_to(root)).with_suffix(suffix)),
+         args.format, args.pretty, not args.no_ascii, not args.no_iso,
+         args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+        for src in sorted(root.rglob("*.hst")) if src.is_file()
+    ]
+    return _run_batch("export-dir", _export_job, jobs, args.jobs)
+
+
+def cmd_import_dir(args: argparse.Namespace) -> int:
+    root = Path(args.root).expanduser()
+    if not root.is_dir():
+        sys.stderr.write(f"[far_history_editor.py] not a directory: {root}\n")
+        return 1
+    out_root = Path(args.out_dir).expanduser()
+    jobs = [
+        (str(src), str((out_root / src.relative_to(root)).with_suffix(".hst")), src.suffix[1:])
+        for src in sorted(root.rglob("*")) if src.is_file() and src.suffix in (".json", ".jsonl")
+    ]
+    return _run_batch("import-dir", _import_job, jobs, args.jobs)
+
+
+def _add_cache_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--cache-dir", help="Reuse parse results of unchanged files from this directory (created if missing).")
+    p.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                   help="Evict least recently used cache entries beyond this size (default: %(default).0f).")
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         prog="far_history_editor.py",
@@ -136,6 +813,15 @@ def build_parser() -> argparse.ArgumentParser:
             "  far_history_editor.py import commands.json ~/.config/far2l/history/commands.hst\n"
             "  far_history_editor.py export in.hst - | jq .\n"
             "  far_history_editor.py import - out.hst < edited.json\n"
+            "  far_history_editor.py export in.hst out.jsonl --format jsonl\n"
+            "  far_history_editor.py append commands.hst 'make test' --dir ~/src/project\n"
+            "  far_history_editor.py patch commands.hst commands.hst --delete-match 'token='\n"
+            "  far_history_editor.py dedup folders.hst folders.hst\n"
+            "  far_history_editor.py merge folders.hst host1/folders.hst host2/folders.hst\n"
+            "  far_history_editor.py redact dialogs.hst dialogs.hst --patterns redact.txt --drop\n"
+            "  far_history_editor.py scan-secrets ~/.config/far2l/history/\n"
+            "  far_history_editor.py search histories.idx 'kubectl delete' /prod\n"
+            "  far_history_editor.py export-dir snapshots/ json/ --jobs 8\n"
         ),
     )
     sub = p.add_subparsers(dest="cmd", required=True)
@@ -147,9 +833,38 @@ def build_parser() -> argparse.ArgumentParser:
     pe.add_argument("--header", choices=[
         "[SavedHistory]", "[SavedDialogHistory]", "[SavedFolderHistory]", "[SavedViewHistory]"
     ], help="Force a specific parser if auto-detection is ambiguous/missing.")
-    pe.add_argument("--pretty", action="store_true", help="Pretty-print JSON output with indentation.")
+    pe.add_argument("--format", choices=["json", "jsonl", "sqlite"], default="json",
+                    help="Output a single JSON document (default), JSON Lines (header object, then one record per line) "
+                         "or add the file to the SQLite database json_out.")
+    pe.add_argument("--pretty", action="store_true", help="Pretty-print JSON output with indentation (json format only).")
     pe.add_argument("--no-ascii", action="store_true", help="Do not escape non-ASCII characters in JSON.")
     pe.add_argument("--include-header", action="store_true", help="Include a small _cli block with detection info.")
+    pe.add_argument("--no-iso", action="store_true", help="Omit timeISO from records (skips FILETIME -> ISO conversion).")
+    pe.add_argument("--workers", type=int, default=1,
+                    help="dialogs.hst: decode categories on this many pool workers (json format; default: 1). "
+                         "Output is identical and in file order.")
+    pe.add_argument("--pool", choices=["thread", "process"], default="thread",
+                    help="Pool for --workers (default: thread, as in export_file(): no process start-up or pickling, "
+                         "which dominate on small files; threads only scale on free-threaded Python, so use "
+                         "process for large files on regular builds).")
+    pe.add_argument("--watch", action="store_true",
+                    help="Keep polling hst_in (a file or a directory of *.hst) and write entries added since the "
+                         "last poll as JSON Lines with a 'file' field (all entries on the first poll).")
+    pe.add_argument("--interval", type=float, default=1.0, help="Seconds between polls with --watch (default: 1).")
+    pe.add_argument("--sqlite-name", help="Name of the file inside the database (sqlite format; default: hst_in).")
+    pe.add_argument("--category", action="append", metavar="NAME",
+                    help="dialogs.hst: decode only this category (repeatable). Other categories are exported as "
+                         "{name, Raw} with their original text, which import writes back unchanged.")
+    _add_cache_args(pe)
+    pe.add_argument("--cache-stats", action="store_true", help="Print cache hits/misses/size to stderr (with --cache-dir).")
+    pe.add_argument("--profile", action="store_true",
+                    help="Print a per-phase breakdown (read, lex, split, times, build, json.dump) with entry counts to "
+                         "stderr. Phases run one after another instead of in lockstep.")
+    pe.add_argument("--profile-memory", action="store_true",
+                    help="Like --profile, plus tracemalloc peaks per phase (Python 3.9+). Memory tracing slows the "
+                         "export down several times, so compare phase shares rather than seconds.")
+    pe.add_argument("--profile-out", metavar="FILE.pstats",
+                    help="Also run the export under cProfile and dump the stats to this file (see python -m pstats).")
     pe.set_defaults(func=cmd_export)
 
     # import
@@ -159,8 +874,122 @@ def build_parser() -> argparse.ArgumentParser:
     pi.add_argument("--header", choices=[
         "[SavedHistory]", "[SavedDialogHistory]", "[SavedFolderHistory]", "[SavedViewHistory]"
     ], help="Override JSON['Header'] when importing.")
+    pi.add_argument("--format", choices=["json", "jsonl"], default="json",
+                    help="Input is a single JSON document (default) or JSON Lines as written by export --format jsonl.")
+    pi.add_argument("--from-sqlite", action="store_true",
+                    help="json_in is a database written by export --format sqlite; rebuild one stored file.")
+    pi.add_argument("--sqlite-name", help="Stored file to rebuild (needed when the database holds several).")
     pi.set_defaults(func=cmd_import)
 
+    # append
+    pa = sub.add_parser("append", help="Append one command to commands.hst in place (created if missing)")
+    pa.add_argument("hst", help="commands.hst path")
+    pa.add_argument("command", help="Command line to append")
+    pa.add_argument("--dir", default="", help="Working directory stored in Extras (default: empty).")
+    pa.add_argument("--time", help="Entry time as ISO-8601 (default: now).")
+    pa.set_defaults(func=cmd_append)
+
+    # patch
+    pp = sub.add_parser("patch", help="Delete/replace entries directly in an .hst file (no JSON round-trip)")
+    pp.add_argument("hst_in", help="Input .hst file path (or '-' for stdin)")
+    pp.add_argument("hst_out", help="Output .hst path (or '-' for stdout); may equal hst_in")
+    pp.add_argument("--header", choices=[
+        "[SavedHistory]", "[SavedDialogHistory]", "[SavedFolderHistory]", "[SavedViewHistory]"
+    ], help="Force a specific parser if auto-detection is ambiguous/missing.")
+    pp.add_argument("--delete", action="append", default=[], metavar="INDEX",
+                    help="Delete the entry at INDEX (0-based; CATEGORY:INDEX for dialogs.hst). Repeatable.")
+    pp.add_argument("--delete-match", action="append", default=[], metavar="REGEX",
+                    help="Delete entries whose command/path/line matches REGEX. Repeatable.")
+    pp.add_argument("--replace", action="append", default=[], metavar="INDEX=TEXT",
+                    help="Replace the line of the entry at INDEX with TEXT. Repeatable.")
+    pp.set_defaults(func=cmd_patch)
+
+    # dedup
+    pd = sub.add_parser("dedup", help="Remove repeated entries, keeping the newest (or oldest) of each")
+    pd.add_argument("hst_in", help="Input .hst file path (or '-' for stdin)")
+    pd.add_argument("hst_out", help="Output .hst path (or '-' for stdout); may equal hst_in")
+    pd.add_argument("--keep", choices=["newest", "oldest"], default="newest",
+                    help="Which occurrence of a repeated entry survives (default: newest).")
+    pd.add_argument("--header", choices=[
+        "[SavedHistory]", "[SavedDialogHistory]", "[SavedFolderHistory]", "[SavedViewHistory]"
+    ], help="Force a specific parser if auto-detection is ambiguous/missing.")
+    pd.set_defaults(func=cmd_dedup)
+
+    # merge
+    pm = sub.add_parser("merge", help="Merge histories of one type (e.g. from several hosts) by time")
+    pm.add_argument("hst_out", help="Output .hst path (or '-' for stdout)")
+    pm.add_argument("hst_in", nargs="+", help="Input .hst files, all with the same header")
+    pm.add_argument("--limit", type=int, metavar="K",
+                    help="Keep only the newest K entries (per category for dialogs.hst).")
+    pm.add_argument("--no-dedup", action="store_true",
+                    help="Keep repeated entries (default: keep only the newest of each line/dir).")
+    pm.add_argument("--header", choices=[
+        "[SavedHistory]", "[SavedDialogHistory]", "[SavedFolderHistory]", "[SavedViewHistory]"
+    ], help="Force a specific parser if auto-detection is ambiguous/missing.")
+    pm.set_defaults(func=cmd_merge)
+
+    # redact
+    pr = sub.add_parser("redact", help="Mask or drop entries matching a set of patterns")
+    pr.add_argument("hst_in", help="Input .hst file path (or '-' for stdin)")
+    pr.add_argument("hst_out", help="Output .hst path (or '-' for stdout); may equal hst_in")
+    pr.add_argument("--patterns", action="append", default=[], metavar="FILE",
+                    help="Pattern file: one regex per line ('lit:' prefix for literals, '#' comments). Repeatable.")
+    pr.add_argument("--pattern", action="append", default=[], metavar="REGEX", help="Extra regex pattern. Repeatable.")
+    pr.add_argument("--literal", action="append", default=[], metavar="TEXT", help="Extra literal pattern. Repeatable.")
+    pr.add_argument("--ignore-case", action="store_true", help="Match patterns case-insensitively.")
+    pr.add_argument("--replacement", default=DEFAULT_REPLACEMENT,
+                    help=f"Text substituted for each match (default: {DEFAULT_REPLACEMENT}).")
+    pr.add_argument("--drop", action="store_true", help="Delete matching entries instead of masking them.")
+    pr.add_argument("--header", choices=[
+        "[SavedHistory]", "[SavedDialogHistory]", "[SavedFolderHistory]", "[SavedViewHistory]"
+    ], help="Force a specific parser if auto-detection is ambiguous/missing.")
+    pr.add_argument("--report", metavar="JSON", help="Also write the hit/throughput report as JSON ('-' for stdout).")
+    pr.set_defaults(func=cmd_redact)
+
+    # scan-secrets
+    ps = sub.add_parser("scan-secrets", help="Report likely credentials in history lines (exit code 3 if any)")
+    ps.add_argument("paths", nargs="+", help=".hst files or directories (searched recursively for *.hst)")
+    ps.add_argument("--json", action="store_true", help="Print one JSON object per finding instead of text lines.")
+    ps.add_argument("--all-kinds", action="store_true",
+                    help="Also scan folders.hst and view.hst (default: only commands and dialog histories).")
+    ps.set_defaults(func=cmd_scan_secrets)
+
+    # index
+    px = sub.add_parser("index", help="Build a trigram search index over .hst files")
+    px.add_argument("index_out", help="Index file to write")
+    px.add_argument("paths", nargs="+", help=".hst files or directories (searched recursively for *.hst)")
+    px.set_defaults(func=cmd_index)
+
+    # search
+    pq = sub.add_parser("search", help="Find entries containing all given substrings using a trigram index")
+    pq.add_argument("index", help="Index file written by the index subcommand")
+    pq.add_argument("terms", nargs="+", help="Substrings that must all occur (in the line or, for commands, the dir)")
+    pq.add_argument("--ignore-case", action="store_true", help="Case-insensitive matching.")
+    pq.add_argument("--limit", type=int, help="Stop after this many hits.")
+    pq.add_argument("--json", action="store_true", help="Print one JSON object per hit instead of tab-separated lines.")
+    pq.set_defaults(func=cmd_search)
+
+    # export-dir
+    ped = sub.add_parser("export-dir", help="Export every *.hst under a directory (recursive) to a mirrored JSON tree")
+    ped.add_argument("root", help="Directory to scan for .hst files")
+    ped.add_argument("out_dir", help="Output directory; relative paths are mirrored with a .json/.jsonl suffix")
+    ped.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                     help="Number of worker processes (default: CPU count; 1 runs in-process).")
+    ped.add_argument("--format", choices=["json", "jsonl"], default="json", help="Output format per file.")
+    ped.add_argument("--pretty", action="store_true", help="Pretty-print JSON output with indentation (json format only).")
+    ped.add_argument("--no-ascii", action="store_true", help="Do not escape non-ASCII characters in JSON.")
+    ped.add_argument("--no-iso", action="store_true", help="Omit timeISO from records (skips FILETIME -> ISO conversion).")
+    _add_cache_args(ped)
+    ped.set_defaults(func=cmd_export_dir)
+
+    # import-dir
+    pid = sub.add_parser("import-dir", help="Import every *.json/*.jsonl under a directory (recursive) to a mirrored .hst tree")
+    pid.add_argument("root", help="Directory to scan for .json/.jsonl files")
+    pid.add_argument("out_dir", help="Output directory; relative paths are mirrored with a .hst suffix")
+    pid.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                     help="Number of worker processes (default: CPU count; 1 runs in-process).")
+    pid.set_defaults(func=cmd_import_dir)
+
     return p
 
 
@@ -6,19 +6,44 @@ This package exposes:
 - Newline encoding/decoding helpers (newline_codec.py)
 - Lightweight .hst lexing helpers (hst_lexer.py)
 - Typed JSON models for service interfaces (models.py)
+- Columnar HistoryTable model (table.py)
 - Error types (errors.py)
+- Persistent parse cache (cache.py)
 """
 from far_history_toolset.core.errors import ParseError, SchemaError, RoundtripError, UnknownHeaderError
 from far_history_toolset.core.filetime import (
     FILETIME_EPOCH,
+    FiletimeCacheInfo,
     filetime_hex_to_int_le,
     filetime_int_to_hex_le,
     filetime_int_to_iso,
+    filetime_hex_column_to_ints,
+    filetime_hex_column_to_iso,
+    filetime_ints_to_iso,
+    filetime_cache_info,
+    filetime_cache_clear,
     iso_to_filetime_int,
     now_filetime_int,
 )
-from far_history_toolset.core.newline_codec import smart_split_multiline, encode_literal_backslash_n
-from far_history_toolset.core.hst_lexer import extract_quoted_block, extract_simple_pair, detect_header
+from far_history_toolset.core.newline_codec import (
+    smart_split_multiline,
+    iter_split_multiline,
+    iter_item_spans,
+    encode_literal_backslash_n,
+)
+from far_history_toolset.core.hst_lexer import (
+    HstDocument,
+    HstSection,
+    KeySpan,
+    scan_keys,
+    splice,
+    extract_quoted_block,
+    extract_simple_pair,
+    detect_header,
+    read_header,
+)
+from far_history_toolset.core.cache import ParseCache
+from far_history_toolset.core.table import HistoryTable, HistoryRow
 from far_history_toolset.core import models
 
 __all__ = [
@@ -28,10 +53,16 @@ __all__ = [
     "FILETIME_EPOCH",
     "filetime_hex_to_int_le", "filetime_int_to_hex_le",
     "filetime_int_to_iso", "iso_to_filetime_int", "now_filetime_int",
+    "filetime_hex_column_to_ints", "filetime_hex_column_to_iso", "filetime_ints_to_iso",
+    "filetime_cache_info", "filetime_cache_clear", "FiletimeCacheInfo",
     # newline codec
-    "smart_split_multiline", "encode_literal_backslash_n",
+    "smart_split_multiline", "iter_split_multiline", "iter_item_spans",
+    "encode_literal_backslash_n",
     # lexer
-    "extract_quoted_block", "extract_simple_pair", "detect_header",
+    "HstDocument", "HstSection", "KeySpan", "scan_keys", "splice",
+    "extract_quoted_block", "extract_simple_pair", "detect_header", "read_header",
     # models
-    "models",
+    "models", "HistoryTable", "HistoryRow",
+    # cache
+    "ParseCache",
 ]
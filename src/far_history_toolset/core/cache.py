@@ -0,0 +1,140 @@
+"""
+Persistent on-disk cache for parse results.
+
+ParseCache stores pickled results under a key derived from the source file's
+identity: (absolute path, size, mtime_ns, BLAKE2 hash of the content) plus a
+caller-chosen variant string (e.g. "export:iso=True"). The content hash makes
+a stale hit impossible even when mtime is not updated; it costs one read of
+the file, which is small next to parsing it.
+
+Entries are plain files, so several processes can share one directory:
+- writes go to a temporary file and are renamed into place
+- a hit refreshes the entry's mtime; when the directory grows beyond
+  max_bytes the least recently used entries are removed
+- unreadable entries count as misses and are dropped
+
+Only point a ParseCache at a directory you own: entries are unpickled.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_SUFFIX = ".pkl"
+
+
+class ParseCache:
+    """Size-bounded LRU cache of parse results keyed by file identity and content."""
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def key(path: Union[str, Path], data: bytes, variant: str = "") -> str:
+        """Cache key for the given file contents read from path."""
+        p = Path(path).expanduser().resolve()
+        st = p.stat()
+        content = hashlib.blake2b(data, digest_size=16).hexdigest()
+        ident = f"{p}\0{st.st_size}\0{st.st_mtime_ns}\0{content}\0{variant}"
+        return hashlib.blake2b(ident.encode("utf-8", "surrogateescape"), digest_size=20).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / (key + _SUFFIX)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        entry = self._entry(key)
+        try:
+            with entry.open("rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return False, None
+        except Exception:
+            self.stats["misses"] += 1
+            entry.unlink(missing_ok=True)
+            return False, None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        self.stats["hits"] += 1
+        return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value under key, then evict least recently used entries if over max_bytes."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._entry(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.stats["stores"] += 1
+        self.evict()
+
+    def load(self, path: Union[str, Path], variant: str, compute: Callable[[bytes], Any]) -> Any:
+        """Return compute(file bytes), reusing a cached result for identical file contents.
+
+        :param path: Source file.
+        :param variant: Distinguishes results computed differently from the same file.
+        :param compute: Called with the raw file bytes on a miss; its result is cached.
+        :returns: The (possibly cached) result.
+        """
+        data = Path(path).expanduser().read_bytes()
+        key = self.key(path, data, variant)
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute(data)
+        self.put(key, value)
+        return value
+
+    def usage(self) -> Tuple[int, int]:
+        """(number of entries, total bytes) currently in the cache directory."""
+        count = total = 0
+        for e in os.scandir(self.directory):
+            if e.name.endswith(_SUFFIX):
+                count += 1
+                total += e.stat().st_size
+        return count, total
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Remove least recently used entries until the cache fits max_bytes; returns how many."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        total = 0
+        for e in os.scandir(self.directory):
+            if e.name.endswith(_SUFFIX):
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, e.path))
+                total += st.st_size
+        removed = 0
+        if total > limit:
+            for _, size, path in sorted(entries):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+                if total <= limit:
+                    break
+        self.stats["evictions"] += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        self.evict(max_bytes=-1)
@@ -3,11 +3,22 @@ FILETIME helpers: convert between Far/Windows FILETIME (<-> hex LE) and ISO-8601
 
 - FILETIME is the number of 100-nanosecond intervals since 1601-01-01 UTC.
 - Far2l stores FILETIME values as 8-byte little-endian hex tokens.
+- Column helpers decode a whole Times value at once (one bytes.fromhex call).
+- Scalar conversions are memoized in bounded LRU caches: timestamps cluster
+  heavily (bursts within one second, identical tokens across dialog sections),
+  so each second is formatted once and only the fractional digits are appended.
+  The scalar per-second table is shared and locked; column conversions build
+  their own table per call, so threads decoding Times never share state.
 """
 from __future__ import annotations
 
 import datetime
-from typing import Final
+import functools
+import math
+import sys
+import threading
+from array import array
+from typing import Dict, Final, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 try:
     UTC: datetime.tzinfo = datetime.UTC  # Python 3.11+
@@ -17,11 +28,17 @@ except AttributeError:  # pragma: no cover - older Pythons
 FILETIME_EPOCH: Final[int] = 116444736000000000  # 1601-01-01 .. 1970-01-01 in 100ns ticks
 _TICKS_PER_SEC: Final[int] = 10_000_000
 
+# Cache bounds (entries)
+_HEX_CACHE_SIZE: Final[int] = 1 << 16
+_ISO_CACHE_SIZE: Final[int] = 1 << 16
+_SECOND_CACHE_SIZE: Final[int] = 1 << 14
 
+
+@functools.lru_cache(maxsize=_HEX_CACHE_SIZE)
 def filetime_hex_to_int_le(h: str) -> int:
     """
     Convert an 8-byte little-endian hex string to a FILETIME integer.
-    Accepts shorter strings; left-pads to 16 hex digits.
+    Accepts shorter strings; left-pads to 16 hex digits. Results are cached.
     """
     s = h.strip().zfill(16)[-16:]
     return int.from_bytes(bytes.fromhex(s), "little", signed=False)
@@ -32,10 +49,83 @@ def filetime_int_to_hex_le(v: int) -> str:
     return int(v).to_bytes(8, "little", signed=False).hex()
 
 
+class FiletimeCacheInfo(NamedTuple):
+    """Counters of one conversion cache (the fields of functools' cache_info())."""
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+# Per-second table of the scalar formatter: unix second -> 'YYYY-MM-DDTHH:MM:SS'.
+# Bounded by clearing when full; _SECOND_LOCK guards it and the counters, which
+# also sum up the per-call tables of filetime_ints_to_iso().
+_SECOND_PREFIXES: Dict[float, str] = {}
+_SECOND_STATS: List[int] = [0, 0]  # hits, misses
+_SECOND_LOCK = threading.Lock()
+
+
+def _format_iso(v: int, prefixes: Dict[float, str], stats: List[int]) -> str:
+    """
+    Format one FILETIME like datetime.fromtimestamp(secs, UTC).isoformat(),
+    reusing the whole-second prefix when that second is in `prefixes`.
+    Microseconds are rounded the way fromtimestamp() rounds them: half-even
+    on the float, carrying into the seconds. `stats` counts [hits, misses].
+    """
+    secs = (v - FILETIME_EPOCH) / _TICKS_PER_SEC
+    frac, whole = math.modf(secs)
+    us = round(frac * 1e6)
+    if us < 0:
+        us += 1_000_000
+        whole -= 1
+    if us >= 1_000_000:
+        us -= 1_000_000
+        whole += 1
+    prefix = prefixes.get(whole)
+    if prefix is not None:
+        stats[0] += 1
+        return f"{prefix}.{us:06d}+00:00" if us else prefix + "+00:00"
+    stats[1] += 1
+    iso = datetime.datetime.fromtimestamp(secs, UTC).isoformat()
+    if len(prefixes) >= _SECOND_CACHE_SIZE:
+        prefixes.clear()
+    prefixes[whole] = iso[:19]
+    return iso
+
+
+@functools.lru_cache(maxsize=_ISO_CACHE_SIZE)
 def filetime_int_to_iso(v: int) -> str:
-    """Convert a FILETIME integer to an ISO-8601 UTC timestamp string."""
-    secs = (int(v) - FILETIME_EPOCH) / _TICKS_PER_SEC
-    return datetime.datetime.fromtimestamp(secs, UTC).isoformat()
+    """
+    Convert a FILETIME integer to an ISO-8601 UTC timestamp string.
+    Output matches datetime.isoformat(); results are cached and the
+    'YYYY-MM-DDTHH:MM:SS' part is shared by all values within one second.
+    """
+    v = int(v)
+    with _SECOND_LOCK:
+        return _format_iso(v, _SECOND_PREFIXES, _SECOND_STATS)
+
+
+def filetime_cache_info() -> Dict[str, FiletimeCacheInfo]:
+    """
+    Hit/miss counters of the conversion caches, by name. "second_prefix"
+    counts all whole-second lookups; its currsize is the shared scalar table.
+    """
+    with _SECOND_LOCK:
+        second = FiletimeCacheInfo(_SECOND_STATS[0], _SECOND_STATS[1], _SECOND_CACHE_SIZE, len(_SECOND_PREFIXES))
+    return {
+        "hex_to_int": FiletimeCacheInfo(*filetime_hex_to_int_le.cache_info()),
+        "int_to_iso": FiletimeCacheInfo(*filetime_int_to_iso.cache_info()),
+        "second_prefix": second,
+    }
+
+
+def filetime_cache_clear() -> None:
+    """Empty the conversion caches and reset their counters."""
+    filetime_hex_to_int_le.cache_clear()
+    filetime_int_to_iso.cache_clear()
+    with _SECOND_LOCK:
+        _SECOND_PREFIXES.clear()
+        _SECOND_STATS[:] = [0, 0]
 
 
 def iso_to_filetime_int(iso: str) -> int:
@@ -49,3 +139,86 @@ def iso_to_filetime_int(iso: str) -> int:
 def now_filetime_int() -> int:
     """Current time as FILETIME integer."""
     return int(datetime.datetime.now(UTC).timestamp() * _TICKS_PER_SEC) + FILETIME_EPOCH
+
+
+def filetime_ints_to_iso(values: Iterable[int]) -> List[Optional[str]]:
+    """
+    Batched filetime_int_to_iso() without the per-value LRU: each distinct
+    second goes through datetime once (a per-second table local to the call,
+    so concurrent calls share nothing) and only the fractional digits are
+    formatted for the rest. Values outside the datetime range become None.
+    """
+    out: List[Optional[str]] = []
+    append = out.append
+    fmt = _format_iso
+    prefixes: Dict[float, str] = {}
+    stats = [0, 0]
+    for v in values:
+        try:
+            append(fmt(v, prefixes, stats))
+        except (OverflowError, ValueError, OSError):
+            append(None)
+    with _SECOND_LOCK:
+        _SECOND_STATS[0] += stats[0]
+        _SECOND_STATS[1] += stats[1]
+    return out
+
+
+def _hex_column(times: Union[str, Sequence[str]]) -> Tuple[array, List[int]]:
+    """
+    Decode hex tokens to an array('Q') of FILETIME ints plus the indices of
+    tokens that could not be parsed (stored as 0).
+
+    Canonical 16-digit tokens are decoded with a single bytes.fromhex() call;
+    only irregular tokens go through filetime_hex_to_int_le() one by one.
+    """
+    tokens = times.split() if isinstance(times, str) else list(times)
+    irregular = [i for i, t in enumerate(tokens) if len(t) != 16]
+    canonical = tokens
+    if irregular:
+        canonical = list(tokens)
+        for i in irregular:
+            canonical[i] = "0" * 16
+
+    out = array("Q")
+    try:
+        out.frombytes(bytes.fromhex("".join(canonical)))
+        if sys.byteorder == "big":  # pragma: no cover - little-endian hosts
+            out.byteswap()
+    except ValueError:
+        # Some 16-char token is not hex: decode everything per token.
+        out = array("Q", bytes(8 * len(tokens)))
+        irregular = list(range(len(tokens)))
+
+    invalid: List[int] = []
+    for i in irregular:
+        try:
+            out[i] = filetime_hex_to_int_le(tokens[i])
+        except (ValueError, OverflowError):
+            out[i] = 0
+            invalid.append(i)
+    return out, invalid
+
+
+def filetime_hex_column_to_ints(times: Union[str, Sequence[str]], invalid: int = 0) -> array:
+    """
+    Convert a whole Times value (space separated hex LE tokens, or a token list)
+    to an array('Q') of FILETIME integers. Unparsable tokens become `invalid`.
+    """
+    out, bad = _hex_column(times)
+    if invalid:
+        for i in bad:
+            out[i] = invalid
+    return out
+
+
+def filetime_hex_column_to_iso(times: Union[str, Sequence[str]]) -> List[Optional[str]]:
+    """
+    Convert a whole Times value (or token list) to ISO-8601 strings in one pass.
+    Unparsable or out-of-range tokens become None, like the per-token helpers.
+    """
+    ints, invalid = _hex_column(times)
+    out = filetime_ints_to_iso(ints)
+    for i in invalid:
+        out[i] = None
+    return out
@@ -2,25 +2,193 @@
 Minimal lexing helpers for .hst files.
 
 We intentionally keep this tiny and predictable:
+- scan_keys / HstDocument: one pass over the text indexing every section and key span
+- splice:                apply (start, end, replacement) edits to the original text
 - extract_quoted_block:  key="...possibly multiline with inner quotes..."<EOL>
 - extract_simple_pair:   key=value
 - detect_header:         returns the first known header tag if present
+- read_header:           same, looking only at the first few KB of a stream
 """
 from __future__ import annotations
 
+import functools
 import re
-from typing import Tuple, Optional
+from typing import IO, AnyStr, Dict, List, NamedTuple, Optional, Pattern, Tuple
 
 # Precompiled fragments
 _NEXT_KEY_RE = re.compile(r"^[A-Za-z0-9_]+=", re.MULTILINE)
+_TOKEN_RE = re.compile(
+    r"^(?:[ \t]*\[(?P<section>[^\]\r\n]+)\][ \t\r]*$|(?P<key>[A-Za-z0-9_]+)=)",
+    re.MULTILINE,
+)
 
-# Known headers by precedence order
+# Known headers
 KNOWN_HEADERS = (
     "[SavedHistory]",
     "[SavedDialogHistory]",
     "[SavedFolderHistory]",
     "[SavedViewHistory]",
 )
+# Any known header alone on its line: one search finds whichever comes first
+_HEADER_RE = re.compile(r"^\s*(" + "|".join(re.escape(h) for h in KNOWN_HEADERS) + r")\s*$", re.MULTILINE)
+
+# How much of a stream read_header() looks at; far2l writes the header on the first line
+HEADER_PROBE_BYTES = 4096
+
+
+class KeySpan(NamedTuple):
+    """
+    Offsets of one key inside the scanned text.
+
+    - value_start: first character after 'key='
+    - line_end:    end of the line holding 'key=' (exclusive, before the newline)
+    - value_end:   start of the next key/section line, or EOF
+    """
+    key: str
+    value_start: int
+    line_end: int
+    value_end: int
+
+
+class HstSection:
+    """A [Section] of an .hst file with the spans of the keys it contains."""
+    __slots__ = ("name", "start", "end", "keys")
+
+    def __init__(self, name: Optional[str], start: int, end: int = -1) -> None:
+        self.name = name                  # text between brackets, None before the first header
+        self.start = start                # offset of the header line (or 0)
+        self.end = end                    # offset of the next section header, or EOF
+        self.keys: Dict[str, KeySpan] = {}
+
+    def __repr__(self) -> str:
+        return f"HstSection({self.name!r}, {self.start}, {self.end}, keys={list(self.keys)})"
+
+
+def scan_keys(text: str) -> List[HstSection]:
+    """
+    Walk the text once and record every section and the span of every key.
+
+    A value runs from 'key=' up to the next line that starts with SOMEKEY= or
+    a [Section] header (or EOF), exactly like extract_quoted_block() does.
+    When a key repeats inside a section, the first occurrence wins.
+    """
+    sections: List[HstSection] = []
+    current = HstSection(None, 0)
+    pending: Optional[Tuple[str, int, int]] = None  # key, value_start, line_end
+
+    def close_key(boundary: int) -> None:
+        if pending is not None:
+            key, vs, le = pending
+            current.keys.setdefault(key, KeySpan(key, vs, min(le, boundary), boundary))
+
+    for m in _TOKEN_RE.finditer(text):
+        close_key(m.start())
+        pending = None
+        name = m.group("section")
+        if name is not None:
+            if current.name is not None or current.keys:
+                current.end = m.start()
+                sections.append(current)
+            current = HstSection(name, m.start())
+        else:
+            vs = m.end()
+            le = text.find("\n", vs)
+            pending = (m.group("key"), vs, len(text) if le < 0 else le)
+
+    close_key(len(text))
+    current.end = len(text)
+    if current.name is not None or current.keys:
+        sections.append(current)
+    return sections
+
+
+class HstDocument:
+    """
+    Offset index over an .hst text built by a single scan_keys() pass.
+
+    Values are sliced out of the original text on demand, so reading N keys
+    costs O(len(value)) each instead of rescanning/copying the whole file.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.sections = scan_keys(text)
+        # Document-wide view: first occurrence of each key in any section
+        self.keys: Dict[str, KeySpan] = {}
+        for sec in self.sections:
+            for key, span in sec.keys.items():
+                self.keys.setdefault(key, span)
+
+    def section(self, name: str) -> Optional[HstSection]:
+        """Return the first section called `name` (without brackets), or None."""
+        for sec in self.sections:
+            if sec.name == name:
+                return sec
+        return None
+
+    def span(self, key: str, section: Optional[HstSection] = None) -> Optional[KeySpan]:
+        """Return the span for key in section (or anywhere in the document)."""
+        keys = self.keys if section is None else section.keys
+        return keys.get(key)
+
+    def simple(self, key: str, section: Optional[HstSection] = None) -> str:
+        """Same result as extract_simple_pair(): the rest of the key line, stripped."""
+        sp = self.span(key, section)
+        if sp is None:
+            return ""
+        return self.text[sp.value_start:sp.line_end].strip()
+
+    def quoted(self, key: str, section: Optional[HstSection] = None) -> str:
+        """Same result as extract_quoted_block(): the block without its closing quote."""
+        sp = self.span(key, section)
+        if sp is None:
+            return ""
+        start, end = self.quoted_bounds(sp)
+        if start < 0:
+            return ""
+        return self.text[start:end]
+
+    def quoted_bounds(self, sp: KeySpan) -> Tuple[int, int]:
+        """
+        Return (start, end) offsets of the inner part of a quoted value,
+        or (-1, -1) when the value does not start with a quote.
+        """
+        text = self.text
+        if sp.value_start >= len(text) or text[sp.value_start] != '"':
+            return -1, -1
+        start = sp.value_start + 1
+        end = sp.value_end
+        # Drop exactly one terminal quote and trailing whitespace/newlines if present.
+        j = end
+        while j > start and text[j - 1].isspace():
+            j -= 1
+        if j > start and text[j - 1] == '"':
+            end = j - 1
+        return start, end
+
+
+def splice(text: str, edits: List[Tuple[int, int, str]]) -> str:
+    """
+    Replace text[start:end] with replacement for every (start, end, replacement).
+    Edits must not overlap; they are applied in offset order, so untouched
+    parts of the text are copied once and never re-parsed.
+    """
+    out: List[str] = []
+    pos = 0
+    for start, end, repl in sorted(edits, key=lambda e: (e[0], e[1])):
+        if start < pos:
+            raise ValueError(f"overlapping edit at offset {start}")
+        out.append(text[pos:start])
+        out.append(repl)
+        pos = end
+    out.append(text[pos:])
+    return "".join(out)
+
+
+@functools.lru_cache(maxsize=64)
+def _key_regex(pattern: str, key: str) -> Pattern[str]:
+    """Compile (and memoize) a per-key pattern used by the extract_* helpers."""
+    return re.compile(pattern.format(key=re.escape(key)), re.MULTILINE)
 
 
 def extract_quoted_block(text: str, key: str) -> Tuple[str, str]:
@@ -29,7 +197,7 @@ def extract_quoted_block(text: str, key: str) -> Tuple[str, str]:
     We scan from 'key="' until the next line that starts with SOMEKEY= or EOF.
     Then we strip exactly one closing quote at the very end (with trailing ws).
     """
-    m = re.compile(rf'^{re.escape(key)}="', re.MULTILINE).search(text)
+    m = _key_regex('^{key}="', key).search(text)
     if not m:
         return "", text
 
@@ -49,7 +217,7 @@ def extract_quoted_block(text: str, key: str) -> Tuple[str, str]:
 
 def extract_simple_pair(text: str, key: str) -> Tuple[str, str]:
     """Extract a simple key=value pair (value is everything to line end)."""
-    m = re.compile(rf'^{re.escape(key)}=(.*)$', re.MULTILINE).search(text)
+    m = _key_regex("^{key}=(.*)$", key).search(text)
     if not m:
         return "", text
     return m.group(1).strip(), text[:m.start()] + text[m.end():]
@@ -57,7 +225,29 @@ def extract_simple_pair(text: str, key: str) -> Tuple[str, str]:
 
 def detect_header(text: str) -> Optional[str]:
     """Return the first recognized header found in the text, else None."""
-    for hdr in KNOWN_HEADERS:
-        if re.search(rf"^\s*{re.escape(hdr)}\s*$", text, re.MULTILINE):
-            return hdr
-    return None
+    m = _HEADER_RE.search(text)
+    return m.group(1) if m else None
+
+
+def read_header(fp: IO[AnyStr], max_bytes: int = HEADER_PROBE_BYTES) -> Optional[str]:
+    """
+    Detect the header from the first max_bytes of a text or binary stream.
+
+    Only a prefix is read, so the cost does not depend on the file size. A
+    line cut off by the limit is ignored. The stream position is restored,
+    so the caller can go on to read the whole file.
+
+    :param fp: Seekable stream opened in text or binary mode (bytes are decoded as UTF-8).
+    :param max_bytes: Size of the prefix to look at (characters for text streams).
+    :returns: The first known header found in the prefix, else None.
+    :raises OSError: If the stream is not seekable.
+    """
+    pos = fp.tell()
+    try:
+        head = fp.read(max_bytes)
+    finally:
+        fp.seek(pos)
+    prefix = head.decode("utf-8", errors="replace") if isinstance(head, bytes) else head
+    if len(head) >= max_bytes:
+        prefix = prefix[:prefix.rfind("\n") + 1]
+    return detect_header(prefix)
@@ -3,12 +3,93 @@ Typed JSON-facing models used by services.
 
 Services are free to construct dicts directly; these dataclasses/TypedDicts
 document the expected shapes and help with static checking in larger codebases.
+LazyIsoRecord is the one runtime type: a record dict whose timeISO is derived
+from timeHex only when first needed.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from far_history_toolset.core.filetime import filetime_hex_to_int_le, filetime_int_to_iso
+
+
+# ------------------------------- Lazy record dicts -------------------------------
+
+class LazyIsoRecord(dict):
+    """
+    Record dict that fills in "timeISO" from "timeHex" on first read.
+
+    Indexing rec["timeISO"], rec.get("timeISO"), iteration, items() (which is
+    what json.dump uses) and comparisons all materialize the value, so the
+    serialized output is identical to an eagerly built record: timeISO is the
+    last key, exactly where export() puts it.
+    """
+    __slots__ = ()
+
+    def _materialize(self) -> None:
+        if not dict.__contains__(self, "timeISO"):
+            hx = dict.get(self, "timeHex")
+            iso: Optional[str] = None
+            if hx:
+                try:
+                    iso = filetime_int_to_iso(filetime_hex_to_int_le(hx))
+                except Exception:
+                    iso = None
+            dict.__setitem__(self, "timeISO", iso)
+
+    def __missing__(self, key: str) -> Any:
+        if key != "timeISO":
+            raise KeyError(key)
+        self._materialize()
+        return dict.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "timeISO":
+            self._materialize()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key == "timeISO" or dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._materialize()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+
+    def copy(self) -> Dict[str, Any]:
+        self._materialize()
+        return dict(dict.items(self))
+
+    def __eq__(self, other: object) -> bool:
+        self._materialize()
+        if isinstance(other, LazyIsoRecord):
+            other._materialize()
+        return dict.__eq__(self, other)
+
+    def __repr__(self) -> str:
+        self._materialize()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        self._materialize()
+        return dict, (dict(dict.items(self)),)
+
 
 # ----------------------------- Commands (SavedHistory) -----------------------------
 
@@ -7,42 +7,153 @@ This module normalizes those encodings and splits/joins predictably.
 """
 from __future__ import annotations
 
-from typing import List
+import itertools
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+# One separator token: CRLF/CR/LF or a run of backslashes followed by 'n'
+# (nested encodings like "\\\\n" collapse to a single item boundary).
+# A run is only tried from its first backslash, which keeps long runs linear.
+_ITEM_SEP_RE = re.compile(r"(?<!\\)\\+n|\r\n|\r|\n")
 
-def smart_split_multiline(value: str) -> List[str]:
+# iter_split_multiline() decodes values in blocks of about this many characters
+_STREAM_CHUNK = 1 << 16
+
+
+def _split_block(s: str, keep_empty: bool = False) -> List[str]:
+    """
+    Decode and split one complete block of a value. Every step is a single
+    C-level pass over the block, so the cost is linear whatever the nesting.
+    With keep_empty, empty items (including a trailing one) are kept.
+    """
+    if "\r" in s:
+        s = s.replace("\r\n", "\n").replace("\r", "\n")
+    if "\\\\n" in s:
+        # Nested separators: split on the '\\n' that ends every run, then drop
+        # the rest of each run (the backslashes left at the end of a part)
+        parts = s.split("\\n")
+        last = parts.pop()
+        s = "\n".join([p.rstrip("\\") for p in parts]) + "\n" + last
+    else:
+        s = s.replace("\\n", "\n")
+    if keep_empty:
+        return s.split("\n")
+    return [x for x in s.split("\n") if x != ""]
+
+
+def _drop_trailing_empty(items: List[str]) -> List[str]:
+    """Remove the empty items at the end of a positional item list (in place)."""
+    while items and items[-1] == "":
+        items.pop()
+    return items
+
+
+def smart_split_multiline(value: str, keep_empty: bool = False) -> List[str]:
     """
     Convert encoded newline variants inside a single quoted value into actual
     newlines and split to items. Handles CRLF, CR, LF. Also handles nested
-    backslash encodings by first collapsing "\\\\n" -> "\\n" repeatedly, then
-    converting "\\n" -> "\n".
+    backslash encodings: any run of backslashes followed by 'n' ("\\n",
+    "\\\\n", ...) is one item boundary. Empty items are dropped, unless
+    keep_empty is set: then items are positional and only the empty items at
+    the end are dropped (a list padded with empty items reads back shorter).
+
+    The value is decoded in a fixed number of linear passes, independent of
+    how deeply the backslashes are nested.
 
     Example:
     - r"a\\n b\\n c" -> ["a", "b", "c"]
     - r"x\ny" -> ["x", "y"]
+    - r"\n/src\n" with keep_empty -> ["", "/src"]
     """
     if not value:
         return []
+    if keep_empty:
+        return _drop_trailing_empty(_split_block(value, True))
+    return _split_block(value)
 
-    # Normalize newline forms in the raw string
-    s = value.replace("\r\n", "\n").replace("\r", "\n")
 
-    # First collapse nested backslashes so that sequences like "\\\\n"
-    # become "\\n" (and deeper nestings reduce step by step).
-    prev = None
-    while prev != s:
-        prev = s
-        s = s.replace("\\\\n", "\\n")
+def iter_split_multiline(value: str, keep_empty: bool = False) -> Iterator[str]:
+    """
+    Lazy variant of smart_split_multiline(): yield the decoded items one by one.
+    The value is decoded in blocks of about _STREAM_CHUNK characters cut right
+    after a separator, so callers can stream huge Lines/Extras values without
+    materializing the whole item list, at the speed of the list version.
+    """
+    n = len(value)
+    start = 0
+    pending = 0     # keep_empty: empty items held back until a non-empty one follows
+    while start < n:
+        end = start + _STREAM_CHUNK
+        if end >= n:
+            cut = n
+        else:
+            i = value.rfind("\\n", start, end)
+            j = max(value.rfind("\n", start, end), value.rfind("\r", start, end))
+            cut = max(i + 2 if i >= 0 else -1, j + 1 if j >= 0 else -1)
+            if 0 < cut < n and value[cut - 1] == "\r" and value[cut] == "\n":
+                cut += 1    # keep CRLF together: it is one separator
+            if cut <= start:
+                # One item longer than a block: cut after the next separator instead
+                m = _ITEM_SEP_RE.search(value, end)
+                cut = m.end() if m else n
+        if not keep_empty:
+            yield from _split_block(value[start:cut])
+        else:
+            items = _split_block(value[start:cut], True)
+            if cut < n:
+                items.pop()     # the block ends with a separator: no item after it yet
+            for item in items:
+                if item == "":
+                    pending += 1
+                    continue
+                if pending:
+                    yield from itertools.repeat("", pending)
+                    pending = 0
+                yield item
+        start = cut
 
-    # Now convert literal backslash-n to actual newline
-    s = s.replace("\\n", "\n")
 
-    return [x for x in s.split("\n") if x != ""]
+def iter_item_spans(text: str, start: int = 0, end: Optional[int] = None,
+                    keep_empty: bool = False) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) offsets of the items iter_split_multiline() would return
+    for text[start:end] (with the same keep_empty), relative to text. Lets
+    callers edit single items in place without decoding or re-encoding the
+    rest of the value; empty items have empty spans.
+    """
+    if end is None:
+        end = len(text)
+    pos = start
+    pending: List[Tuple[int, int]] = []
+    for m in _ITEM_SEP_RE.finditer(text, start, end):
+        if m.start() > pos:
+            if pending:
+                yield from pending
+                pending = []
+            yield pos, m.start()
+        elif keep_empty:
+            pending.append((pos, pos))
+        pos = m.end()
+    if pos < end:
+        yield from pending
+        yield pos, end
 
 
-def encode_literal_backslash_n(lines: List[str]) -> str:
+def encode_literal_backslash_n(lines: Iterable[str], out: Optional[List[str]] = None) -> str:
     """
-    Join a list of items with real newlines, then encode newlines as literal '\\n'
-    (the format most Far2l history files use inside quoted blocks).
+    Join items with literal '\\n' separators, encoding newlines inside items
+    as literal '\\n' too (the format most Far2l history files use inside
+    quoted blocks). Same result as joining with real newlines and replacing
+    them all, without the intermediate copy.
+
+    :param lines: Items to encode.
+    :param out: Optional chunk buffer (e.g. the list a serializer joins once at
+                the end); the encoded value is appended to it.
+    :returns: The encoded value.
     """
-    return "\n".join(lines).replace("\n", "\\n")
+    s = "\\n".join(lines)
+    if "\n" in s:
+        s = s.replace("\n", "\\n")
+    if out is not None:
+        out.append(s)
+    return s
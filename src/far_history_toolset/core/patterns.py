@@ -0,0 +1,235 @@
+"""
+Many search patterns compiled into a single matcher.
+
+PatternSet joins every pattern into one alternation regex, so a line is
+scanned once no matter how many patterns there are:
+- every regex pattern becomes one capturing branch; the branch's group is
+  the match's lastindex, so a match is attributed to its pattern without
+  running any regex again. The pattern's own groups are renamed per pattern
+  (numbered backreferences become named ones), so backreferences keep
+  pointing at the right group and two patterns may reuse a group name
+- literal patterns are merged into a single trie-shaped regex in one
+  capturing group (shared prefixes are tested once), and the matched text
+  identifies the literal
+
+Pattern files hold one pattern per line; blank lines and lines starting with
+'#' are ignored, 'lit:' marks a literal and an optional 're:' a regex.
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Match, Optional, Pattern, Sequence, Tuple, Union
+
+# A leading global flag group such as "(?i)" must become a scoped "(?i:...)"
+# once the pattern is wrapped in a group.
+_LEADING_FLAGS_RE = re.compile(r"\A\(\?([aiLmsux]+)\)")
+
+_OCTAL = "01234567"
+
+
+def _scope_groups(pattern: str, prefix: str) -> str:
+    """
+    Rewrite the groups of one (valid) pattern so it can share a regex with
+    others: every capturing group gets a name starting with prefix, and
+    numbered or named backreferences and conditionals use those names.
+    Character classes and escapes are copied unchanged.
+    """
+    out: List[str] = []
+    names: List[str] = []       # group number - 1 -> scoped name
+    i, n = 0, len(pattern)
+    in_class = False
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            digits = pattern[i + 1:i + 3]
+            if not in_class and digits[:1].isdigit() and digits[0] != "0" and not (
+                    len(pattern[i + 1:i + 4]) == 3 and all(d in _OCTAL for d in pattern[i + 1:i + 4])):
+                digits = digits if digits.isdigit() else digits[0]
+                out.append(f"(?P={names[int(digits) - 1]})")
+                i += 1 + len(digits)
+            else:
+                out.append(pattern[i:i + 2])
+                i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+            out.append(c)
+            i += 1
+            continue
+        if c == "[":
+            # A ']' right after '[' or '[^' is a literal member
+            j = i + 1
+            if pattern.startswith("^", j):
+                j += 1
+            if pattern.startswith("]", j):
+                j += 1
+            out.append(pattern[i:j])
+            in_class = True
+            i = j
+            continue
+        if c == "(":
+            if pattern.startswith("(?P<", i):
+                j = pattern.index(">", i)
+                names.append(prefix + pattern[i + 4:j])
+                out.append(f"(?P<{names[-1]}>")
+                i = j + 1
+                continue
+            if pattern.startswith("(?P=", i):
+                j = pattern.index(")", i)
+                out.append(f"(?P={prefix}{pattern[i + 4:j]})")
+                i = j + 1
+                continue
+            if pattern.startswith("(?(", i):
+                j = pattern.index(")", i)
+                ref = pattern[i + 3:j]
+                out.append(f"(?({names[int(ref) - 1] if ref.isdigit() else prefix + ref})")
+                i = j + 1
+                continue
+            if not pattern.startswith("(?", i):
+                names.append(f"{prefix}{len(names) + 1}")
+                out.append(f"(?P<{names[-1]}>")
+                i += 1
+                continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a regex matching any of the words, sharing common prefixes."""
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) > 1:
+            body = "(?:" + "|".join(branches) + ")"
+        elif "" in node:
+            body = "(?:" + branches[0] + ")"
+        else:
+            body = branches[0]
+        # A word ending here makes the rest optional (greedy: longest literal wins)
+        return body + "?" if "" in node else body
+
+    return emit(trie)
+
+
+class PatternSet:
+    """
+    Regex and literal patterns compiled into one alternation.
+
+    Pattern ids are positions in `names`: regex patterns first, in the given
+    order, then literals.
+    """
+
+    def __init__(self, regexes: Sequence[str] = (), literals: Sequence[str] = (),
+                 ignore_case: bool = False) -> None:
+        flags = re.IGNORECASE if ignore_case else 0
+        self.names: List[str] = list(regexes) + list(literals)
+        self._ignore_case = ignore_case
+        self._group_ids: Dict[int, int] = {}     # branch group number -> pattern id
+        self._literal_ids: Dict[str, int] = {}
+        self._literal_group = 0
+        self._literal_base = len(regexes)         # id of the first literal
+
+        parts: List[str] = []
+        groups = 0
+        for pid, pattern in enumerate(regexes):
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error as e:
+                raise ValueError(f"invalid pattern {pattern!r}: {e}") from None
+            m = _LEADING_FLAGS_RE.match(pattern)
+            body = _scope_groups(pattern[m.end():] if m else pattern, f"_p{pid}_")
+            if compiled.flags & re.VERBOSE:
+                body += "\n"   # a trailing '#' comment must not swallow the closing ')'
+            parts.append(f"((?{m.group(1)}:{body}))" if m else f"({body})")
+            groups += 1
+            self._group_ids[groups] = pid
+            groups += compiled.groups
+
+        base = self._literal_base
+        for k, lit in enumerate(literals):
+            if not lit:
+                raise ValueError("empty literal pattern")
+            self._literal_ids.setdefault(lit.casefold() if ignore_case else lit, base + k)
+        if literals:
+            parts.append("(" + _trie_regex(dict.fromkeys(literals)) + ")")
+            self._literal_group = groups + 1
+
+        try:
+            self.regex: Optional[Pattern[str]] = re.compile("|".join(parts), flags) if parts else None
+        except re.error as e:
+            raise ValueError(f"cannot combine patterns: {e}") from None
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], ignore_case: bool = False) -> "PatternSet":
+        """Build a PatternSet from pattern-file lines ('lit:' / 're:' prefixes, '#' comments)."""
+        regexes: List[str] = []
+        literals: List[str] = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            if line.startswith("lit:"):
+                literals.append(line[4:])
+            else:
+                regexes.append(line[3:] if line.startswith("re:") else line)
+        return cls(regexes, literals, ignore_case=ignore_case)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], ignore_case: bool = False) -> "PatternSet":
+        """Load a pattern file (see the module docstring for the format)."""
+        with Path(path).open("r", encoding="utf-8") as f:
+            return cls.from_lines(f, ignore_case=ignore_case)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def pattern_id(self, m: Match[str]) -> int:
+        """Return the id of the pattern that produced match m (a match of self.regex)."""
+        if m.lastindex == self._literal_group:
+            text = m.group(0)
+            if not self._ignore_case:
+                return self._literal_ids[text]
+            pid = self._literal_ids.get(text.casefold())
+            if pid is None:
+                # re's case-insensitive matching and casefold() disagree on a few characters
+                base = self._literal_base
+                pid = next(base + k for k, lit in enumerate(self.names[base:])
+                           if re.fullmatch(re.escape(lit), text, re.IGNORECASE))
+            return pid
+        return self._group_ids[m.lastindex]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, Match[str]]]:
+        """Yield (pattern id, match) for every non-overlapping match in text."""
+        if self.regex is None:
+            return
+        for m in self.regex.finditer(text):
+            yield self.pattern_id(m), m
+
+    def search(self, text: str) -> Optional[int]:
+        """Return the id of the first matching pattern, or None."""
+        if self.regex is None:
+            return None
+        m = self.regex.search(text)
+        return None if m is None else self.pattern_id(m)
+
+    def sub(self, text: str, replacement: str, hits: Optional[List[int]] = None) -> str:
+        """Replace every match with replacement, adding match counts per pattern id to hits."""
+        if self.regex is None:
+            return text
+
+        def repl(m: Match[str]) -> str:
+            if hits is not None:
+                hits[self.pattern_id(m)] += 1
+            return replacement
+
+        return self.regex.sub(repl, text)
@@ -0,0 +1,100 @@
+"""
+Heuristic credential detection for single history lines.
+
+scan_line() runs two cheap gates before any real work:
+- one case-insensitive anchor regex (secret/token/pass/key/bearer/://user@...);
+  only lines containing an anchor are run through the rule PatternSet
+- long base64-like tokens are the only strings whose Shannon entropy is
+  computed; a token is flagged when it mixes upper/lower case and digits and
+  its entropy is above ENTROPY_THRESHOLD
+
+Previews never contain the full secret (see mask_secret()).
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import List, NamedTuple, Tuple
+
+from far_history_toolset.core.patterns import PatternSet
+
+# (rule name, regex); order matters when two rules match at the same offset
+SECRET_RULES: Tuple[Tuple[str, str], ...] = (
+    ("private-key", r"-----BEGIN [A-Z ]*PRIVATE KEY-----"),
+    ("aws-access-key-id", r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b"),
+    ("aws-secret-access-key", r"(?i)\bAWS_SECRET_ACCESS_KEY\s*[=:]\s*['\"]?[^\s'\"]+"),
+    ("github-token", r"\bgh[pousr]_[A-Za-z0-9]{36,}\b"),
+    ("slack-token", r"\bxox[abprs]-[A-Za-z0-9-]{10,}"),
+    ("bearer-token", r"(?i)\bbearer\s+[A-Za-z0-9._~+/=-]{16,}"),
+    ("basic-auth-flag", r"(?<!\S)(?:-u|--user)(?:\s+|=)['\"]?[^\s:'\"]+:[^\s'\"]+"),
+    ("url-credentials", r"\b[a-zA-Z][a-zA-Z0-9+.-]*://[^\s/:@]+:[^\s/@]+@"),
+    ("password-flag", r"(?i)--pass(?:word|wd)?(?:\s+|=)['\"]?[^\s'\"-][^\s'\"]*"),
+    ("secret-assignment",
+     r"(?i)\b[a-z0-9_]*(?:secret|token|passw(?:or)?d|api_?key|access_?key|private_?key)[a-z0-9_]*"
+     r"\s*[=:]\s*['\"]?[^\s'\"$]{4,}"),
+)
+
+# Every rule needs one of these substrings; lines without any skip the rules.
+_ANCHOR_RE = re.compile(
+    r"(?i)secret|token|passw|pass\b|key|bearer|-u\b|--user|://|akia|asia|gh[pousr]_|xox[abprs]-|private"
+)
+# "/" is left out so paths split into short segments; rules catch slash-bearing keys
+_TOKEN_RE = re.compile(r"[A-Za-z0-9+=_-]{20,}")
+
+ENTROPY_THRESHOLD = 3.5   # bits per character
+ENTROPY_RULE = "high-entropy-string"
+
+_RULES = PatternSet([rx for _, rx in SECRET_RULES])
+_RULE_NAMES = [name for name, _ in SECRET_RULES]
+
+
+class SecretFinding(NamedTuple):
+    """One suspected secret: rule name and [start, end) offsets in the scanned line."""
+    rule: str
+    start: int
+    end: int
+    preview: str
+
+
+def shannon_entropy(s: str) -> float:
+    """Bits of Shannon entropy per character of s."""
+    if not s:
+        return 0.0
+    n = len(s)
+    return -sum(c / n * math.log2(c / n) for c in Counter(s).values())
+
+
+def mask_secret(s: str, keep: int = 4) -> str:
+    """Keep a short prefix of s and mask the rest, e.g. 'AKIA************'."""
+    if len(s) <= keep * 2:
+        return "*" * len(s)
+    return s[:keep] + "*" * (len(s) - keep)
+
+
+def _looks_random(token: str) -> bool:
+    """Mixed-case alphanumerics with high entropy (excludes words and plain hex)."""
+    has_upper = has_lower = has_digit = False
+    for ch in token:
+        if ch.isupper():
+            has_upper = True
+        elif ch.islower():
+            has_lower = True
+        elif ch.isdigit():
+            has_digit = True
+    return has_upper and has_lower and has_digit and shannon_entropy(token) >= ENTROPY_THRESHOLD
+
+
+def scan_line(line: str) -> List[SecretFinding]:
+    """Return the suspected secrets in one history line, ordered by offset."""
+    findings: List[SecretFinding] = []
+    if _ANCHOR_RE.search(line):
+        for pid, m in _RULES.finditer(line):
+            findings.append(SecretFinding(_RULE_NAMES[pid], m.start(), m.end(), mask_secret(m.group(0))))
+    for m in _TOKEN_RE.finditer(line):
+        if any(f.start <= m.start() < f.end for f in findings):
+            continue
+        if _looks_random(m.group(0)):
+            findings.append(SecretFinding(ENTROPY_RULE, m.start(), m.end(), mask_secret(m.group(0))))
+    findings.sort(key=lambda f: f.start)
+    return findings
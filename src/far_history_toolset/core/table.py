@@ -0,0 +1,166 @@
+"""
+Columnar in-memory model for history entries.
+
+HistoryTable keeps one column per field instead of one dict per entry:
+- lines:      List[str]            commands / paths / dialog lines (interned)
+- dirs:       List[str] | None     commands.hst Extras (interned)
+- categories: List[str] | None     dialogs.hst section name of each entry (interned)
+- times:      array('Q')           FILETIME integers
+- types:      bytearray | None     folders.hst/view.hst Types characters
+
+Rows are exposed as lightweight HistoryRow views (``__slots__``) so column-wide
+operations (sort by time, filter by type) only permute indices.
+"""
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from far_history_toolset.core.filetime import filetime_int_to_hex_le, filetime_int_to_iso
+
+
+def intern_all(items: Iterable[str]) -> List[str]:
+    """Intern every string so repeated values share one object."""
+    intern = sys.intern
+    return [intern(x) for x in items]
+
+
+class HistoryRow:
+    """Read-only view of one HistoryTable row."""
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table: "HistoryTable", i: int) -> None:
+        self._table = table
+        self._i = i
+
+    @property
+    def index(self) -> int:
+        return self._i
+
+    @property
+    def line(self) -> str:
+        return self._table.lines[self._i]
+
+    @property
+    def dir(self) -> Optional[str]:
+        dirs = self._table.dirs
+        return None if dirs is None else dirs[self._i]
+
+    @property
+    def category(self) -> Optional[str]:
+        cats = self._table.categories
+        return None if cats is None else cats[self._i]
+
+    @property
+    def time(self) -> int:
+        return self._table.times[self._i]
+
+    @property
+    def time_hex(self) -> str:
+        return filetime_int_to_hex_le(self._table.times[self._i])
+
+    @property
+    def time_iso(self) -> Optional[str]:
+        try:
+            return filetime_int_to_iso(self._table.times[self._i])
+        except (OverflowError, ValueError, OSError):
+            return None
+
+    @property
+    def type_flag(self) -> Optional[int]:
+        types = self._table.types
+        if types is None:
+            return None
+        ch = types[self._i]
+        return ch - 0x30 if 0x30 <= ch <= 0x39 else None
+
+    def __repr__(self) -> str:
+        return f"HistoryRow({self._i}, line={self.line!r}, time={self.time})"
+
+
+class HistoryTable:
+    """
+    Parallel-column storage for the entries of one history file.
+
+    `meta` holds the header-level fields as returned by the service's
+    export_meta(), so a table can be serialized back without the original text.
+    """
+    __slots__ = ("meta", "lines", "dirs", "categories", "times", "types")
+
+    def __init__(
+        self,
+        meta: Dict[str, Any],
+        lines: List[str],
+        times: array,
+        dirs: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        types: Optional[bytearray] = None,
+    ) -> None:
+        n = len(lines)
+        for name, col in (("times", times), ("dirs", dirs), ("categories", categories), ("types", types)):
+            if col is not None and len(col) != n:
+                raise ValueError(f"column {name!r} has {len(col)} items, expected {n}")
+        self.meta = meta
+        self.lines = lines
+        self.times = times
+        self.dirs = dirs
+        self.categories = categories
+        self.types = types
+
+    @property
+    def header(self) -> Optional[str]:
+        return self.meta.get("Header")
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getitem__(self, i: int) -> HistoryRow:
+        if i < 0:
+            i += len(self.lines)
+        if not 0 <= i < len(self.lines):
+            raise IndexError(i)
+        return HistoryRow(self, i)
+
+    def __iter__(self) -> Iterator[HistoryRow]:
+        return (HistoryRow(self, i) for i in range(len(self.lines)))
+
+    def take(self, indices: Sequence[int]) -> "HistoryTable":
+        """Return a new table with the given rows, in the given order."""
+        def pick(col):
+            if col is None:
+                return None
+            if isinstance(col, array):
+                return array(col.typecode, (col[i] for i in indices))
+            if isinstance(col, bytearray):
+                return bytearray(col[i] for i in indices)
+            return [col[i] for i in indices]
+
+        return HistoryTable(
+            dict(self.meta),
+            pick(self.lines),
+            pick(self.times),
+            dirs=pick(self.dirs),
+            categories=pick(self.categories),
+            types=pick(self.types),
+        )
+
+    def where(self, predicate: Callable[[HistoryRow], bool]) -> "HistoryTable":
+        """Return a new table with the rows for which predicate(row) is true."""
+        return self.take([i for i in range(len(self.lines)) if predicate(HistoryRow(self, i))])
+
+    def sort_by_time(self, reverse: bool = False) -> "HistoryTable":
+        """Return a new table ordered by FILETIME (stable for equal times)."""
+        order = sorted(range(len(self.times)), key=self.times.__getitem__, reverse=reverse)
+        return self.take(order)
+
+    def filter_by_type(self, flag: int) -> "HistoryTable":
+        """Return a new table with the rows whose Types character equals the digit `flag`."""
+        if self.types is None:
+            raise ValueError("this table has no Types column")
+        want = 0x30 + int(flag)
+        types = self.types
+        return self.take([i for i in range(len(types)) if types[i] == want])
+
+    def __repr__(self) -> str:
+        return f"HistoryTable(header={self.header!r}, rows={len(self)})"
@@ -10,13 +10,15 @@ Public classes:
 Routing:
 - REGISTRY (dict) maps header -> service class
 - get_service_for_header(header: str) -> HistoryFile
+- detect_header_stream(fp) -> service class, from the first few KB of a stream
+- export_file(path, cache=...) -> dict (optionally via a persistent ParseCache)
 """
 from far_history_toolset.services.base import HistoryFile
 from far_history_toolset.services.commands import CommandsHistory
 from far_history_toolset.services.dialogs import DialogsHistory
 from far_history_toolset.services.folders import FoldersHistory
 from far_history_toolset.services.view import ViewHistory
-from far_history_toolset.services.registry import REGISTRY, get_service_for_header
+from far_history_toolset.services.registry import REGISTRY, detect_header_stream, export_file, get_service_for_header
 
 __all__ = [
     "HistoryFile",
@@ -26,4 +28,6 @@ __all__ = [
     "ViewHistory",
     "REGISTRY",
     "get_service_for_header",
+    "detect_header_stream",
+    "export_file",
 ]
@@ -1,29 +1,83 @@
 """Abstract base service and small shared helpers."""
 from __future__ import annotations
 
+import itertools
+import re
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from array import array
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar, Union
 
 from far_history_toolset.core import (
+    HstDocument,
+    HstSection,
+    KeySpan,
+    splice,
     filetime_hex_to_int_le,
     filetime_int_to_hex_le,
-    filetime_int_to_iso,
+    filetime_hex_column_to_ints,
+    filetime_hex_column_to_iso,
     iso_to_filetime_int,
     now_filetime_int,
     smart_split_multiline,
+    iter_split_multiline,
+    iter_item_spans,
     encode_literal_backslash_n,
 )
+from far_history_toolset.core.models import LazyIsoRecord
+from far_history_toolset.core.table import HistoryTable, intern_all
+from far_history_toolset.services.profiling import PhaseHooks
+
+_TIME_TOKEN_RE = re.compile(r"\S+")
+# Times tokens are decoded in column batches of this size while streaming
+_TIMES_CHUNK = 4096
+
+# Types bytes -> text on import: digits pass through, anything else becomes '0'
+_TYPES_OUT = bytes(b if 0x30 <= b <= 0x39 else 0x30 for b in range(256))
+
+# A streamed record: (category name or None, record dict)
+Record = Tuple[Optional[str], Dict[str, Any]]
+
+# What iter_records()/export_meta() read: .hst text, a text stream, or text
+# already scanned into an HstDocument (so a streamed export scans only once)
+Source = Union[str, IO[str], HstDocument]
+
+# How records carry timeISO: True (computed eagerly), "lazy" (LazyIsoRecord,
+# computed on first read/serialization) or False (key omitted).
+IsoMode = Union[bool, str]
+
+# Address of one entry for patch(): a plain index, or (category, index) for dialogs.hst
+EntryIndex = Union[int, Tuple[Optional[str], int]]
+
+# A text edit for splice(): (start, end, replacement)
+Edit = Tuple[int, int, str]
+
+_T = TypeVar("_T")
 
 
 class HistoryFile(ABC):
     """Abstract service for a Far2l history file type."""
     HEADER: str  # e.g., "[SavedHistory]"
+    LINE_FIELD = "line"  # record key holding the history line ("command", "path", "line")
+    # Free-text record fields and the quoted list key each one is stored in
+    TEXT_FIELDS: Dict[str, str] = {"line": "Lines"}
+
+    # Keys storing one character per entry, patched by index alongside Lines.
+    # Locks is handled too when it has one flag per entry.
+    _PATCH_CHARS: Tuple[str, ...] = ()
+
+    # Quoted list keys whose items are positional: empty items are kept (see
+    # smart_split_multiline(keep_empty=True)) so the list stays aligned with Lines.
+    _POSITIONAL: frozenset = frozenset()
+
+    # Receives phase_start/phase_end callbacks from export() when set (see profiling.py)
+    hooks: Optional[PhaseHooks] = None
 
     @abstractmethod
-    def export(self, text: str) -> dict:
+    def export(self, text: str, iso: IsoMode = True) -> dict:
         """Parse .hst text into a JSON-like dict (service-specific schema).
 
         :param text: Raw contents of a .hst history file.
+        :param iso: True to fill timeISO, "lazy" to compute it on first access, False to omit it.
         :returns: A structured dictionary representing the parsed history.
         :raises Exception: Implementations may raise on malformed input.
         """
@@ -37,30 +91,383 @@ class HistoryFile(ABC):
         :raises Exception: Implementations may raise on invalid schema.
         """
 
+    def iter_records(self, source: Source, iso: IsoMode = True) -> Iterator[Record]:
+        """Yield (category, record) pairs one at a time instead of a full History list.
+
+        Record dicts have the same shape as entries of export()["History"].
+        Category is None for single-list histories. The default implementation
+        falls back to export(); services override it with lazy decoding.
+
+        :param source: Raw .hst text, a text stream to read it from, or its HstDocument.
+        :param iso: timeISO handling, as for export().
+        :returns: Iterator over (category, record) tuples.
+        """
+        data = self.export(self._read_source(source), iso=iso)
+        for rec in data.get("History", []) or []:
+            yield None, rec
+
+    def export_meta(self, text: Union[str, HstDocument]) -> dict:
+        """Return export() output without its record list(s).
+
+        Used together with iter_records() to stream an export; pass both the
+        same HstDocument to scan the text once. The default implementation
+        calls export() and drops History.
+
+        :param text: Raw contents of a .hst history file, or its HstDocument.
+        :returns: Header-level fields of the export dict.
+        """
+        data = self.export(self._read_source(text))
+        data.pop("History", None)
+        return data
+
+    def import_records(self, meta: dict, records: Iterable[Record]) -> str:
+        """Build .hst text from header fields and a stream of (category, record) pairs.
+
+        The default implementation collects the records into History and calls import_().
+
+        :param meta: Header-level fields, e.g. from export_meta().
+        :param records: Iterable of (category, record) pairs.
+        :returns: A string ready to be saved as a .hst file.
+        """
+        data = dict(meta)
+        data["History"] = [rec for _, rec in records]
+        return self.import_(data)
+
+    @abstractmethod
+    def export_table(self, text: str) -> HistoryTable:
+        """Parse .hst text into a columnar HistoryTable.
+
+        :param text: Raw contents of a .hst history file.
+        :returns: Table with parallel columns and meta from export_meta().
+        """
+
+    @abstractmethod
+    def import_table(self, table: HistoryTable) -> str:
+        """Build .hst text directly from a HistoryTable.
+
+        :param table: Table previously produced by export_table(), possibly modified.
+        :returns: A string ready to be saved as a .hst file.
+        """
+
+    def patch(
+        self,
+        text: str,
+        delete: Iterable[EntryIndex] = (),
+        replace: Optional[Mapping[EntryIndex, Union[str, Mapping[str, str]]]] = None,
+        where: Optional[Callable[[Optional[str], Dict[str, Any]], bool]] = None,
+    ) -> str:
+        """Delete or replace entries by editing only the affected slices of the text.
+
+        A deleted entry is removed from every column (Lines, Extras, Times, Types,
+        and Locks when it holds one flag per entry); HistoryCount and Position are
+        recomputed. Everything else is copied verbatim, so nothing is re-encoded.
+
+        :param text: Raw .hst text.
+        :param delete: Indices of entries to delete; dialogs.hst uses (category, index).
+        :param replace: Mapping of entry index -> new line text, or -> {field: text} for
+            any of TEXT_FIELDS (e.g. commands.hst "dir").
+        :param where: Predicate (category, record) -> bool; matching entries are deleted.
+            It only sees records paired with a Lines item (see iter_entries()).
+        :returns: Patched .hst text.
+        :raises ValueError: On unknown categories, out-of-range indices or empty replacements.
+        """
+        deleted = {self._entry_index(i) for i in delete}
+        replaced: Dict[Tuple[Optional[str], int], Mapping[str, str]] = {}
+        for i, v in (replace or {}).items():
+            fields = {self.LINE_FIELD: v} if isinstance(v, str) else v
+            for field, value in fields.items():
+                if field not in self.TEXT_FIELDS:
+                    raise ValueError(f"cannot replace field {field!r}")
+                if not value:
+                    raise ValueError(f"replacement {field!r} must not be empty")
+            replaced[self._entry_index(i)] = fields
+        if where is not None:
+            for cat, i, rec in self.iter_entries(text):
+                if where(cat, rec):
+                    deleted.add((cat, i))
+
+        doc = HstDocument(text)
+        edits: List[Edit] = []
+        totals = [0, 0]  # entries before / after the patch
+        seen = set()
+        for cat, sec in self._patch_groups(doc):
+            seen.add(cat)
+            dels = {i for c, i in deleted if c == cat}
+            reps = {i: v for (c, i), v in replaced.items() if c == cat}
+            edits.extend(self._patch_group(doc, sec, dels, reps, totals))
+        for cat, _ in itertools.chain(deleted, replaced):
+            if cat not in seen:
+                raise ValueError("entries must be addressed as (category, index)" if cat is None
+                                 else f"unknown category {cat!r}")
+        edits.extend(self._patch_totals(doc, totals[0], totals[1]))
+        return splice(text, edits)
+
+    def iter_entries(self, source: Source,
+                     iso: IsoMode = False) -> Iterator[Tuple[Optional[str], int, Dict[str, Any]]]:
+        """Yield (category, index, record) for the records patch() can address.
+
+        Lines never holds empty items, so a record with an empty LINE_FIELD is
+        not an entry: it is a commands.hst Extras item past the end of Lines.
+        Such unpaired dirs are skipped here, and patch() leaves them in place.
+
+        :param source: Raw .hst text, a text stream or its HstDocument.
+        :param iso: timeISO handling, as for export(); off by default.
+        :returns: Iterator over (category or None, index within the category, record).
+        """
+        counters: Dict[Optional[str], int] = {}
+        line_field = self.LINE_FIELD
+        for cat, rec in self.iter_records(source, iso=iso):
+            if not rec.get(line_field):
+                continue
+            i = counters.get(cat, 0)
+            counters[cat] = i + 1
+            yield cat, i, rec
+
+    def duplicate_indices(self, source: Union[str, IO[str]], keep: str = "newest") -> List[EntryIndex]:
+        """Return the entries that repeat an earlier/later entry with the same text fields.
+
+        Entries are keyed by (category, TEXT_FIELDS values), e.g. (dir, command)
+        for commands.hst. One pass over the records keeps, per key, the newest
+        (highest FILETIME; the later entry on ties) or the oldest (lowest
+        FILETIME; the earlier entry on ties) occurrence.
+
+        :param source: Raw .hst text or a text stream.
+        :param keep: "newest" or "oldest".
+        :returns: Indices of the entries to drop, in file order, as accepted by patch().
+        :raises ValueError: If keep is not "newest" or "oldest".
+        """
+        if keep not in ("newest", "oldest"):
+            raise ValueError(f"keep must be 'newest' or 'oldest', got {keep!r}")
+        newest = keep == "newest"
+        fields = tuple(self.TEXT_FIELDS)
+        best: Dict[tuple, Tuple[int, int]] = {}   # key -> (position in stream, FILETIME)
+        indices: List[EntryIndex] = []
+        dropped: List[int] = []
+        for pos, (cat, i, rec) in enumerate(self.iter_entries(source)):
+            indices.append(i if cat is None else (cat, i))
+            key = (cat,) + tuple(rec.get(f) or "" for f in fields)
+            try:
+                t = filetime_hex_to_int_le(rec.get("timeHex") or "")
+            except ValueError:
+                t = 0
+            prev = best.get(key)
+            if prev is None:
+                best[key] = (pos, t)
+            elif (t >= prev[1]) if newest else (t < prev[1]):
+                dropped.append(prev[0])
+                best[key] = (pos, t)
+            else:
+                dropped.append(pos)
+        return [indices[pos] for pos in sorted(dropped)]
+
+    def dedup(self, text: str, keep: str = "newest") -> str:
+        """Drop repeated entries (see duplicate_indices()) with a single patch().
+
+        Survivors keep their order; Times/Types/Locks stay aligned and
+        HistoryCount/Position are recomputed.
+
+        :param text: Raw .hst text.
+        :param keep: "newest" or "oldest" occurrence of each entry survives.
+        :returns: Deduplicated .hst text (unchanged if there are no repeats).
+        """
+        dups = self.duplicate_indices(text, keep)
+        return self.patch(text, delete=dups) if dups else text
+
+    @staticmethod
+    def _entry_index(i: EntryIndex) -> Tuple[Optional[str], int]:
+        """Normalize an EntryIndex to (category or None, index)."""
+        if isinstance(i, tuple):
+            return i[0], int(i[1])
+        return None, int(i)
+
+    def _patch_groups(self, doc: HstDocument) -> Iterator[Tuple[Optional[str], Optional[HstSection]]]:
+        """Yield (category, section) for every independently indexed entry list."""
+        yield None, None
+
+    def _patch_totals(self, doc: HstDocument, before: int, after: int) -> List[Edit]:
+        """Extra edits depending on the overall entry count (none by default)."""
+        return []
+
+    def _patch_group(self, doc: HstDocument, sec: Optional[HstSection], dels: set,
+                     reps: Dict[int, Mapping[str, str]], totals: List[int]) -> List[Edit]:
+        """Edits deleting/replacing entries of one Lines list and its aligned columns."""
+        text = doc.text
+        lines_sp = doc.span("Lines", sec)
+        n = 0
+        if lines_sp is not None:
+            start, end = doc.quoted_bounds(lines_sp)
+            if start >= 0:
+                n = sum(1 for _ in iter_item_spans(text, start, end))
+        for i in itertools.chain(dels, reps):
+            if not 0 <= i < n:
+                raise ValueError(f"entry index {i} out of range (0..{n - 1})")
+        totals[0] += n
+        totals[1] += n - len(dels)
+        if not dels and not reps:
+            return []
+
+        edits: List[Edit] = []
+        for field, key in self.TEXT_FIELDS.items():
+            sp = doc.span(key, sec)
+            if sp is None:
+                continue
+            start, end = doc.quoted_bounds(sp)
+            if start < 0:
+                continue
+            spans = list(iter_item_spans(text, start, end, key in self._POSITIONAL))
+            edits.extend(self._delete_runs(spans, dels))
+            for i, fields in reps.items():
+                if field in fields and i not in dels and i < len(spans):
+                    edits.append((spans[i][0], spans[i][1], self._join_items([fields[field]])))
+
+        sp = doc.span("Times", sec)
+        if sp is not None:
+            spans = [m.span() for m in _TIME_TOKEN_RE.finditer(text, sp.value_start, sp.line_end)]
+            edits.extend(self._delete_runs(spans, dels))
+
+        char_keys = list(self._PATCH_CHARS)
+        if len(doc.simple("Locks", sec)) == n:
+            char_keys.append("Locks")
+        for key in char_keys:
+            sp = doc.span(key, sec)
+            if sp is None:
+                continue
+            raw = text[sp.value_start:sp.line_end]
+            first = sp.value_start + len(raw) - len(raw.lstrip())
+            spans = [(first + k, first + k + 1) for k in range(len(raw.strip()))]
+            edits.extend(self._delete_runs(spans, dels))
+
+        if dels:
+            sp = doc.span("HistoryCount", sec)
+            if sp is not None and doc.simple("HistoryCount", sec).isdigit():
+                edits.append(self._replace_value(text, sp, str(n - len(dels))))
+            sp = doc.span("Position", sec)
+            position = doc.simple("Position", sec)
+            if sp is not None and position.isdigit():
+                pos = int(position)
+                new_pos = -1 if pos in dels else pos - sum(1 for i in dels if i < pos)
+                if new_pos != pos:
+                    edits.append(self._replace_value(text, sp, str(new_pos)))
+        return edits
+
+    @staticmethod
+    def _delete_runs(spans: List[Tuple[int, int]], dels: set) -> List[Edit]:
+        """
+        Edits removing the items at the given indices from a separated value.
+        Each run of consecutive items is cut together with one adjacent separator.
+        """
+        idx = sorted(i for i in dels if i < len(spans))
+        edits: List[Edit] = []
+        k = 0
+        while k < len(idx):
+            a = b = idx[k]
+            while k + 1 < len(idx) and idx[k + 1] == b + 1:
+                k += 1
+                b += 1
+            k += 1
+            if b + 1 < len(spans):
+                edits.append((spans[a][0], spans[b + 1][0], ""))
+            elif a > 0:
+                edits.append((spans[a - 1][1], spans[b][1], ""))
+            else:
+                edits.append((spans[0][0], spans[b][1], ""))
+        return edits
+
+    @staticmethod
+    def _replace_value(text: str, sp: KeySpan, value: str) -> Edit:
+        """Edit replacing a simple key's value, keeping the whitespace around it (e.g. '\\r')."""
+        old = text[sp.value_start:sp.line_end]
+        stripped = old.strip()
+        if not stripped:
+            return sp.value_start, sp.line_end, value + old[len(old.rstrip()):]
+        i = sp.value_start + old.index(stripped)
+        return i, i + len(stripped), value
 
     @staticmethod
-    def _split_items(block_value: str) -> List[str]:
+    def _record_factory(iso: IsoMode) -> type:
+        """Validate an iso mode and return the dict type records should be built with."""
+        if iso not in (True, False, "lazy"):
+            raise ValueError(f"iso must be True, False or 'lazy', got {iso!r}")
+        return LazyIsoRecord if iso == "lazy" else dict
+
+    def _scan(self, text: str) -> HstDocument:
+        """HstDocument(text), reported to hooks as the "lex" phase (entries = keys found)."""
+        hooks = self.hooks
+        if hooks is None:
+            return HstDocument(text)
+        hooks.phase_start("lex")
+        doc = HstDocument(text)
+        hooks.phase_end("lex", sum(len(sec.keys) for sec in doc.sections))
+        return doc
+
+    def _staged(self, phase: str, items: Iterable[_T]) -> Iterable[_T]:
+        """Return items untouched, or with hooks set, run them to a list as one reported phase."""
+        hooks = self.hooks
+        if hooks is None:
+            return items
+        hooks.phase_start(phase)
+        out = list(items)
+        hooks.phase_end(phase, len(out))
+        return out
+
+    @staticmethod
+    def _read_source(source: Source) -> str:
+        """Accept .hst text, a readable text stream or an HstDocument."""
+        if isinstance(source, str):
+            return source
+        if isinstance(source, HstDocument):
+            return source.text
+        return source.read()
+
+    @staticmethod
+    def _document(source: Source) -> HstDocument:
+        """Scan source into an HstDocument, or reuse it if it already is one."""
+        if isinstance(source, HstDocument):
+            return source
+        return HstDocument(HistoryFile._read_source(source))
+
+    @staticmethod
+    def _split_items(block_value: str, keep_empty: bool = False) -> List[str]:
         """Split a Far2l-encoded block (literal '\\n' etc.) to items."""
-        return smart_split_multiline(block_value)
+        return smart_split_multiline(block_value, keep_empty)
 
     @staticmethod
-    def _join_items(items: List[str]) -> str:
-        """Encode items as a single Far2l value with literal '\\n' separators."""
-        return encode_literal_backslash_n(items)
+    def _join_items(items: Iterable[str], out: Optional[List[str]] = None) -> str:
+        """Encode items as a single Far2l value with literal '\\n' separators (also appended to out, if given)."""
+        return encode_literal_backslash_n(items, out)
+
+    @staticmethod
+    def _iter_items(block_value: str, keep_empty: bool = False) -> Iterator[str]:
+        """Lazily split a Far2l-encoded block to items (see _split_items)."""
+        return iter_split_multiline(block_value, keep_empty)
+
+    @staticmethod
+    def _iter_time_tokens(times_str: str) -> Iterator[str]:
+        """Lazily yield the whitespace-separated hex tokens of a Times value."""
+        return (m.group(0) for m in _TIME_TOKEN_RE.finditer(times_str or ""))
+
+    @staticmethod
+    def _iter_times(times_str: str, iso: IsoMode = True) -> Iterator[Tuple[str, str | None]]:
+        """
+        Lazily yield (timeHex, timeISO) pairs for a Times value. Tokens are
+        converted in bounded batches with the column decoder, so memory stays
+        flat while each batch is decoded in one pass. Unless iso is True,
+        nothing is converted and timeISO is always None.
+        """
+        tokens = HistoryFile._iter_time_tokens(times_str)
+        if iso is not True:
+            yield from ((hx, None) for hx in tokens)
+            return
+        while True:
+            batch = list(itertools.islice(tokens, _TIMES_CHUNK))
+            if not batch:
+                return
+            yield from zip(batch, filetime_hex_column_to_iso(batch))
 
     @staticmethod
     def _times_hex_to_iso_list(hex_tokens: List[str]) -> List[str | None]:
         """Convert each hex token to ISO; invalid tokens become None."""
-        out: List[str | None] = []
-        for hx in hex_tokens:
-            if not hx:
-                out.append(None)
-                continue
-            try:
-                out.append(filetime_int_to_iso(filetime_hex_to_int_le(hx)))
-            except Exception:
-                out.append(None)
-        return out
+        return filetime_hex_column_to_iso(hex_tokens)
 
     @staticmethod
     def _times_from_records(time_hex: str | None, time_iso: str | None) -> int:
@@ -86,6 +493,26 @@ class HistoryFile(ABC):
         ints = [HistoryFile._times_from_records(hx, iso) for (hx, iso) in records]
         return [filetime_int_to_hex_le(v) for v in ints]
 
+    @staticmethod
+    def _hex_list_from_ints(times: Iterable[int]) -> List[str]:
+        """Build Times hex list from FILETIME ints, written as they are (0 included)."""
+        return [filetime_int_to_hex_le(v) for v in times]
+
+    @staticmethod
+    def _times_column(times_str: str, n: int) -> array:
+        """
+        Decode a Times value to exactly n FILETIME ints (truncated or padded).
+        Missing and unparsable tokens become the current time, as export() +
+        import_() would synthesize them; a literal 0 stays 0.
+        """
+        now = now_filetime_int()
+        times = filetime_hex_column_to_ints(times_str or "", invalid=now)
+        if len(times) > n:
+            del times[n:]
+        elif len(times) < n:
+            times.extend(array("Q", [now]) * (n - len(times)))
+        return times
+
     @staticmethod
     def _align(a_len: int, b: List) -> List:
         """
@@ -106,61 +533,90 @@ class LinesTypesTimesHistory(HistoryFile):
     Intermediary base for histories that use Lines/Types/Times with the same layout.
     Implements shared export/import logic used by FoldersHistory and ViewHistory.
     """
+    LINE_FIELD = "path"
+    TEXT_FIELDS = {"path": "Lines"}
+    _PATCH_CHARS = ("Types",)
 
-    def export(self, text: str) -> dict:
+    def export(self, text: str, iso: IsoMode = True) -> dict:
         """Parse a history with Lines/Types/Times into a normalized dict.
 
         :param text: Raw contents of folders.hst or view.hst.
+        :param iso: True to fill timeISO, "lazy" to compute it on first access, False to omit it.
         :returns: Dict with Header, Locks, Position, History, and _meta.
         :raises ValueError: If input is malformed (errors propagate from helpers).
         """
-        # Local imports to avoid circular dependency at module import order.
-        from far_history_toolset.core import extract_quoted_block, extract_simple_pair
-        from typing import List, Dict, Any
+        return self._export_doc(self._scan(text), with_history=True, iso=iso)
 
-        lines_raw, rest = extract_quoted_block(text, "Lines")
-        locks, rest = extract_simple_pair(rest, "Locks")
-        history_count, _ = extract_simple_pair(rest, "HistoryCount")
-        position, rest = extract_simple_pair(rest, "Position")
-        times_str, rest = extract_simple_pair(rest, "Times")
-        types_str, rest = extract_simple_pair(rest, "Types")
+    def export_meta(self, text: Union[str, HstDocument]) -> dict:
+        """Same as export() but without the History list.
 
-        paths = self._split_items(lines_raw)
-        hex_list = [t for t in (times_str or "").split() if t]
-        iso_list = self._times_hex_to_iso_list(hex_list)
+        :param text: Raw contents of folders.hst or view.hst.
+        :returns: Dict with Header, Locks, Position, and _meta.
+        """
+        return self._export_doc(self._document(text), with_history=False)
 
-        types = (types_str or "")
-        # Map each type char -> int where possible
-        type_flags: List[int | None] = []
-        for i in range(len(paths)):
-            if i < len(types):
-                ch = types[i]
-                try:
-                    type_flags.append(int(ch))
-                except Exception:
-                    type_flags.append(None)
-            else:
-                type_flags.append(None)
+    def _export_doc(self, doc: HstDocument, with_history: bool, iso: IsoMode = True) -> dict:
+        """Build the export dict from a scanned document, optionally skipping History."""
+        lines_raw = doc.quoted("Lines")
+        locks = doc.simple("Locks")
+        history_count = doc.simple("HistoryCount")
+        position = doc.simple("Position")
+        times_str = doc.simple("Times")
+        types_str = doc.simple("Types")
 
-        history: List[Dict[str, Any]] = []
-        for i, p in enumerate(paths):
-            history.append({
-                "path": p,
-                "typeFlag": type_flags[i],
-                "timeHex": hex_list[i] if i < len(hex_list) else None,
-                "timeISO": iso_list[i] if i < len(iso_list) else None,
-            })
-
-        return {
+        types = (types_str or "")
+        data: Dict[str, Any] = {
             "Header": self.HEADER,
             "Locks": locks or "",
             "Position": int(position) if position else -1,
-            "History": history,
-            "_meta": {
-                "historyCount": int(history_count) if history_count else len(paths),
-                "typesRawLength": len(types),
-            },
         }
+        if with_history:
+            history = self._iter_history(
+                self._staged("split", self._iter_items(lines_raw)),
+                self._staged("times", self._iter_times(times_str, iso)),
+                types,
+                iso,
+            )
+            data["History"] = list(self._staged("build", history))
+        data["_meta"] = {
+            "historyCount": (
+                int(history_count) if history_count else sum(1 for _ in self._iter_items(lines_raw))
+            ),
+            "typesRawLength": len(types),
+        }
+        return data
+
+    def iter_records(self, source: Source, iso: IsoMode = True) -> Iterator[Record]:
+        """Stream (None, record) pairs decoding Lines/Times/Types in lockstep.
+
+        :param source: Raw folders.hst/view.hst text, a text stream or its HstDocument.
+        :param iso: timeISO handling, as for export().
+        :returns: Iterator over (None, {"path", "typeFlag", "timeHex", "timeISO"}).
+        """
+        doc = self._document(source)
+        lines_raw, times_str = doc.quoted("Lines"), doc.simple("Times")
+        for rec in self._iter_history(self._iter_items(lines_raw), self._iter_times(times_str, iso),
+                                      doc.simple("Types"), iso):
+            yield None, rec
+
+    def _iter_history(
+        self, paths: Iterable[str], times_pairs: Iterable[Tuple[str, str | None]], types: str, iso: IsoMode = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield one record per path; Times/Types are consumed alongside the paths."""
+        times = iter(times_pairs)
+        make = self._record_factory(iso)
+        for i, p in enumerate(paths):
+            type_flag: int | None = None
+            if i < len(types):
+                try:
+                    type_flag = int(types[i])
+                except Exception:
+                    type_flag = None
+            hx, iso_value = next(times, (None, None))
+            rec = make(path=p, typeFlag=type_flag, timeHex=hx)
+            if iso is True:
+                rec["timeISO"] = iso_value
+            yield rec
 
     def import_(self, data: dict) -> str:
         """Serialize Lines/Types/Times style history back into text.
@@ -169,24 +625,63 @@ class LinesTypesTimesHistory(HistoryFile):
         :returns: Text suitable for folders.hst or view.hst.
         :raises KeyError: If required keys are missing.
         """
-        locks = data.get("Locks", "") or ""
-        position = int(data.get("Position", -1))
         history = data.get("History", []) or []
+        return self.import_records(data, ((None, r) for r in history))
 
-        paths = [r.get("path") or "" for r in history]
-        time_pairs = [(r.get("timeHex"), r.get("timeISO")) for r in history]
-        times_hex = self._hex_list_from_records(time_pairs)
+    def import_records(self, meta: dict, records: Iterable[Record]) -> str:
+        """Serialize Lines/Types/Times history from header fields and streamed records.
 
-        types_chars = []
-        for r in history:
+        :param meta: Header-level fields (Locks, Position), e.g. from export_meta().
+        :param records: Iterable of (category, record) pairs; category is ignored.
+        :returns: Text suitable for folders.hst or view.hst.
+        """
+        locks = meta.get("Locks", "") or ""
+        position = int(meta.get("Position", -1))
+
+        paths: List[str] = []
+        time_pairs: List[Tuple[str | None, str | None]] = []
+        types_chars: List[str] = []
+        for _, r in records:
+            paths.append(r.get("path") or "")
+            time_pairs.append((r.get("timeHex"), r.get("timeISO")))
             tf = r.get("typeFlag")
             types_chars.append("0" if tf is None else str(int(tf)))
-        types_str = "".join(types_chars)
+        times_hex = self._hex_list_from_records(time_pairs)
+        return self._serialize(locks, position, paths, times_hex, "".join(types_chars))
+
+    def export_table(self, text: str) -> HistoryTable:
+        """Parse folders.hst/view.hst into a columnar HistoryTable (lines, times, types).
+
+        :param text: Raw contents of folders.hst or view.hst.
+        :returns: Table whose meta equals export_meta(text).
+        """
+        doc = HstDocument(text)
+        paths = intern_all(self._iter_items(doc.quoted("Lines")))
+        n = len(paths)
+        # Missing Types characters are stored as ' ' (typeFlag None, written back as '0')
+        types = bytearray(doc.simple("Types").encode("ascii", "replace")[:n])
+        types.extend(b" " * (n - len(types)))
+        times = self._times_column(doc.simple("Times"), n)
+        return HistoryTable(self._export_doc(doc, with_history=False), paths, times, types=types)
+
+    def import_table(self, table: HistoryTable) -> str:
+        """Serialize a HistoryTable produced by export_table() back into text.
+
+        :param table: Columnar history; times are written as they are.
+        :returns: Text suitable for folders.hst or view.hst.
+        """
+        locks = table.meta.get("Locks", "") or ""
+        position = int(table.meta.get("Position", -1))
+        types = table.types if table.types is not None else bytearray(b"0" * len(table))
+        types_str = bytes(types).translate(_TYPES_OUT).decode("ascii")
+        return self._serialize(locks, position, table.lines, self._hex_list_from_ints(table.times), types_str)
 
-        out = [
-            f"{self.HEADER}\n",
-            f"HistoryCount={len(paths)}\n",
-            f'Lines="{self._join_items(paths)}"\n',
+    def _serialize(self, locks: str, position: int, paths: List[str], times_hex: List[str], types_str: str) -> str:
+        """Assemble Lines/Types/Times text from aligned columns."""
+        out = [f"{self.HEADER}\n", f"HistoryCount={len(paths)}\n", 'Lines="']
+        self._join_items(paths, out)
+        out += [
+            '"\n',
             f"Locks={locks}\n" if locks != "" else "Locks=\n",
             f"Position={position}\n",
             "Times=" + " ".join(times_hex) + "\n",
@@ -1,13 +1,15 @@
 """[SavedHistory] (commands.hst) exporter/importer."""
 from __future__ import annotations
 
-from typing import List, Dict, Any
+import itertools
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from far_history_toolset.core import (
-    extract_quoted_block,
-    extract_simple_pair,
-)
-from far_history_toolset.services.base import HistoryFile
+from far_history_toolset.core import HstDocument, iter_item_spans, splice
+from far_history_toolset.core.filetime import filetime_int_to_hex_le, now_filetime_int
+from far_history_toolset.core.table import HistoryTable, intern_all
+from far_history_toolset.services.base import Edit, HistoryFile, IsoMode, Record, Source
 
 
 class CommandsHistory(HistoryFile):
@@ -19,53 +21,92 @@ class CommandsHistory(HistoryFile):
     - HEADER: The .hst header tag this service handles.
     """
     HEADER = "[SavedHistory]"
+    LINE_FIELD = "command"
+    TEXT_FIELDS = {"dir": "Extras", "command": "Lines"}
+    # Entries without a directory keep their (empty) slot in Extras
+    _POSITIONAL = frozenset({"Extras"})
 
-    def export(self, text: str) -> dict:
+    def export(self, text: str, iso: IsoMode = True) -> dict:
         """Parse commands.hst text into a normalized dictionary.
 
         The resulting dict has keys: Header, Locks, Position, History (list), and
         a _meta section with historyCount and encoding styles.
 
         :param text: Raw contents of a commands.hst file.
+        :param iso: True to fill timeISO, "lazy" to compute it on first access, False to omit it.
         :returns: A dictionary ready for inspection or transformation.
         :raises ValueError: If required structure is malformed (handled by helpers).
         """
-        extras_raw, rest = extract_quoted_block(text, "Extras")
-        history_count, rest = extract_simple_pair(rest, "HistoryCount")
-        lines_raw, rest = extract_quoted_block(rest, "Lines")
-        times_str, rest = extract_simple_pair(rest, "Times")
-        locks, rest = extract_simple_pair(rest, "Locks")
-        position, rest = extract_simple_pair(rest, "Position")
+        return self._export_doc(self._scan(text), with_history=True, iso=iso)
 
-        dirs_list = self._split_items(extras_raw)
-        cmd_list = self._split_items(lines_raw)
+    def export_meta(self, text: Union[str, HstDocument]) -> dict:
+        """Same as export() but without the History list (Header, Locks, Position, _meta).
 
-        # Times
-        hex_list = [t for t in (times_str or "").split() if t]
-        iso_list = self._times_hex_to_iso_list(hex_list)
+        :param text: Raw contents of a commands.hst file, or its HstDocument.
+        :returns: Header-level fields only; pair with iter_records() for entries.
+        """
+        return self._export_doc(self._document(text), with_history=False)
 
-        # Pair by index, longest wins
-        n = max(len(dirs_list), len(cmd_list))
-        history: List[Dict[str, Any]] = []
-        for i in range(n):
-            history.append({
-                "dir": dirs_list[i] if i < len(dirs_list) else "",
-                "command": cmd_list[i] if i < len(cmd_list) else "",
-                "timeHex": hex_list[i] if i < len(hex_list) else None,
-                "timeISO": iso_list[i] if i < len(iso_list) else None,
-            })
-
-        return {
+    def _export_doc(self, doc: HstDocument, with_history: bool, iso: IsoMode = True) -> dict:
+        """Build the export dict from a scanned document, optionally skipping History."""
+        extras_raw = doc.quoted("Extras")
+        history_count = doc.simple("HistoryCount")
+        lines_raw = doc.quoted("Lines")
+        times_str = doc.simple("Times")
+        locks = doc.simple("Locks")
+        position = doc.simple("Position")
+
+        data: Dict[str, Any] = {
             "Header": self.HEADER,
             "Locks": locks or "",
             "Position": int(position) if position else -1,
-            "History": history,
-            "_meta": {
-                "historyCount": int(history_count) if history_count else len(cmd_list),
-                "extrasStyle": "escaped",
-                "linesStyle": "escaped",
-            },
         }
+        if with_history:
+            history = self._iter_history(
+                self._staged("split", self._iter_items(extras_raw, True)),
+                self._staged("split", self._iter_items(lines_raw)),
+                self._staged("times", self._iter_times(times_str, iso)),
+                iso,
+            )
+            data["History"] = list(self._staged("build", history))
+        data["_meta"] = {
+            "historyCount": (
+                int(history_count) if history_count else sum(1 for _ in self._iter_items(lines_raw))
+            ),
+            "extrasStyle": "escaped",
+            "linesStyle": "escaped",
+        }
+        return data
+
+    def iter_records(self, source: Source, iso: IsoMode = True) -> Iterator[Record]:
+        """Stream (None, record) pairs decoding Extras/Lines/Times in lockstep.
+
+        :param source: Raw commands.hst text, a text stream or its HstDocument.
+        :param iso: timeISO handling, as for export().
+        :returns: Iterator over (None, {"dir", "command", "timeHex", "timeISO"}).
+        """
+        doc = self._document(source)
+        dirs, cmds = self._iter_items(doc.quoted("Extras"), True), self._iter_items(doc.quoted("Lines"))
+        for rec in self._iter_history(dirs, cmds, self._iter_times(doc.simple("Times"), iso), iso):
+            yield None, rec
+
+    def _iter_history(
+        self,
+        dirs: Iterable[str],
+        cmds: Iterable[str],
+        times_pairs: Iterable[Tuple[str, str | None]],
+        iso: IsoMode = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """Pair dirs and commands by index (longest wins), consuming Times alongside."""
+        times = iter(times_pairs)
+        make = self._record_factory(iso)
+        pairs = itertools.zip_longest(dirs, cmds, fillvalue="")
+        for d, c in pairs:
+            hx, iso_value = next(times, (None, None))
+            rec = make(dir=d, command=c, timeHex=hx)
+            if iso is True:
+                rec["timeISO"] = iso_value
+            yield rec
 
     def import_(self, data: dict) -> str:
         """Serialize a previously exported dict back into commands.hst text.
@@ -78,14 +119,25 @@ class CommandsHistory(HistoryFile):
         :raises KeyError: If expected keys are missing in the input structure.
         """
         history = data.get("History", []) or []
-        locks = data.get("Locks", "") or ""
-        position = int(data.get("Position", -1))
+        return self.import_records(data, ((None, rec) for rec in history))
+
+    def import_records(self, meta: dict, records: Iterable[Record]) -> str:
+        """Serialize commands.hst from header fields and a stream of records.
+
+        Records are consumed one at a time and only their columns are kept.
+
+        :param meta: Header-level fields (Locks, Position), e.g. from export_meta().
+        :param records: Iterable of (category, record) pairs; category is ignored.
+        :returns: Text suitable to be written as a commands.hst file.
+        """
+        locks = meta.get("Locks", "") or ""
+        position = int(meta.get("Position", -1))
 
         dirs_list: List[str] = []
         cmd_list: List[str] = []
         time_pairs: List[tuple[str | None, str | None]] = []
 
-        for rec in history:
+        for _, rec in records:
             d = rec.get("dir") or ""
             c = rec.get("command") or ""
             hx = rec.get("timeHex")
@@ -107,17 +159,141 @@ class CommandsHistory(HistoryFile):
             pad = [self._hex_list_from_records([(None, None)])[-1]] * (len(cmd_list) - len(hex_out))
             hex_out.extend(pad)
         hex_out = hex_out[:len(cmd_list)]
+        return self._serialize(locks, position, dirs_list, cmd_list, hex_out)
+
+    def export_table(self, text: str) -> HistoryTable:
+        """Parse commands.hst into a columnar HistoryTable (dirs, lines, times).
+
+        :param text: Raw contents of a commands.hst file.
+        :returns: Table whose meta equals export_meta(text).
+        """
+        doc = HstDocument(text)
+        dirs = intern_all(self._iter_items(doc.quoted("Extras"), True))
+        cmds = intern_all(self._iter_items(doc.quoted("Lines")))
+        # Pair by index, longest wins
+        n = max(len(dirs), len(cmds))
+        dirs.extend([""] * (n - len(dirs)))
+        cmds.extend([""] * (n - len(cmds)))
+        times = self._times_column(doc.simple("Times"), n)
+        return HistoryTable(self._export_doc(doc, with_history=False), cmds, times, dirs=dirs)
+
+    def import_table(self, table: HistoryTable) -> str:
+        """Serialize a HistoryTable produced by export_table() back into commands.hst text.
+
+        :param table: Columnar history; times are written as they are.
+        :returns: Text suitable to be written as a commands.hst file.
+        """
+        locks = table.meta.get("Locks", "") or ""
+        position = int(table.meta.get("Position", -1))
+        dirs = table.dirs if table.dirs is not None else [""] * len(table)
+        return self._serialize(locks, position, dirs, table.lines, self._hex_list_from_ints(table.times))
+
+    def append(self, text: str, dir: str, command: str, filetime: Optional[int] = None) -> str:
+        """Append one entry by splicing Extras/Lines/HistoryCount/Times in place.
+
+        Only the tails of the affected values are rewritten; existing entries
+        are neither decoded nor re-encoded. The text is still scanned once to
+        locate the keys and check that the columns line up (a separator scan
+        of Lines/Extras, a token count of Times), so the cost is one linear
+        pass rather than a full export()/import_(). Files whose columns are
+        missing or not aligned with HistoryCount are rebuilt that way instead.
+
+        :param text: Raw contents of a commands.hst file (may be empty).
+        :param dir: Working directory of the command ("" if unknown).
+        :param command: Command line to append; must not be empty.
+        :param filetime: FILETIME integer of the entry; defaults to now.
+        :returns: Updated commands.hst text.
+        :raises ValueError: If command is empty.
+        """
+        if not command:
+            raise ValueError("command must not be empty")
+        hx = filetime_int_to_hex_le(filetime if filetime else now_filetime_int())
+        edits = self._append_edits(HstDocument(text), dir, command, hx)
+        if edits is not None:
+            return splice(text, edits)
+        data = self.export(text, iso=False) if text.strip() else {"Locks": "", "Position": -1, "History": []}
+        data["History"].append({"dir": dir, "command": command, "timeHex": hx})
+        return self.import_(data)
 
-        extras_val = self._join_items(dirs_list)
-        lines_val = self._join_items(cmd_list)
+    def _append_edits(self, doc: HstDocument, dir: str, command: str,
+                      hx: str) -> Optional[List[Edit]]:
+        """Compute the splice edits for append(), or None if a full rewrite is needed."""
+        spans = {k: doc.span(k) for k in ("Extras", "HistoryCount", "Lines", "Locks", "Times")}
+        if any(spans[k] is None for k in ("Extras", "HistoryCount", "Lines", "Times")):
+            return None
+        count_str = doc.simple("HistoryCount")
+        times_str = doc.simple("Times")
+        if not count_str.isdigit() or len(times_str.split()) != int(count_str):
+            return None
+        count = int(count_str)
+        text = doc.text
 
-        out = [
-            f"{self.HEADER}\n",
-            f'Extras="{extras_val}"\n',
-            f"HistoryCount={len(cmd_list)}\n",
-            f'Lines="{lines_val}"\n',
+        edits: List[Edit] = []
+        start, end = doc.quoted_bounds(spans["Lines"])
+        if start < 0 or sum(1 for _ in iter_item_spans(text, start, end)) != count:
+            return None
+        edits.append((end, end, ("\\n" if start != end else "") + self._join_items([command])))
+
+        # Extras is positional and may stop short: the missing tail entries have
+        # no dir. A new dir goes after separators for all `count` earlier entries.
+        start, end = doc.quoted_bounds(spans["Extras"])
+        if start < 0:
+            return None
+        dir_spans = list(iter_item_spans(text, start, end, keep_empty=True))
+        if len(dir_spans) > count:
+            return None
+        if dir:
+            tail = dir_spans[-1][1] if dir_spans else start
+            gap = count - len(dir_spans) + (1 if dir_spans else 0)
+            edits.append((tail, end, "\\n" * gap + self._join_items([dir])))
+
+        sp = spans["HistoryCount"]
+        edits.append(self._replace_value(text, sp, str(count + 1)))
+        sp = spans["Times"]
+        edits.append(self._replace_value(text, sp, f"{times_str} {hx}" if times_str else hx))
+        # Keep a per-entry Locks string aligned (an empty one means "nothing locked")
+        sp = spans["Locks"]
+        if sp is not None and count and len(doc.simple("Locks")) == count:
+            edits.append(self._replace_value(text, sp, doc.simple("Locks") + "0"))
+        return edits
+
+    def _serialize(self, locks: str, position: int, dirs_list: List[str], cmd_list: List[str],
+                   hex_out: List[str]) -> str:
+        """Assemble commands.hst text from aligned columns."""
+        out = [f"{self.HEADER}\n", 'Extras="']
+        self._join_items(dirs_list, out)
+        out += ['"\n', f"HistoryCount={len(cmd_list)}\n", 'Lines="']
+        self._join_items(cmd_list, out)
+        out += [
+            '"\n',
             f"Locks={locks}\n" if locks != "" else "Locks=\n",
             f"Position={position}\n",
             "Times=" + " ".join(hex_out) + "\n",
         ]
         return "".join(out)
+
+
+def append_command(path: Union[str, Path], dir: str, command: str, filetime: Optional[int] = None) -> None:
+    """Append one command to a commands.hst file on disk.
+
+    The file is read and written without newline translation and replaced
+    atomically; a missing file is created.
+
+    :param path: Path to commands.hst.
+    :param dir: Working directory of the command.
+    :param command: Command line to append.
+    :param filetime: FILETIME integer of the entry; defaults to now.
+    :raises ValueError: If the file is not a [SavedHistory] file or command is empty.
+    """
+    path = Path(path)
+    text = ""
+    if path.exists():
+        with path.open("r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        if text.strip() and CommandsHistory.HEADER not in text:
+            raise ValueError(f"{path} is not a {CommandsHistory.HEADER} file")
+    out = CommandsHistory().append(text, dir, command, filetime)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        f.write(out)
+    os.replace(tmp, path)
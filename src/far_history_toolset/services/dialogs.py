@@ -1,60 +1,138 @@
 """[SavedDialogHistory] (dialogs.hst) exporter/importer with subsections."""
 from __future__ import annotations
 
-import re
-from typing import Dict, Any, List, Tuple
+import sys
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from far_history_toolset.core import extract_quoted_block, extract_simple_pair
-from far_history_toolset.services.base import HistoryFile
+from far_history_toolset.core import HstDocument, HstSection
+from far_history_toolset.core.models import LazyIsoRecord
+from far_history_toolset.core.table import HistoryTable, intern_all
+from far_history_toolset.services.base import Edit, HistoryFile, IsoMode, Record, Source
 
 
-_SECTION_RE = re.compile(r"^\[SavedDialogHistory/([^\]]+)\]\s*$", re.MULTILINE)
+_SECTION_PREFIX = "SavedDialogHistory/"
+
+# Executors export() can decode categories on
+POOLS = ("thread", "process")
 
 
 class DialogsHistory(HistoryFile):
     HEADER = "[SavedDialogHistory]"
 
-    def export(self, text: str) -> dict:
+    def export(
+        self,
+        text: str,
+        iso: IsoMode = True,
+        categories: Optional[Iterable[str]] = None,
+        workers: int = 1,
+        pool: str = "thread",
+    ) -> dict:
         """Parse dialogs.hst with multiple subsections into a structured dict.
 
         Each subsection [SavedDialogHistory/<Name>] becomes a category with its
-        own Locks, Position, and History list aligned by index.
+        own Locks, Position, and History list aligned by index. With categories
+        given, only those sections are decoded; every other one is exported as
+        {"name", "Raw"} holding its exact text, which import_() writes back as is.
+
+        With workers > 1 the categories are decoded concurrently on a thread
+        or process pool; the result is the same, in file order. Processes
+        scale across cores (each section is sent to a worker and its records
+        sent back); threads only do so on free-threaded Python builds. With
+        hooks set, categories are decoded one after another.
 
         :param text: Raw dialogs.hst contents.
+        :param iso: True to fill timeISO, "lazy" to compute it on first access, False to omit it.
+        :param categories: Names of the categories to decode (default: all); unknown names are ignored.
+        :param workers: Number of pool workers; 1 decodes in the calling thread.
+        :param pool: "thread" or "process".
         :returns: A dictionary with Header, HistoryCount, and Categories.
-        :raises ValueError: If the structure cannot be parsed (surfaced from helpers).
+        :raises ValueError: If the structure cannot be parsed (surfaced from helpers), or workers/pool are invalid.
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        if pool not in POOLS:
+            raise ValueError(f"pool must be one of {', '.join(POOLS)}, got {pool!r}")
+        # Top-level header block may contain HistoryCount (and sometimes nothing else);
+        # subsections are read from the same one-pass key index.
+        return self._export_doc(self._scan(text), with_history=True, iso=iso, only=categories,
+                                workers=workers, pool=pool)
+
+    def export_meta(self, text: Union[str, HstDocument], categories: Optional[Iterable[str]] = None) -> dict:
+        """Same as export() but categories carry only name, Locks and Position.
+
+        :param text: Raw dialogs.hst contents, or their HstDocument.
+        :param categories: As for export(): other categories are carried as {"name", "Raw"}.
+        :returns: A dictionary with Header, HistoryCount, and Categories without History.
         """
-        # Top-level header block may contain HistoryCount (and sometimes nothing else)
-        # We remove ONLY the first occurrence of the header line to avoid eating subsections.
-        # Then we fish out the optional HistoryCount right after it, if present.
-        top_history_count = self._read_top_history_count(text)
+        return self._export_doc(self._document(text), with_history=False, only=categories)
+
+    def category_spans(self, text: str) -> Dict[str, Tuple[int, int]]:
+        """Offset index of the categories: name -> (start, end) of its section in text.
+
+        Built from one scan of the keys; no value is decoded. A repeated name maps to its first section.
+
+        :param text: Raw dialogs.hst contents.
+        :returns: Dict in file order.
+        """
+        spans: Dict[str, Tuple[int, int]] = {}
+        for sec in self._iter_sections(HstDocument(text)):
+            spans.setdefault(sec.name[len(_SECTION_PREFIX):], (sec.start, sec.end))
+        return spans
+
+    def _export_doc(
+        self,
+        doc: HstDocument,
+        with_history: bool,
+        iso: IsoMode = True,
+        only: Optional[Iterable[str]] = None,
+        workers: int = 1,
+        pool: str = "thread",
+    ) -> dict:
+        """Build the export dict from a scanned document, optionally skipping History.
+
+        Sections not named in `only` (when given) become {"name", "Raw"} without being decoded.
+        """
+        top_history_count = self._read_top_history_count(doc)
+        wanted = None if only is None else set(only)
+        parallel = with_history and workers > 1 and self.hooks is None
+        # Lazy records lose their laziness (and most of their speed) in pickling:
+        # process workers build plain records, wrapped again below
+        job_iso: IsoMode = False if pool == "process" and iso == "lazy" else iso
+        # (category dict, (Lines, Times, iso)) of the sections left to the pool
+        pending: List[Tuple[Dict[str, Any], Tuple[str, str, IsoMode]]] = []
 
         categories: List[Dict[str, Any]] = []
-        for name, block in self._iter_sections(text):
-            lines_raw, _ = extract_quoted_block(block, "Lines")
-            locks, _ = extract_simple_pair(block, "Locks")
-            position, _ = extract_simple_pair(block, "Position")
-            times_str, _ = extract_simple_pair(block, "Times")
-
-            items = self._split_items(lines_raw)
-            hex_list = [t for t in (times_str or "").split() if t]
-            iso_list = self._times_hex_to_iso_list(hex_list)
-
-            # One-to-one mapping: index -> line/time
-            history: List[Dict[str, Any]] = []
-            for i, line in enumerate(items):
-                history.append({
-                    "line": line,
-                    "timeHex": hex_list[i] if i < len(hex_list) else None,
-                    "timeISO": iso_list[i] if i < len(iso_list) else None,
-                })
-
-            categories.append({
+        for sec in self._iter_sections(doc):
+            name = sec.name[len(_SECTION_PREFIX):]
+            if wanted is not None and name not in wanted:
+                categories.append({"name": name, "Raw": doc.text[sec.start:sec.end]})
+                continue
+            locks = doc.simple("Locks", sec)
+            position = doc.simple("Position", sec)
+
+            cat: Dict[str, Any] = {
                 "name": name,
                 "Locks": locks or "",
                 "Position": int(position) if position else -1,
-                "History": history,
-            })
+            }
+            if parallel:
+                pending.append((cat, (doc.quoted("Lines", sec), doc.simple("Times", sec), job_iso)))
+            elif with_history:
+                lines_raw, times_str = doc.quoted("Lines", sec), doc.simple("Times", sec)
+                history = self._iter_history(
+                    self._staged("split", self._iter_items(lines_raw)),
+                    self._staged("times", self._iter_times(times_str, iso)),
+                    iso,
+                )
+                cat["History"] = list(self._staged("build", history))
+            categories.append(cat)
+
+        if pending:
+            decoded = self._decode_pooled([job for _, job in pending], workers, pool)
+            for (cat, _), history in zip(pending, decoded):
+                cat["History"] = history if job_iso == iso else [LazyIsoRecord(rec) for rec in history]
 
         return {
             "Header": self.HEADER,
@@ -62,6 +140,41 @@ class DialogsHistory(HistoryFile):
             "Categories": categories,
         }
 
+    def iter_records(
+        self, source: Source, iso: IsoMode = True, categories: Optional[Iterable[str]] = None
+    ) -> Iterator[Record]:
+        """Stream (category, record) pairs section by section.
+
+        Lines and Times of each section are decoded lazily and in lockstep.
+
+        :param source: Raw dialogs.hst text, a text stream or its HstDocument.
+        :param iso: timeISO handling, as for export().
+        :param categories: Only yield (and decode) these categories (default: all).
+        :returns: Iterator over (name, {"line", "timeHex", "timeISO"}).
+        """
+        doc = self._document(source)
+        wanted = None if categories is None else set(categories)
+        for sec in self._iter_sections(doc):
+            name = sec.name[len(_SECTION_PREFIX):]
+            if wanted is not None and name not in wanted:
+                continue
+            lines = self._iter_items(doc.quoted("Lines", sec))
+            for rec in self._iter_history(lines, self._iter_times(doc.simple("Times", sec), iso), iso):
+                yield name, rec
+
+    def _iter_history(
+        self, lines: Iterable[str], times_pairs: Iterable[Tuple[str, str | None]], iso: IsoMode = True
+    ) -> Iterator[Dict[str, Any]]:
+        """One-to-one mapping: index -> line/time."""
+        times = iter(times_pairs)
+        make = self._record_factory(iso)
+        for line in lines:
+            hx, iso_value = next(times, (None, None))
+            rec = make(line=line, timeHex=hx)
+            if iso is True:
+                rec["timeISO"] = iso_value
+            yield rec
+
     def import_(self, data: dict) -> str:
         """Serialize the dialogs structure back into dialogs.hst format.
 
@@ -80,50 +193,194 @@ class DialogsHistory(HistoryFile):
         out: List[str] = [f"{self.HEADER}\n", f"HistoryCount={hist_count}\n\n"]
 
         for cat in cats:
-            name = cat.get("name") or "Unnamed"
-            locks = cat.get("Locks", "") or ""
-            position = int(cat.get("Position", -1))
+            if "History" not in cat and "Raw" in cat:
+                self._write_raw(out, cat["Raw"])
+                continue
             history = cat.get("History", []) or []
-
             lines_list = [e.get("line") or "" for e in history]
             time_pairs = [(e.get("timeHex"), e.get("timeISO")) for e in history]
-            times_hex = self._hex_list_from_records(time_pairs)
+            self._write_category(out, cat, lines_list, self._hex_list_from_records(time_pairs))
+
+        return "".join(out)
+
+    def import_records(self, meta: dict, records: Iterable[Record]) -> str:
+        """Serialize dialogs.hst from header fields and streamed (category, record) pairs.
+
+        Records are grouped by category name. Categories keep the order of
+        meta["Categories"]; names seen only in records are appended in order
+        of first appearance with empty Locks and Position=-1. A category with
+        "Raw" text and no records is written back verbatim.
+
+        Unlike import_(), sections that share a name are merged: a record
+        stream does not say which of them a record came from, so all records
+        of that name go to the first section (with its Locks and Position)
+        and the later ones are dropped.
+
+        :param meta: Header fields and Categories (name/Locks/Position), e.g. from export_meta().
+        :param records: Iterable of (category name, record) pairs.
+        :returns: Text suitable for a dialogs.hst file.
+        """
+        hist_count = int(meta.get("HistoryCount", 0))
+        cats: List[Dict[str, Any]] = [dict(c) for c in (meta.get("Categories", []) or [])]
+        columns: Dict[str, Tuple[List[str], List[Tuple[str | None, str | None]]]] = {}
+        for cat in cats:
+            columns.setdefault(cat.get("name") or "Unnamed", ([], []))
 
-            out.append(f"[SavedDialogHistory/{name}]\n")
-            out.append(f'Lines="{self._join_items(lines_list)}"\n')
-            out.append(f"Locks={locks}\n" if locks != "" else "Locks=\n")
-            out.append(f"Position={position}\n")
-            out.append("Times=" + " ".join(times_hex) + "\n\n")
+        for name, e in records:
+            name = name or "Unnamed"
+            if name not in columns:
+                cats.append({"name": name})
+                columns[name] = ([], [])
+            lines_list, time_pairs = columns[name]
+            lines_list.append(e.get("line") or "")
+            time_pairs.append((e.get("timeHex"), e.get("timeISO")))
 
+        out: List[str] = [f"{self.HEADER}\n", f"HistoryCount={hist_count}\n\n"]
+        written = set()
+        for cat in cats:
+            name = cat.get("name") or "Unnamed"
+            if name in written:
+                continue
+            written.add(name)
+            lines_list, time_pairs = columns[name]
+            if not lines_list and "Raw" in cat:
+                self._write_raw(out, cat["Raw"])
+                continue
+            self._write_category(out, cat, lines_list, self._hex_list_from_records(time_pairs))
         return "".join(out)
 
+    def export_table(self, text: str) -> HistoryTable:
+        """Parse dialogs.hst into one HistoryTable with a per-row category column.
+
+        :param text: Raw dialogs.hst contents.
+        :returns: Table whose meta equals export_meta(text); rows keep section order.
+        """
+        doc = HstDocument(text)
+        lines: List[str] = []
+        categories: List[str] = []
+        times = array("Q")
+        for sec in self._iter_sections(doc):
+            name = sys.intern(sec.name[len(_SECTION_PREFIX):])
+            items = intern_all(self._iter_items(doc.quoted("Lines", sec)))
+            lines.extend(items)
+            categories.extend([name] * len(items))
+            times.extend(self._times_column(doc.simple("Times", sec), len(items)))
+        return HistoryTable(self._export_doc(doc, with_history=False), lines, times, categories=categories)
+
+    def import_table(self, table: HistoryTable) -> str:
+        """Serialize a HistoryTable back into dialogs.hst, grouping rows by category.
+
+        Category order follows table.meta["Categories"], then first appearance.
+
+        :param table: Columnar history; times are written as they are.
+        :returns: Text suitable for a dialogs.hst file.
+        """
+        meta = table.meta
+        hist_count = int(meta.get("HistoryCount", 0))
+        cats: List[Dict[str, Any]] = list(meta.get("Categories", []) or [])
+        rows: Dict[str, List[int]] = {}
+        for cat in cats:
+            rows.setdefault(cat.get("name") or "Unnamed", [])
+        names = table.categories if table.categories is not None else ["Unnamed"] * len(table)
+        for i, name in enumerate(names):
+            name = name or "Unnamed"
+            if name not in rows:
+                cats.append({"name": name})
+                rows[name] = []
+            rows[name].append(i)
+
+        out: List[str] = [f"{self.HEADER}\n", f"HistoryCount={hist_count}\n\n"]
+        written = set()
+        for cat in cats:
+            name = cat.get("name") or "Unnamed"
+            if name in written:
+                continue
+            written.add(name)
+            idx = rows[name]
+            lines_list = [table.lines[i] for i in idx]
+            times_hex = self._hex_list_from_ints(table.times[i] for i in idx)
+            self._write_category(out, cat, lines_list, times_hex)
+        return "".join(out)
+
+    def _write_category(
+        self,
+        out: List[str],
+        cat: Dict[str, Any],
+        lines_list: List[str],
+        times_hex: List[str],
+    ) -> None:
+        """Append one [SavedDialogHistory/<Name>] section to out."""
+        name = cat.get("name") or "Unnamed"
+        locks = cat.get("Locks", "") or ""
+        position = int(cat.get("Position", -1))
+
+        out.append(f"[SavedDialogHistory/{name}]\n")
+        out.append('Lines="')
+        self._join_items(lines_list, out)
+        out.append('"\n')
+        out.append(f"Locks={locks}\n" if locks != "" else "Locks=\n")
+        out.append(f"Position={position}\n")
+        out.append("Times=" + " ".join(times_hex) + "\n\n")
+
+    @staticmethod
+    def _decode_pooled(jobs: List[Tuple[str, str, IsoMode]], workers: int, pool: str) -> List[List[Dict[str, Any]]]:
+        """Run _decode_category over jobs on a pool; results come back in job order."""
+        if len(jobs) < 2:
+            return [_decode_category(job) for job in jobs]
+        workers = min(workers, len(jobs))
+        executor: Executor
+        if pool == "process":
+            executor = ProcessPoolExecutor(max_workers=workers)
+            # Many small sections: ship them in batches to keep IPC overhead down
+            chunksize = max(1, len(jobs) // (4 * workers))
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            chunksize = 1
+        with executor:
+            return list(executor.map(_decode_category, jobs, chunksize=chunksize))
 
     @staticmethod
-    def _iter_sections(text: str) -> List[Tuple[str, str]]:
+    def _write_raw(out: List[str], raw: str) -> None:
+        """Append a section carried through export() undecoded, ending it with a newline."""
+        out.append(raw if raw.endswith("\n") else raw + "\n")
+
+    def _patch_groups(self, doc: HstDocument) -> Iterator[Tuple[Optional[str], Optional[HstSection]]]:
+        """patch() addresses entries per [SavedDialogHistory/<Name>] section."""
+        for sec in self._iter_sections(doc):
+            yield sec.name[len(_SECTION_PREFIX):], sec
+
+    def _patch_totals(self, doc: HstDocument, before: int, after: int) -> List[Edit]:
+        """Update the top-level HistoryCount when it counted all entries."""
+        sec = doc.section("SavedDialogHistory")
+        sp = doc.span("HistoryCount", sec) if sec is not None else None
+        if sp is None or before == after or self._read_top_history_count(doc) != before:
+            return []
+        return [self._replace_value(doc.text, sp, str(after))]
+
+    @staticmethod
+    def _iter_sections(doc: HstDocument) -> Iterator[HstSection]:
         """
-        Yield (name, block_text) for each [SavedDialogHistory/<Name>] section.
-        block_text starts at the section header and ends right before the next section/header or EOF.
+        Yield each [SavedDialogHistory/<Name>] section of the scanned document.
+        Each section spans from its header up to the next section header or EOF.
         """
-        matches = list(_SECTION_RE.finditer(text))
-        sections: List[Tuple[str, str]] = []
-        for i, m in enumerate(matches):
-            name = m.group(1)
-            start = m.start()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-            sections.append((name, text[start:end]))
-        return sections
+        for sec in doc.sections:
+            if sec.name and sec.name.startswith(_SECTION_PREFIX) and len(sec.name) > len(_SECTION_PREFIX):
+                yield sec
 
     @staticmethod
-    def _read_top_history_count(text: str) -> int:
+    def _read_top_history_count(doc: HstDocument) -> int:
         """
         Read the HistoryCount from the top-level [SavedDialogHistory] header if present.
         """
-        # Find the header line first
-        hdr = re.search(r"^\s*\[SavedDialogHistory]\s*$", text, re.MULTILINE)
-        if not hdr:
+        sec = doc.section("SavedDialogHistory")
+        if sec is None:
             return 0
-        # Search for a HistoryCount=... following it (before the first subsection header)
-        next_sub = _SECTION_RE.search(text, hdr.end())
-        scope_end = next_sub.start() if next_sub else len(text)
-        m = re.search(r"^HistoryCount=(\d+)\s*$", text[hdr.end():scope_end], re.MULTILINE)
-        return int(m.group(1)) if m else 0
+        value = doc.simple("HistoryCount", sec)
+        return int(value) if value.isdigit() else 0
+
+
+def _decode_category(job: Tuple[str, str, IsoMode]) -> List[Dict[str, Any]]:
+    """Decode one section's (Lines, Times, iso) into its History list; runs in pool workers."""
+    lines_raw, times_str, iso = job
+    svc = DialogsHistory()
+    return list(svc._iter_history(svc._iter_items(lines_raw), svc._iter_times(times_str, iso), iso))
@@ -0,0 +1,175 @@
+"""
+K-way merge of history files of the same type (e.g. one per machine).
+
+merge_histories() streams the entries of every input with
+iter_entries(iso=False) and interleaves them by FILETIME with heapq.merge(),
+so merging N files of T entries in total costs O(T log N) comparisons.
+Inputs are expected oldest-first, as far2l writes them; ties keep input order.
+Each input is lexed once; entries travel as plain tuples of their columns,
+never as a list of record dicts.
+
+The merged stream is walked twice:
+- the first pass remembers, per distinct entry (same category and
+  TEXT_FIELDS, i.e. (dir, command) for commands.hst), the position of its
+  newest occurrence, and counts the entries per input and category
+- the second pass keeps those positions, optionally only the newest `limit`
+  per category (per dialog category), and collects the rows to write
+
+Memory thus grows with the distinct and the written entries, not with the
+inputs. Per-entry Locks flags are carried over when every input holds one
+flag per entry; Position is reset to -1.
+"""
+from __future__ import annotations
+
+import heapq
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from far_history_toolset.core.errors import UnknownHeaderError
+from far_history_toolset.core.filetime import filetime_hex_to_int_le
+from far_history_toolset.core.hst_lexer import HstDocument, detect_header
+from far_history_toolset.services.base import HistoryFile, Record
+from far_history_toolset.services.registry import get_service_for_header
+
+# (FILETIME, input number, category, index within the input's category, column values)
+_Row = Tuple[int, int, Optional[str], int, Tuple[Any, ...]]
+
+
+class MergeResult(NamedTuple):
+    """Merged .hst text and entry counts."""
+    text: str
+    entries_in: int
+    entries_out: int
+
+
+def _stream(svc: HistoryFile, k: int, doc: HstDocument, columns: Tuple[str, ...]) -> Iterator[_Row]:
+    # iter_entries() skips commands.hst Extras items past the end of Lines: they are not entries
+    for cat, i, rec in svc.iter_entries(doc, iso=False):
+        try:
+            t = filetime_hex_to_int_le(rec.get("timeHex") or "")
+        except ValueError:
+            t = 0
+        yield t, k, cat, i, tuple(rec.get(c) for c in columns)
+
+
+def _merged(svc: HistoryFile, docs: Sequence[HstDocument], columns: Tuple[str, ...]) -> Iterable[_Row]:
+    return heapq.merge(*(_stream(svc, k, doc, columns) for k, doc in enumerate(docs)), key=itemgetter(0))
+
+
+def _locks_by_input(meta: Dict[str, Any]) -> Dict[Optional[str], str]:
+    """Locks string per category (None for single-list histories)."""
+    if "Categories" in meta:
+        return {c.get("name") or "Unnamed": c.get("Locks") or "" for c in meta.get("Categories") or []}
+    return {None: meta.get("Locks") or ""}
+
+
+def merge_histories(
+    texts: Sequence[str],
+    limit: Optional[int] = None,
+    dedup: bool = True,
+    header: Optional[str] = None,
+) -> MergeResult:
+    """Merge history files of one type into a single file ordered by time.
+
+    :param texts: Raw .hst contents, all with the same header.
+    :param limit: Keep only the newest `limit` entries (per category for dialogs.hst).
+    :param dedup: Drop repeated entries, keeping the newest.
+    :param header: Force a parser instead of auto-detecting the headers.
+    :returns: MergeResult with the merged text and entry counts.
+    :raises UnknownHeaderError: If a header is missing and none was given.
+    :raises ValueError: If the inputs have different headers, none are given, or limit < 0.
+    """
+    if not texts:
+        raise ValueError("nothing to merge")
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be >= 0, got {limit}")
+    if header is None:
+        for n, text in enumerate(texts):
+            found = detect_header(text)
+            if found is None:
+                raise UnknownHeaderError(f"input {n + 1}: header not found")
+            if header is not None and found != header:
+                raise ValueError(f"cannot merge {found} with {header}")
+            header = found
+    assert header is not None
+    svc = get_service_for_header(header)
+    docs = [HstDocument(text) for text in texts]
+    metas = [svc.export_meta(doc) for doc in docs]
+    fields = tuple(svc.TEXT_FIELDS)
+    columns = fields + ("typeFlag", "timeHex")
+    width = len(fields)
+
+    # Pass 1: newest position of every distinct entry, entry counts per input and category
+    newest: Dict[tuple, int] = {}
+    counts: Dict[Tuple[int, Optional[str]], int] = {}
+    totals: Dict[Optional[str], int] = {}
+    entries_in = 0
+    for pos, (_, k, cat, _, values) in enumerate(_merged(svc, docs, columns)):
+        entries_in += 1
+        counts[k, cat] = counts.get((k, cat), 0) + 1
+        if dedup:
+            newest[(cat,) + tuple(v or "" for v in values[:width])] = pos
+        else:
+            totals[cat] = totals.get(cat, 0) + 1
+
+    keep: Optional[Set[int]] = None
+    skip: Dict[Optional[str], int] = {}
+    if dedup:
+        by_cat: Dict[Optional[str], List[int]] = {}
+        for key, pos in newest.items():
+            by_cat.setdefault(key[0], []).append(pos)
+        newest.clear()
+        keep = set()
+        for positions in by_cat.values():
+            if limit is not None:
+                positions.sort()
+                positions = positions[max(len(positions) - limit, 0):]
+            keep.update(positions)
+    elif limit is not None:
+        skip = {cat: max(n - limit, 0) for cat, n in totals.items()}
+
+    # Pass 2: the rows to write, in merged order
+    out: List[Tuple[int, Optional[str], int, Tuple[Any, ...]]] = []
+    seen: Dict[Optional[str], int] = {}
+    for pos, (_, k, cat, i, values) in enumerate(_merged(svc, docs, columns)):
+        if keep is not None:
+            if pos not in keep:
+                continue
+        elif skip:
+            n = seen.get(cat, 0)
+            seen[cat] = n + 1
+            if n < skip.get(cat, 0):
+                continue
+        out.append((k, cat, i, values))
+
+    # Carry per-entry lock flags only where every input has one per entry
+    in_locks = [_locks_by_input(m) for m in metas]
+    out_locks: Dict[Optional[str], Optional[List[str]]] = {}
+    for k, cat, i, _ in out:
+        chars = out_locks.setdefault(cat, [])
+        if chars is None:
+            continue
+        locks = in_locks[k].get(cat, "")
+        if len(locks) == counts[k, cat]:
+            chars.append(locks[i])
+        else:
+            out_locks[cat] = None
+
+    def locks_for(cat: Optional[str]) -> str:
+        return "".join(out_locks.get(cat) or ())
+
+    meta = dict(metas[0])
+    if "Categories" in meta:
+        cats: Dict[str, Dict[str, Any]] = {}
+        for m in metas:
+            for c in m.get("Categories") or []:
+                name = c.get("name") or "Unnamed"
+                cats.setdefault(name, {"name": name, "Locks": locks_for(name), "Position": -1})
+        meta["Categories"] = list(cats.values())
+        meta["HistoryCount"] = len(out)
+    else:
+        meta["Locks"] = locks_for(None)
+        meta["Position"] = -1
+
+    records: Iterator[Record] = ((cat, dict(zip(columns, values))) for _, cat, _, values in out)
+    return MergeResult(svc.import_records(meta, records), entries_in, len(out))
@@ -0,0 +1,147 @@
+"""
+Per-phase instrumentation of exports.
+
+A HistoryFile whose `hooks` attribute is set reports the phases of export()
+to it: phase_start(name) before and phase_end(name, entries) after each one.
+To make the phases measurable one after the other, an instrumented export
+materializes every stage instead of decoding the columns in lockstep:
+
+    lex       HstDocument(text): one scan for sections and keys
+    split     each quoted list value split into items (once per column)
+    times     Times tokens decoded to (timeHex, timeISO) pairs
+    build     record dicts assembled from the decoded columns
+
+dialogs.hst reports split/times/build once per category. Without hooks the
+services keep streaming and nothing is materialized.
+
+PhaseProfiler implements the hooks and accumulates wall time, entry counts
+and, optionally, tracemalloc peaks per phase (Python 3.9+, which can reset
+the traced peak; on 3.8 peaks are left empty); callers time their own steps
+(reading the file, json.dump, ...) with PhaseProfiler.phase(). Phases do not
+nest.
+"""
+from __future__ import annotations
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# tracemalloc.reset_peak() is new in Python 3.9; without it per-phase peaks can't be measured
+_reset_peak = getattr(tracemalloc, "reset_peak", None)
+
+
+class PhaseHooks:
+    """Callbacks a HistoryFile calls around each phase of export(); the defaults do nothing."""
+
+    def phase_start(self, phase: str) -> None:
+        """Called right before a phase starts."""
+
+    def phase_end(self, phase: str, entries: int) -> None:
+        """Called when a phase is done; entries is the number of items it produced."""
+
+
+@dataclass
+class PhaseStats:
+    """Totals of one phase over all of its runs."""
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    entries: int = 0
+    peak_bytes: Optional[int] = None    # highest tracemalloc peak above the phase's starting usage
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "phase": self.name,
+            "calls": self.calls,
+            "seconds": round(self.seconds, 6),
+            "entries": self.entries,
+            "peakBytes": self.peak_bytes,
+        }
+
+
+class PhaseProfiler(PhaseHooks):
+    """Collect time, entries and (with memory=True) tracemalloc peaks per phase.
+
+    Use it as a context manager: the total wall time and memory tracing
+    cover the `with` block. Tracing slows allocation-heavy code down, so with
+    memory=True compare phases by share rather than by absolute seconds.
+    """
+
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory and _reset_peak is not None
+        self.phases: Dict[str, PhaseStats] = {}
+        self.total = 0.0
+        self._t0 = 0.0
+        self._open: Dict[str, Tuple[float, Optional[int]]] = {}
+        self._started_tracing = False
+
+    def __enter__(self) -> "PhaseProfiler":
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.total += time.perf_counter() - self._t0
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def phase_start(self, phase: str) -> None:
+        base = None
+        if self.memory and tracemalloc.is_tracing():
+            _reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        self._open[phase] = (time.perf_counter(), base)
+
+    def phase_end(self, phase: str, entries: int) -> None:
+        t0, base = self._open.pop(phase)
+        seconds = time.perf_counter() - t0
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats(phase)
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.entries += entries
+        if base is not None:
+            peak = tracemalloc.get_traced_memory()[1] - base
+            stats.peak_bytes = max(stats.peak_bytes or 0, peak)
+
+    @contextmanager
+    def phase(self, name: str, entries: int = 0) -> Iterator[None]:
+        """Time the body of a `with` block as one run of phase `name`."""
+        self.phase_start(name)
+        try:
+            yield
+        finally:
+            self.phase_end(name, entries)
+
+    def report(self) -> List[PhaseStats]:
+        """Phase totals in the order the phases first ran."""
+        return list(self.phases.values())
+
+    def format_report(self) -> str:
+        """Human-readable table of the phases, their share of the total and the unaccounted rest."""
+        total = self.total or sum(s.seconds for s in self.phases.values())
+        rows = [("phase", "calls", "seconds", "share", "entries", "entries/s", "peak MB")]
+
+        def pct(seconds: float) -> str:
+            return f"{100 * seconds / total:.1f}%" if total > 0 else "-"
+
+        for s in self.report():
+            rate = f"{s.entries / s.seconds:,.0f}" if s.entries and s.seconds > 0 else ""
+            peak = f"{s.peak_bytes / 2**20:.1f}" if s.peak_bytes is not None else ""
+            rows.append((s.name, str(s.calls), f"{s.seconds:.4f}", pct(s.seconds), str(s.entries or ""), rate, peak))
+        other = total - sum(s.seconds for s in self.phases.values())
+        rows.append(("(other)", "", f"{max(other, 0.0):.4f}", pct(max(other, 0.0)), "", "", ""))
+        rows.append(("total", "", f"{total:.4f}", pct(total), "", "", ""))
+
+        widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+        lines = []
+        for r in rows:
+            cells = [r[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(r[1:], widths[1:])]
+            lines.append("  ".join(cells).rstrip())
+        return "\n".join(lines)
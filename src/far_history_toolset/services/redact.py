@@ -0,0 +1,97 @@
+"""
+Pattern-based redaction for every history type.
+
+redact() streams the records of an .hst text through one PatternSet and turns
+the results into a single patch(): entries whose text fields match are either
+masked (each match replaced) or dropped. Untouched entries are never re-encoded.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from far_history_toolset.core.patterns import PatternSet
+from far_history_toolset.services.base import EntryIndex, HistoryFile
+
+DEFAULT_REPLACEMENT = "[REDACTED]"
+
+
+@dataclass
+class RedactReport:
+    """Counters collected by redact()."""
+    patterns: List[str]
+    hits: List[int]                 # matches per pattern id
+    entries: int = 0                # records scanned
+    matched: int = 0                # records with at least one match
+    dropped: int = 0                # records deleted (drop mode, or masked down to nothing)
+    bytes: int = 0                  # size of the input text
+    seconds: float = 0.0
+
+    def top_hits(self) -> List[Tuple[str, int]]:
+        """(pattern, hits) for patterns that matched, most hits first."""
+        pairs = [(p, n) for p, n in zip(self.patterns, self.hits) if n]
+        return sorted(pairs, key=lambda pn: -pn[1])
+
+    def as_dict(self) -> Dict[str, object]:
+        """JSON-ready summary including throughput figures."""
+        secs = max(self.seconds, 1e-9)
+        return {
+            "entries": self.entries,
+            "matched": self.matched,
+            "dropped": self.dropped,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 6),
+            "entriesPerSec": round(self.entries / secs, 1),
+            "mbPerSec": round(self.bytes / 1e6 / secs, 3),
+            "hits": {p: n for p, n in self.top_hits()},
+        }
+
+
+def redact(
+    svc: HistoryFile,
+    text: str,
+    patterns: PatternSet,
+    replacement: str = DEFAULT_REPLACEMENT,
+    drop: bool = False,
+    fields: Optional[List[str]] = None,
+) -> Tuple[str, RedactReport]:
+    """Mask or drop every entry whose text fields match any of the patterns.
+
+    :param svc: Service for the text's header.
+    :param text: Raw .hst text.
+    :param patterns: Compiled pattern set.
+    :param replacement: Text substituted for each match (mask mode).
+    :param drop: Delete matching entries instead of masking them.
+    :param fields: Record fields to scan; defaults to all of svc.TEXT_FIELDS.
+    :returns: (patched text, report). The text is unchanged if nothing matched.
+    """
+    t0 = time.perf_counter()
+    report = RedactReport(patterns=list(patterns.names), hits=[0] * len(patterns), bytes=len(text))
+    scan = list(fields or svc.TEXT_FIELDS)
+    delete: List[EntryIndex] = []
+    replace: Dict[EntryIndex, Mapping[str, str]] = {}
+    hits = report.hits
+
+    for cat, i, rec in svc.iter_entries(text):
+        report.entries += 1
+        index: EntryIndex = i if cat is None else (cat, i)
+        changed: Dict[str, str] = {}
+        for name in scan:
+            value = rec.get(name) or ""
+            if value:
+                masked = patterns.sub(value, replacement, hits)
+                if masked != value:
+                    changed[name] = masked
+        if not changed:
+            continue
+        report.matched += 1
+        if drop or not all(changed.values()):
+            delete.append(index)
+        else:
+            replace[index] = changed
+    report.dropped = len(delete)
+
+    out = svc.patch(text, delete=delete, replace=replace) if report.matched else text
+    report.seconds = time.perf_counter() - t0
+    return out, report
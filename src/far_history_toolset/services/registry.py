@@ -1,8 +1,12 @@
 """Service registry: map header -> service class."""
 from __future__ import annotations
 
-from typing import Dict, Type
+from pathlib import Path
+from typing import IO, Any, AnyStr, Dict, Optional, Sequence, Type, Union
 
+from far_history_toolset.core.cache import ParseCache
+from far_history_toolset.core.errors import UnknownHeaderError
+from far_history_toolset.core.hst_lexer import HEADER_PROBE_BYTES, detect_header, read_header
 from far_history_toolset.services.base import HistoryFile
 from far_history_toolset.services.commands import CommandsHistory
 from far_history_toolset.services.dialogs import DialogsHistory
@@ -24,3 +28,64 @@ def get_service_for_header(header: str) -> HistoryFile:
     """
     cls = REGISTRY[header]
     return cls()
+
+
+def detect_header_stream(fp: IO[AnyStr], max_bytes: int = HEADER_PROBE_BYTES) -> Optional[Type[HistoryFile]]:
+    """
+    Return the service class for a stream by looking only at its first max_bytes.
+
+    Dispatch does not depend on the file size and happens before the body is
+    read; the stream position is left unchanged (see read_header()).
+
+    :param fp: Seekable text or binary stream.
+    :param max_bytes: Size of the prefix to look at.
+    :returns: The HistoryFile subclass for the header, or None if none was found.
+    :raises OSError: If the stream is not seekable.
+    """
+    header = read_header(fp, max_bytes)
+    return REGISTRY[header] if header is not None else None
+
+
+def export_file(
+    path: Union[str, Path],
+    *,
+    iso: bool = True,
+    header: Optional[str] = None,
+    cache: Optional[ParseCache] = None,
+    categories: Optional[Sequence[str]] = None,
+    workers: int = 1,
+    pool: str = "thread",
+) -> Dict[str, Any]:
+    """
+    Export an .hst file on disk, optionally through a persistent parse cache.
+
+    :param path: .hst file path.
+    :param iso: Include timeISO in records.
+    :param header: Force a parser instead of auto-detecting the header.
+    :param cache: Reuse the export of an unchanged file from this cache.
+    :param categories: dialogs.hst only: decode just these categories (see DialogsHistory.export()).
+    :param workers: dialogs.hst only: decode categories on a pool of this many workers.
+    :param pool: "thread" or "process", with workers > 1.
+    :returns: The export dict, as returned by HistoryFile.export().
+    :raises UnknownHeaderError: If no header is found and none was given.
+    :raises ValueError: If categories are given for a file that is not dialogs.hst.
+    """
+    def compute(data: bytes) -> Dict[str, Any]:
+        # Same decoding as reading the file in text mode: universal newlines
+        text = data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+        hdr = header or detect_header(text)
+        if hdr is None:
+            raise UnknownHeaderError(f"{path}: header not found")
+        svc = get_service_for_header(hdr)
+        if not isinstance(svc, DialogsHistory):
+            if categories is not None:
+                raise ValueError(f"{path}: categories only apply to {DialogsHistory.HEADER}, not {hdr}")
+            return svc.export(text, iso=iso)
+        return svc.export(text, iso=iso, categories=categories, workers=workers, pool=pool)
+
+    if cache is None:
+        return compute(Path(path).expanduser().read_bytes())
+    variant = f"export:iso={iso}:header={header or ''}"
+    if categories is not None:
+        variant += ":categories=" + "\0".join(sorted(set(categories)))
+    return cache.load(path, variant, compute)
@@ -0,0 +1,52 @@
+"""
+Secret scanning over history records.
+
+scan_secrets() streams a file's records with iter_records(iso=False) and runs
+the history line of each one through core.secrets.scan_line(), so the cost is
+close to that of decoding Lines once. Commands and dialog lines are what users
+type, so SCAN_HEADERS limits the default scan of the CLI to those two files;
+folders.hst and view.hst only hold paths.
+"""
+from __future__ import annotations
+
+from typing import IO, Dict, Iterator, NamedTuple, Optional, Sequence, Union
+
+from far_history_toolset.core.secrets import SecretFinding, scan_line
+from far_history_toolset.services.base import HistoryFile
+from far_history_toolset.services.commands import CommandsHistory
+from far_history_toolset.services.dialogs import DialogsHistory
+
+# History types scanned unless every type is asked for
+SCAN_HEADERS = (CommandsHistory.HEADER, DialogsHistory.HEADER)
+
+
+class SecretHit(NamedTuple):
+    """A finding located in a history file."""
+    category: Optional[str]     # dialogs.hst section name, else None
+    index: int                  # entry index (within the category for dialogs.hst)
+    field: str                  # record field the finding is in
+    finding: SecretFinding
+
+
+def scan_secrets(
+    svc: HistoryFile,
+    source: Union[str, IO[str]],
+    fields: Optional[Sequence[str]] = None,
+) -> Iterator[SecretHit]:
+    """Yield a SecretHit for every suspected credential in the file's entries.
+
+    :param svc: Service for the file's header.
+    :param source: Raw .hst text or a text stream.
+    :param fields: Record fields to scan; defaults to the history line (svc.LINE_FIELD).
+    :returns: Iterator over hits in file order.
+    """
+    scan = list(fields or (svc.LINE_FIELD,))
+    counters: Dict[Optional[str], int] = {}
+    for cat, rec in svc.iter_records(source, iso=False):
+        i = counters.get(cat, 0)
+        counters[cat] = i + 1
+        for name in scan:
+            value = rec.get(name)
+            if value:
+                for finding in scan_line(value):
+                    yield SecretHit(cat, i, name, finding)
@@ -0,0 +1,282 @@
+"""
+SQLite storage for history files.
+
+HistoryDatabase loads .hst files of every type into normalized tables so that
+many histories can be queried with plain SQL, and rebuilds any stored file
+back into .hst text (as importing its JSON export does, but with the Times
+tokens of the original file).
+
+Schema:
+    file      (id, path UNIQUE, header, meta)   meta = export_meta() as JSON
+    category  (id, file_id, idx, name)          dialogs.hst sections, in file order
+    entry     (file_id, category_id, idx, line, dir, filetime, type_flag, time_hex)
+    history   view joining the three: file, header, category, idx, line, dir,
+              filetime, type_flag
+
+entry.line is the service's LINE_FIELD (command, path or dialog line);
+category_id, dir and type_flag are NULL where the history type has no such
+column, filetime is NULL for entries without a valid time. time_hex keeps the
+Times token as written in the file ('' when the file had none), so a rebuild
+writes malformed or odd-cased tokens back unchanged instead of a new time.
+Indexes cover filetime, line and the (file, category, idx) order used to
+rebuild a file.
+
+Records are streamed with iter_records(iso=False) and written with
+executemany() in batches of BATCH_SIZE rows; each file is loaded in one
+transaction, replacing any earlier copy stored under the same path.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from far_history_toolset.core.errors import SchemaError, UnknownHeaderError
+from far_history_toolset.core.filetime import filetime_hex_to_int_le, filetime_int_to_hex_le
+from far_history_toolset.core.hst_lexer import HstDocument, detect_header, splice
+from far_history_toolset.services.base import Edit, HistoryFile, Record
+from far_history_toolset.services.registry import get_service_for_header
+
+BATCH_SIZE = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file (
+    id      INTEGER PRIMARY KEY,
+    path    TEXT NOT NULL UNIQUE,
+    header  TEXT NOT NULL,
+    meta    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS category (
+    id      INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES file(id) ON DELETE CASCADE,
+    idx     INTEGER NOT NULL,
+    name    TEXT NOT NULL,
+    UNIQUE (file_id, idx)
+);
+CREATE TABLE IF NOT EXISTS entry (
+    file_id     INTEGER NOT NULL REFERENCES file(id) ON DELETE CASCADE,
+    category_id INTEGER REFERENCES category(id) ON DELETE CASCADE,
+    idx         INTEGER NOT NULL,
+    line        TEXT NOT NULL,
+    dir         TEXT,
+    filetime    INTEGER,
+    type_flag   INTEGER,
+    time_hex    TEXT
+);
+CREATE INDEX IF NOT EXISTS entry_order ON entry (file_id, category_id, idx);
+CREATE INDEX IF NOT EXISTS entry_filetime ON entry (filetime);
+CREATE INDEX IF NOT EXISTS entry_line ON entry (line);
+CREATE VIEW IF NOT EXISTS history AS
+    SELECT f.path AS file, f.header AS header, c.name AS category, e.idx AS idx,
+           e.line AS line, e.dir AS dir, e.filetime AS filetime, e.type_flag AS type_flag
+    FROM entry e JOIN file f ON f.id = e.file_id LEFT JOIN category c ON c.id = e.category_id;
+"""
+
+# SQLite integers are signed 64-bit; FILETIMEs at or above 2**63 (never valid
+# dates, but representable in .hst) are stored as their two's complement.
+_U64 = 1 << 64
+_I64_MAX = (1 << 63) - 1
+
+
+def _filetime_to_db(time_hex: Optional[str]) -> Optional[int]:
+    if not time_hex:
+        return None
+    try:
+        v = filetime_hex_to_int_le(time_hex)
+    except ValueError:
+        return None
+    return v - _U64 if v > _I64_MAX else v
+
+
+def _filetime_from_db(v: Optional[int]) -> Optional[str]:
+    if v is None:
+        return None
+    return filetime_int_to_hex_le(v + _U64 if v < 0 else v)
+
+
+class HistoryDatabase:
+    """A SQLite database of history files (see the module docstring for the schema)."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = str(Path(path).expanduser()) if str(path) != ":memory:" else ":memory:"
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(_SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(entry)")]
+        if "time_hex" not in columns:
+            # databases written before time_hex existed rebuild from filetime alone
+            self.conn.execute("ALTER TABLE entry ADD COLUMN time_hex TEXT")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "HistoryDatabase":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def files(self) -> List[str]:
+        """Paths of the stored files, in load order."""
+        return [row[0] for row in self.conn.execute("SELECT path FROM file ORDER BY id")]
+
+    def add_text(self, name: str, text: str, header: Optional[str] = None) -> int:
+        """Store one history file under name (replacing an earlier copy).
+
+        :param name: Key for the file, normally its path.
+        :param text: Raw .hst contents.
+        :param header: Force a parser instead of auto-detecting the header.
+        :returns: Number of stored entries.
+        :raises UnknownHeaderError: If no header is found and none was given.
+        """
+        header = header or detect_header(text)
+        if header is None:
+            raise UnknownHeaderError(f"{name}: header not found")
+        svc = get_service_for_header(header)
+        meta = svc.export_meta(text)
+        line_field = svc.LINE_FIELD
+        has_dir = "dir" in svc.TEXT_FIELDS
+
+        with self.conn:
+            self.conn.execute("DELETE FROM file WHERE path = ?", (name,))
+            file_id = self.conn.execute(
+                "INSERT INTO file (path, header, meta) VALUES (?, ?, ?)",
+                (name, header, json.dumps(meta, ensure_ascii=False)),
+            ).lastrowid
+            category_ids: Dict[str, int] = {}
+            counters: Dict[Optional[str], int] = {}
+
+            def category_id(cat: Optional[str]) -> Optional[int]:
+                if cat is None:
+                    return None
+                cid = category_ids.get(cat)
+                if cid is None:
+                    cid = self.conn.execute(
+                        "INSERT INTO category (file_id, idx, name) VALUES (?, ?, ?)",
+                        (file_id, len(category_ids), cat),
+                    ).lastrowid
+                    category_ids[cat] = cid
+                return cid
+
+            for cat in meta.get("Categories") or []:
+                category_id(cat.get("name") or "Unnamed")
+
+            def rows() -> Iterator[Tuple[Any, ...]]:
+                for cat, rec in svc.iter_records(text, iso=False):
+                    i = counters.get(cat, 0)
+                    counters[cat] = i + 1
+                    yield (
+                        file_id, category_id(cat), i, rec.get(line_field) or "",
+                        (rec.get("dir") or "") if has_dir else None,
+                        _filetime_to_db(rec.get("timeHex")), rec.get("typeFlag"),
+                        rec.get("timeHex") or "",
+                    )
+
+            it = rows()
+            while True:
+                batch = list(itertools.islice(it, BATCH_SIZE))
+                if not batch:
+                    break
+                self.conn.executemany("INSERT INTO entry VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        return sum(counters.values())
+
+    def add_file(self, path: Union[str, Path], name: Optional[str] = None, header: Optional[str] = None) -> int:
+        """Store an .hst file from disk; name defaults to the path. Returns the number of entries."""
+        p = Path(path).expanduser()
+        with p.open("r", encoding="utf-8", errors="replace") as f:
+            return self.add_text(name or str(path), f.read(), header=header)
+
+    def _file_row(self, name: Optional[str]) -> Tuple[int, str, str]:
+        if name is None:
+            rows = self.conn.execute("SELECT id, header, meta FROM file LIMIT 2").fetchall()
+            if not rows:
+                raise SchemaError("database holds no history files")
+            if len(rows) > 1:
+                raise SchemaError("database holds several history files; name the one to rebuild")
+            return rows[0]
+        row = self.conn.execute("SELECT id, header, meta FROM file WHERE path = ?", (name,)).fetchone()
+        if row is None:
+            raise SchemaError(f"{name!r} not found in database")
+        return row
+
+    def count(self, name: Optional[str] = None) -> int:
+        """Number of stored entries of one file."""
+        file_id = self._file_row(name)[0]
+        return self.conn.execute("SELECT count(*) FROM entry WHERE file_id = ?", (file_id,)).fetchone()[0]
+
+    def iter_records(self, name: Optional[str] = None) -> Iterator[Record]:
+        """Yield the stored (category, record) pairs of one file, in file order."""
+        file_id, header, _ = self._file_row(name)
+        for cat, rec, _ in self._iter_rows(file_id, get_service_for_header(header)):
+            yield cat, rec
+
+    def _iter_rows(self, file_id: int, svc: HistoryFile) -> Iterator[Tuple[Optional[str], Dict[str, Any], Optional[str]]]:
+        """Yield (category, record, stored Times token) for the entries of one file."""
+        line_field = svc.LINE_FIELD
+        cur = self.conn.execute(
+            "SELECT c.name, e.line, e.dir, e.filetime, e.type_flag, e.time_hex FROM entry e "
+            "LEFT JOIN category c ON c.id = e.category_id "
+            "WHERE e.file_id = ? ORDER BY c.idx, e.idx",
+            (file_id,),
+        )
+        for cat, line, dir_, filetime, type_flag, time_hex in cur:
+            rec: Dict[str, Any] = {}
+            if dir_ is not None:
+                rec["dir"] = dir_
+            rec[line_field] = line
+            if type_flag is not None:
+                rec["typeFlag"] = type_flag
+            rec["timeHex"] = time_hex or _filetime_from_db(filetime)
+            yield cat, rec, time_hex
+
+    def build_text(self, name: Optional[str] = None) -> str:
+        """Rebuild the .hst text of a stored file.
+
+        Entries are serialized like import_() does; the Times tokens are then
+        replaced by the ones stored from the file, so malformed, odd-cased or
+        missing tokens come back exactly as they were.
+
+        :param name: Stored path; may be omitted when the database holds exactly one file.
+        :returns: The .hst text of the stored file.
+        :raises SchemaError: If the file is not stored (or name is ambiguous).
+        """
+        file_id, header, meta = self._file_row(name)
+        svc = get_service_for_header(header)
+        tokens: Dict[Optional[str], List[Optional[str]]] = {}
+
+        def records() -> Iterator[Record]:
+            for cat, rec, time_hex in self._iter_rows(file_id, svc):
+                tokens.setdefault(cat, []).append(time_hex)
+                yield cat, rec
+
+        return _restore_times(svc, svc.import_records(json.loads(meta), records()), tokens)
+
+
+def _restore_times(svc: HistoryFile, text: str, tokens: Dict[Optional[str], List[Optional[str]]]) -> str:
+    """Write the stored Times tokens over the ones import_records() produced.
+
+    A token of None (stored before time_hex existed) keeps the rebuilt token;
+    '' means the file had no token for the entry, which only happens at the
+    end of Times, so the list stops there.
+    """
+    doc = HstDocument(text)
+    edits: List[Edit] = []
+    for cat, sec in svc._patch_groups(doc):
+        stored = tokens.get(cat)
+        sp = doc.span("Times", sec)
+        if not stored or sp is None:
+            continue
+        written = text[sp.value_start:sp.line_end].split()
+        out: List[str] = []
+        for i, token in enumerate(stored):
+            if token == "":
+                break
+            if token is not None:
+                out.append(token)
+            elif i < len(written):
+                out.append(written[i])
+        if out != written:
+            edits.append((sp.value_start, sp.line_end, " ".join(out)))
+    return splice(text, edits) if edits else text
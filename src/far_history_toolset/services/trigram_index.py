@@ -0,0 +1,355 @@
+"""
+Trigram search index over many history files.
+
+TrigramIndex.build() reads every entry of the given .hst files with
+iter_records(iso=False) and records, per entry, its file, category, index,
+FILETIME and text (the service's TEXT_FIELDS joined by newlines). Each
+distinct byte trigram of the casefolded UTF-8 text gets a posting list of
+entry ids.
+
+A posting list is stored either as ascending uint32 entry ids or, when that
+would be larger, as a bitmap of n bits. search() intersects the posting
+lists of the query's trigrams, smallest first (bitmaps are probed per
+candidate, or ANDed as integers when every list is dense), and only then
+checks the surviving candidates' text, so a query never scans all entries
+unless every term is shorter than three bytes.
+
+On-disk layout (little-endian), written by save() and read by load():
+    MAGIC, uint32 header length, JSON header (files, categories, counts)
+    run_start   uint32[r + 1] first entry id of each run of entries sharing file and category
+    run_file    uint32[r]     index into header["files"]
+    run_cat     uint32[r]     0 = none, k = header["categories"][k - 1]
+    run_index   uint32[r]     entry index (within file/category) of the run's first entry
+    entry_time  uint64[n]     FILETIME (0 = unknown)
+    text_offs   uint32[n + 1] offsets into the text blob
+    text_blob   bytes         UTF-8 entry texts
+    tri_keys    uint32[m]     sorted trigrams (b0 << 16 | b1 << 8 | b2)
+    post_count  uint32[m]     entries per trigram
+    post_offs   uint32[m + 1] byte offsets into postings
+    postings    bytes         per trigram: uint32[count] ids if that takes
+                              4 * count bytes, else a ceil(n / 8) byte bitmap
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from far_history_toolset.core.errors import UnknownHeaderError
+from far_history_toolset.core.filetime import filetime_hex_to_int_le
+from far_history_toolset.core.hst_lexer import detect_header
+from far_history_toolset.services.registry import get_service_for_header
+
+MAGIC = b"FHTRIGR2"
+_HEADER_LEN = struct.Struct("<I")
+_NONZERO_RE = re.compile(rb"[^\x00]")
+_BYTE_BITS = [tuple(b for b in range(8) if v >> b & 1) for v in range(256)]
+
+
+class SearchHit(NamedTuple):
+    """One matching entry."""
+    path: str                   # source .hst file
+    header: str                 # e.g. "[SavedHistory]"
+    category: Optional[str]     # dialogs.hst section name, else None
+    index: int                  # entry index (within the category for dialogs.hst)
+    filetime: int               # 0 if unknown
+    text: str                   # TEXT_FIELDS joined by "\n" (commands.hst: dir, then command)
+
+
+def _trigrams(data: bytes) -> set:
+    """Distinct byte trigrams of data as 24-bit ints."""
+    return {data[i] << 16 | data[i + 1] << 8 | data[i + 2] for i in range(len(data) - 2)}
+
+
+def _to_le(a: array) -> bytes:
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _from_le(typecode: str, data: Union[bytes, memoryview]) -> array:
+    a = array(typecode)
+    a.frombytes(data)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+
+def _bitmap_ids(data: bytes) -> Iterator[int]:
+    """Yield the positions of the set bits of a little-endian bitmap."""
+    for m in _NONZERO_RE.finditer(data):
+        base = m.start() * 8
+        for b in _BYTE_BITS[data[m.start()]]:
+            yield base + b
+
+
+def iter_hst_files(paths: Iterable[Union[str, Path]]) -> List[Path]:
+    """Expand files and directories (searched recursively for *.hst) into a sorted file list."""
+    out: List[Path] = []
+    for name in paths:
+        p = Path(name).expanduser()
+        if p.is_dir():
+            out.extend(f for f in sorted(p.rglob("*.hst")) if f.is_file())
+        elif p.is_file():
+            out.append(p)
+        else:
+            raise FileNotFoundError(str(p))
+    return out
+
+
+class TrigramIndex:
+    """In-memory view of a trigram index (built from files or loaded from disk)."""
+
+    def __init__(self) -> None:
+        self.files: List[Dict[str, Any]] = []      # {"path", "header", "size", "mtimeNs"}
+        self.categories: List[str] = []
+        self.run_start = array("I", [0])
+        self.run_file = array("I")
+        self.run_cat = array("I")
+        self.run_index = array("I")
+        self.entry_time = array("Q")
+        self.text_offs = array("I", [0])
+        self.text_blob: Union[bytes, memoryview] = b""
+        self.tri_keys = array("I")
+        self.post_count = array("I")
+        self.post_offs = array("I", [0])
+        self._postings: Union[bytes, memoryview] = b""
+
+    def __len__(self) -> int:
+        return len(self.entry_time)
+
+    def locate(self, entry_id: int) -> tuple:
+        """Return (file dict, category or None, entry index) of an entry id."""
+        r = bisect.bisect_right(self.run_start, entry_id, 0, len(self.run_file)) - 1
+        cat_id = self.run_cat[r]
+        return (
+            self.files[self.run_file[r]],
+            self.categories[cat_id - 1] if cat_id else None,
+            self.run_index[r] + entry_id - self.run_start[r],
+        )
+
+    # ------------------------------ building ------------------------------
+
+    @classmethod
+    def build(cls, paths: Iterable[Union[str, Path]]) -> "TrigramIndex":
+        """Index every entry of the given .hst files/directories.
+
+        :param paths: Files, or directories searched recursively for *.hst.
+        :returns: A new index.
+        :raises FileNotFoundError: If a path does not exist.
+        :raises UnknownHeaderError: If a file has no known header.
+        """
+        idx = cls()
+        cat_ids: Dict[str, int] = {}
+        postings: Dict[int, array] = {}
+        blob = bytearray()
+        for path in iter_hst_files(paths):
+            with path.open("r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            header = detect_header(text)
+            if header is None:
+                raise UnknownHeaderError(f"{path}: header not found")
+            svc = get_service_for_header(header)
+            st = path.stat()
+            file_id = len(idx.files)
+            idx.files.append({"path": str(path), "header": header, "size": st.st_size, "mtimeNs": st.st_mtime_ns})
+            fields = tuple(svc.TEXT_FIELDS)
+            counters: Dict[Optional[str], int] = {}
+            for cat, rec in svc.iter_records(text, iso=False):
+                i = counters.get(cat, 0)
+                counters[cat] = i + 1
+                if cat is None:
+                    cat_id = 0
+                else:
+                    cat_id = cat_ids.get(cat, 0)
+                    if not cat_id:
+                        idx.categories.append(cat)
+                        cat_id = cat_ids[cat] = len(idx.categories)
+                try:
+                    t = filetime_hex_to_int_le(rec.get("timeHex") or "")
+                except ValueError:
+                    t = 0
+                entry_text = "\n".join(rec.get(f) or "" for f in fields)
+                entry_id = len(idx.entry_time)
+                if not idx.run_file or idx.run_file[-1] != file_id or idx.run_cat[-1] != cat_id:
+                    idx.run_start[-1] = entry_id
+                    idx.run_start.append(entry_id)
+                    idx.run_file.append(file_id)
+                    idx.run_cat.append(cat_id)
+                    idx.run_index.append(i)
+                idx.entry_time.append(t)
+                blob += entry_text.encode("utf-8")
+                idx.text_offs.append(len(blob))
+                idx.run_start[-1] = entry_id + 1
+                for tri in _trigrams(entry_text.casefold().encode("utf-8")):
+                    lst = postings.get(tri)
+                    if lst is None:
+                        lst = postings[tri] = array("I")
+                    lst.append(entry_id)
+
+        idx.text_blob = bytes(blob)
+        n = len(idx.entry_time)
+        bitmap_len = (n + 7) // 8
+        out = bytearray()
+        for tri in sorted(postings):
+            ids = postings[tri]
+            idx.tri_keys.append(tri)
+            idx.post_count.append(len(ids))
+            if 4 * len(ids) <= bitmap_len:
+                out += _to_le(ids)
+            else:
+                bitmap = bytearray(bitmap_len)
+                for i in ids:
+                    bitmap[i >> 3] |= 1 << (i & 7)
+                out += bitmap
+            idx.post_offs.append(len(out))
+        idx._postings = bytes(out)
+        return idx
+
+    # ------------------------------ persistence ------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the index to path (atomically replaced)."""
+        header = json.dumps({
+            "files": self.files,
+            "categories": self.categories,
+            "entries": len(self),
+            "runs": len(self.run_file),
+            "trigrams": len(self.tri_keys),
+            "postingBytes": len(self._postings),
+            "textBytes": len(self.text_blob),
+        }, ensure_ascii=False).encode("utf-8")
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LEN.pack(len(header)))
+            f.write(header)
+            for a in (self.run_start, self.run_file, self.run_cat, self.run_index, self.entry_time, self.text_offs):
+                f.write(_to_le(a))
+            f.write(self.text_blob)
+            f.write(_to_le(self.tri_keys))
+            f.write(_to_le(self.post_count))
+            f.write(_to_le(self.post_offs))
+            f.write(self._postings)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TrigramIndex":
+        """Read an index written by save(); postings and texts stay as views of the file bytes.
+
+        :raises ValueError: If the file is not a trigram index.
+        """
+        data = memoryview(Path(path).read_bytes())
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a trigram index")
+        pos = len(MAGIC)
+        (hlen,) = _HEADER_LEN.unpack_from(data, pos)
+        pos += _HEADER_LEN.size
+        header = json.loads(bytes(data[pos:pos + hlen]).decode("utf-8"))
+        pos += hlen
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal pos
+            size = array(typecode).itemsize * count
+            a = _from_le(typecode, data[pos:pos + size])
+            pos += size
+            return a
+
+        idx = cls()
+        n = header["entries"]
+        idx.files = header["files"]
+        idx.categories = header["categories"]
+        r = header["runs"]
+        idx.run_start = take("I", r + 1)
+        idx.run_file = take("I", r)
+        idx.run_cat = take("I", r)
+        idx.run_index = take("I", r)
+        idx.entry_time = take("Q", n)
+        idx.text_offs = take("I", n + 1)
+        idx.text_blob = data[pos:pos + header["textBytes"]]
+        pos += header["textBytes"]
+        idx.tri_keys = take("I", header["trigrams"])
+        idx.post_count = take("I", header["trigrams"])
+        idx.post_offs = take("I", header["trigrams"] + 1)
+        idx._postings = data[pos:pos + header["postingBytes"]]
+        return idx
+
+    # ------------------------------ querying ------------------------------
+
+    def _posting(self, tri: int) -> Optional[Union[array, bytes]]:
+        """Entry ids (array) or bitmap (bytes) for trigram tri, or None if it never occurs."""
+        k = bisect.bisect_left(self.tri_keys, tri)
+        if k == len(self.tri_keys) or self.tri_keys[k] != tri:
+            return None
+        start, end = self.post_offs[k], self.post_offs[k + 1]
+        raw = self._postings[start:end]
+        if end - start == 4 * self.post_count[k]:
+            return _from_le("I", raw)
+        return bytes(raw)
+
+    def text(self, entry_id: int) -> str:
+        """Indexed text of one entry."""
+        return bytes(self.text_blob[self.text_offs[entry_id]:self.text_offs[entry_id + 1]]).decode("utf-8")
+
+    def candidates(self, terms: Sequence[str]) -> Iterable[int]:
+        """Entry ids whose trigrams cover every term (a superset of the matches)."""
+        wanted = set()
+        for term in terms:
+            wanted |= _trigrams(term.casefold().encode("utf-8"))
+        if not wanted:
+            return range(len(self))
+        lists = []
+        for tri in wanted:
+            k = bisect.bisect_left(self.tri_keys, tri)
+            if k == len(self.tri_keys) or self.tri_keys[k] != tri:
+                return ()
+            lists.append((self.post_count[k], tri))
+        lists.sort()
+        postings = [self._posting(tri) for _, tri in lists]
+
+        first = postings[0]
+        if isinstance(first, bytes):
+            # Every list is dense: AND the bitmaps as integers
+            bits = int.from_bytes(first, "little")
+            for bm in postings[1:]:
+                bits &= int.from_bytes(bm, "little")
+            return _bitmap_ids(bits.to_bytes(len(first), "little"))
+        result: Iterable[int] = first
+        for lst in postings[1:]:
+            if isinstance(lst, bytes):
+                result = [i for i in result if lst[i >> 3] >> (i & 7) & 1]
+            else:
+                members = set(lst)
+                result = [i for i in result if i in members]
+            if not result:
+                return ()
+        return result
+
+    def search(self, terms: Sequence[str], ignore_case: bool = False,
+               limit: Optional[int] = None) -> List[SearchHit]:
+        """Entries whose text contains every term.
+
+        :param terms: Substrings that must all occur (in any of the entry's fields).
+        :param ignore_case: Compare casefolded text.
+        :param limit: Stop after this many hits.
+        :returns: Hits in index order (file, then entry order).
+        """
+        needles = [t.casefold() for t in terms] if ignore_case else list(terms)
+        hits: List[SearchHit] = []
+        for entry_id in self.candidates(terms):
+            text = self.text(entry_id)
+            hay = text.casefold() if ignore_case else text
+            if all(t in hay for t in needles):
+                f, category, index = self.locate(entry_id)
+                hits.append(SearchHit(f["path"], f["header"], category, index, self.entry_time[entry_id], text))
+                if limit is not None and len(hits) >= limit:
+                    break
+        return hits
@@ -0,0 +1,106 @@
+"""
+Incremental export of live history files.
+
+HistoryWatcher polls a file or a directory tree of *.hst files. Each poll()
+stats the files (one os.stat per file), re-reads only those whose size or
+mtime changed, and returns just the entries added since the previous poll.
+
+Entries are new when their FILETIME is later than the newest entry seen in
+the same file (and dialog category) before; far2l stamps every added or
+re-used entry with the current time, so this covers both appended and moved
+entries, while entries expired from the head of the list are simply not
+reported. The first poll reports every entry of every file.
+
+Records are decoded with iso="lazy", so timeISO is only computed for the
+entries that are returned.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from far_history_toolset.core.filetime import filetime_hex_to_int_le
+from far_history_toolset.core.hst_lexer import detect_header
+from far_history_toolset.services.registry import get_service_for_header
+
+
+class WatchEvent(NamedTuple):
+    """One new entry of a watched file."""
+    path: str
+    header: str
+    category: Optional[str]     # dialogs.hst section name, else None
+    record: dict                # same shape as export()["History"] entries
+
+
+class _FileState(NamedTuple):
+    size: int
+    mtime_ns: int
+    newest: Dict[Optional[str], int]     # category -> newest FILETIME seen
+
+
+class HistoryWatcher:
+    """Poll .hst files and report entries added since the previous poll."""
+
+    def __init__(self, path: Union[str, Path], iso: bool = True) -> None:
+        self.path = Path(path).expanduser()
+        self.iso = iso
+        self._state: Dict[str, _FileState] = {}
+
+    def _stat_files(self) -> Dict[str, os.stat_result]:
+        """Current *.hst files under the watched path; missing files are skipped."""
+        found: Dict[str, os.stat_result] = {}
+        if self.path.is_dir():
+            candidates = sorted(self.path.rglob("*.hst"))
+        else:
+            candidates = [self.path]
+        for p in candidates:
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            if not p.is_dir():
+                found[str(p)] = st
+        return found
+
+    def poll(self) -> List[WatchEvent]:
+        """Return the entries added to changed files since the last poll, in file order."""
+        events: List[WatchEvent] = []
+        current = self._stat_files()
+        for gone in set(self._state) - set(current):
+            del self._state[gone]
+        for path, st in current.items():
+            prev = self._state.get(path)
+            if prev is not None and (prev.size, prev.mtime_ns) == (st.st_size, st.st_mtime_ns):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                continue
+            header = detect_header(text)
+            if header is None:
+                # Half-written or foreign file: try again when it changes
+                self._state[path] = _FileState(st.st_size, st.st_mtime_ns, prev.newest if prev else {})
+                continue
+            newest, new_events = self._new_entries(path, header, text, prev.newest if prev else None)
+            self._state[path] = _FileState(st.st_size, st.st_mtime_ns, newest)
+            events.extend(new_events)
+        return events
+
+    def _new_entries(
+        self, path: str, header: str, text: str, seen: Optional[Dict[Optional[str], int]]
+    ) -> Tuple[Dict[Optional[str], int], List[WatchEvent]]:
+        svc = get_service_for_header(header)
+        newest: Dict[Optional[str], int] = dict(seen or {})
+        events: List[WatchEvent] = []
+        for cat, rec in svc.iter_records(text, iso="lazy" if self.iso else False):
+            try:
+                t = filetime_hex_to_int_le(rec.get("timeHex") or "")
+            except ValueError:
+                t = 0
+            if seen is None or t > seen.get(cat, -1):
+                events.append(WatchEvent(path, header, cat, rec))
+            if t > newest.get(cat, -1):
+                newest[cat] = t
+        return newest, events
@@ -6,3 +6,6 @@ ROOT = Path(__file__).resolve().parents[2]  # repo root
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+# benchmarks/ is a top-level package of the checkout
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
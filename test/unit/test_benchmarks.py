@@ -0,0 +1,85 @@
+"""Unit tests for the benchmark generator and runner (tiny sizes only)."""
+import re
+
+import pytest
+
+from benchmarks.compare import compare_results, parse_budgets
+from benchmarks.generator import _CHUNK, KINDS, dialog_categories, generate_hst, write_hst
+from benchmarks.runner import run_benchmarks
+from far_history_toolset.core.hst_lexer import detect_header
+from far_history_toolset.services import get_service_for_header
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_generated_files_parse_to_n_entries(kind):
+    text = generate_hst(kind, 3000, seed=7)
+    assert text == generate_hst(kind, 3000, seed=7)
+    assert text != generate_hst(kind, 3000, seed=8)
+    svc = get_service_for_header(detect_header(text))
+    records = list(svc.iter_records(text, iso=False))
+    assert len(records) == 3000
+    times = [r["timeHex"] for _, r in records]
+    assert all(len(t) == 16 for t in times)
+    if kind == "dialogs":
+        assert len({cat for cat, _ in records}) == dialog_categories(3000)
+    # The slow decoder paths are exercised: nested and real-newline separators, unicode
+    assert "\\\\n" in text
+    assert any(not re.match(r"[A-Za-z0-9_]+=|\[|$", line) for line in text.split("\n"))
+    assert any(ord(ch) > 127 for ch in text)
+
+
+@pytest.mark.parametrize("kind", ["commands", "folders"])
+def test_times_column_spans_chunks(kind):
+    n = _CHUNK * 2 + 5
+    text = generate_hst(kind, n, seed=1)
+    tokens = re.search(r"^Times=(.*)$", text, re.M).group(1).split(" ")
+    assert len(tokens) == n
+    assert {len(t) for t in tokens} == {16}
+
+
+def test_write_hst_matches_generate(tmp_path):
+    path = tmp_path / "view.hst"
+    size = write_hst(path, "view", 500)
+    assert path.read_text(encoding="utf-8") == generate_hst("view", 500)
+    assert size == path.stat().st_size
+
+
+def test_run_benchmarks_reports_throughput_and_memory(tmp_path):
+    data = run_benchmarks(kinds=["commands"], sizes=[50], repeat=2, warmup=0, workdir=tmp_path)
+    by_id = {r["id"]: r for r in data["results"]}
+    assert set(by_id) == {
+        "detect_header(commands)/50", "CommandsHistory.export/50",
+        "CommandsHistory.import_/50", "cli export(commands)/50",
+    }
+    export = by_id["CommandsHistory.export/50"]
+    assert len(export["samples"]) == 2 and export["seconds"] == min(export["samples"])
+    assert export["entriesPerSec"] > 0 and export["peakBytes"] > 0
+    assert export["memory"] == "tracemalloc"
+
+
+def _result(sid, samples):
+    samples = sorted(samples)
+    return {"id": sid, "seconds": samples[0], "median": samples[len(samples) // 2], "samples": samples}
+
+
+def test_compare_results_flags_only_consistent_slowdowns():
+    baseline = {"results": [
+        _result("A.export/1000", [1.00, 1.01, 1.02]),
+        _result("B.export/1000", [1.00, 1.01, 1.02]),
+        _result("C.export/1000", [1.00, 1.01, 1.02]),
+        _result("D.export/1000", [1.00, 1.01, 1.02]),
+    ]}
+    current = {"results": [
+        _result("A.export/1000", [1.20, 1.21, 1.22]),    # every sample 20% slower
+        _result("B.export/1000", [1.00, 1.30, 1.40]),    # fastest unchanged: noise
+        _result("C.export/1000", [1.08, 1.09, 1.10]),    # within budget
+    ]}
+    comparisons, missing = compare_results(baseline, current, budget=0.10,
+                                           budgets=parse_budgets(["C.export/1000=5"]))
+    assert [(c.id, c.regressed) for c in comparisons] == [
+        ("A.export/1000", True), ("B.export/1000", False), ("C.export/1000", True),
+    ]
+    assert round(comparisons[0].change, 2) == 0.20
+    assert missing == ["D.export/1000"]
+    with pytest.raises(ValueError):
+        parse_budgets(["10"])
@@ -0,0 +1,77 @@
+"""Unit tests for the persistent ParseCache and export_file() through it."""
+import os
+
+from far_history_toolset.core.cache import ParseCache
+from far_history_toolset.services import export_file
+
+SAMPLE = (
+    "[SavedFolderHistory]\n"
+    'HistoryCount=2\nLines="/a\\n/b"\nLocks=00\nPosition=1\n'
+    "Times=0028c8515035dc01 80be60525035dc01\nTypes=01\n"
+)
+
+
+def test_load_hits_until_content_changes(tmp_path):
+    src = tmp_path / "folders.hst"
+    src.write_text(SAMPLE, encoding="utf-8")
+    cache = ParseCache(tmp_path / "cache")
+    calls = []
+
+    def compute(data):
+        calls.append(data)
+        return len(data)
+
+    assert cache.load(src, "v", compute) == len(SAMPLE)
+    assert cache.load(src, "v", compute) == len(SAMPLE)
+    assert len(calls) == 1
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+    # Same size and mtime, different content: must not hit
+    st = src.stat()
+    src.write_text(SAMPLE.replace("/a", "/z"), encoding="utf-8")
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns))
+    cache.load(src, "v", compute)
+    assert len(calls) == 2
+
+    # Variants are cached separately
+    cache.load(src, "other", compute)
+    assert len(calls) == 3
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    src = tmp_path / "folders.hst"
+    src.write_text(SAMPLE, encoding="utf-8")
+    cache = ParseCache(tmp_path / "cache")
+    cache.load(src, "v", lambda data: "first")
+    for entry in (tmp_path / "cache").iterdir():
+        entry.write_bytes(b"not a pickle")
+    assert cache.load(src, "v", lambda data: "second") == "second"
+    assert cache.stats["misses"] == 2
+
+
+def test_lru_eviction(tmp_path):
+    cache = ParseCache(tmp_path / "cache", max_bytes=10_000)
+    blob = b"x" * 4000
+    for key in ("a", "b"):
+        cache.put(key, blob)
+    os.utime(cache.directory / "a.pkl", ns=(0, 0))
+    os.utime(cache.directory / "b.pkl", ns=(1, 1))
+    assert cache.get("a")[0]          # touching "a" makes "b" the oldest
+    cache.put("c", blob)
+    assert cache.stats["evictions"] == 1
+    assert cache.get("b") == (False, None)
+    assert cache.get("a")[0] and cache.get("c")[0]
+    assert cache.usage()[0] == 2
+    cache.clear()
+    assert cache.usage() == (0, 0)
+
+
+def test_export_file_matches_uncached(tmp_path):
+    src = tmp_path / "folders.hst"
+    src.write_bytes(SAMPLE.replace("\n", "\r\n").encode("utf-8"))
+    cache = ParseCache(tmp_path / "cache")
+    plain = export_file(src)
+    assert export_file(src, cache=cache) == plain
+    assert export_file(src, cache=cache) == plain
+    assert cache.stats == {"hits": 1, "misses": 1, "stores": 1, "evictions": 0}
+    assert [r["path"] for r in plain["History"]] == ["/a", "/b"]
@@ -1,15 +1,23 @@
 """Unit tests for FILETIME conversion helpers.
 
-Verifies hex roundtrip, ISO conversions, and monotonicity of now_filetime_int.
+Verifies hex roundtrip, ISO conversions, column decoding, and monotonicity of
+now_filetime_int.
 Expected: conversions retain value and timestamps are reasonable.
 """
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from far_history_toolset.core.filetime import (
     FILETIME_EPOCH,
+    FiletimeCacheInfo,
     filetime_hex_to_int_le,
     filetime_int_to_hex_le,
     filetime_int_to_iso,
+    filetime_hex_column_to_ints,
+    filetime_hex_column_to_iso,
+    filetime_ints_to_iso,
+    filetime_cache_info,
+    filetime_cache_clear,
     iso_to_filetime_int,
     now_filetime_int,
 )
@@ -33,3 +41,49 @@ def test_now_filetime_increases():
     assert b >= a
     # sanity: FILETIME > epoch baseline
     assert a > FILETIME_EPOCH
+
+def test_hex_column_to_ints():
+    values = [0, 1, 133000000000000000, 2 ** 64 - 1]
+    times = " ".join(filetime_int_to_hex_le(v) for v in values)
+    assert list(filetime_hex_column_to_ints(times)) == values
+    # Irregular tokens use the per-token path; garbage decodes to 0
+    assert list(filetime_hex_column_to_ints(["ff", "zz", "0028c8515035dc01"])) == [
+        filetime_hex_to_int_le("ff"), 0, filetime_hex_to_int_le("0028c8515035dc01"),
+    ]
+
+def test_hex_column_to_iso_matches_per_token():
+    base = iso_to_filetime_int("2025-10-04T17:00:00+00:00")
+    values = [base, base + 5, base + 1_234_567, base + 1_234_567, base + 10_000_000, 2 ** 64 - 1]
+    tokens = [filetime_int_to_hex_le(v) for v in values] + ["nothex!!nothex!!"]
+    expected = [filetime_int_to_iso(v) for v in values[:-1]] + [None, None]
+    assert filetime_hex_column_to_iso(" ".join(tokens)) == expected
+    assert filetime_ints_to_iso(values[:-1]) == expected[:-2]
+
+def test_iso_cache_matches_datetime_and_counts_hits():
+    filetime_cache_clear()
+    base = iso_to_filetime_int("2025-10-04T17:00:00+00:00")
+    values = [base + 3, base + 1_234_565, base + 10_000_000, base + 3]
+    for v in values:
+        secs = (v - FILETIME_EPOCH) / 10_000_000
+        assert filetime_int_to_iso(v) == datetime.datetime.fromtimestamp(secs, datetime.timezone.utc).isoformat()
+    info = filetime_cache_info()
+    assert info["int_to_iso"].hits == 1 and info["int_to_iso"].misses == 3
+    # second value reuses the first value's whole-second prefix
+    assert info["second_prefix"].hits == 1 and info["second_prefix"].misses == 2
+    filetime_hex_to_int_le("0028c8515035dc01")
+    filetime_hex_to_int_le("0028c8515035dc01")
+    assert filetime_cache_info()["hex_to_int"].hits == 1
+    filetime_cache_clear()
+    assert filetime_cache_info()["int_to_iso"].currsize == 0
+
+def test_column_iso_is_thread_safe_and_counted():
+    filetime_cache_clear()
+    base = iso_to_filetime_int("2025-10-04T17:00:00+00:00")
+    batches = [[base + k * 7_000_000 + i for k in range(2000)] for i in range(8)]
+    expected = [[filetime_int_to_iso(v) for v in b] for b in batches]
+    filetime_cache_clear()
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(filetime_ints_to_iso, batches)) == expected
+    info = filetime_cache_info()["second_prefix"]
+    assert isinstance(info, FiletimeCacheInfo)
+    assert info.hits + info.misses == 8 * 2000
@@ -1,9 +1,18 @@
 """Unit tests for lightweight .hst lexer helpers.
 
-Covers quoted block extraction, simple pairs, and header detection.
+Covers quoted block extraction, simple pairs, the single-pass key index,
+and header detection.
 Expected: functions correctly parse and remove keys while returning remainders.
 """
-from far_history_toolset.core.hst_lexer import extract_quoted_block, extract_simple_pair, detect_header
+from far_history_toolset.core.hst_lexer import (
+    HstDocument,
+    scan_keys,
+    extract_quoted_block,
+    extract_simple_pair,
+    detect_header,
+    read_header,
+)
+import io
 
 def test_extract_quoted_block_with_trailing_quote_and_newline():
     """It should extract Extras quoted value and remove it from the remainder."""
@@ -30,3 +39,52 @@ def test_detect_header_variants():
     assert detect_header("[SavedHistory]\n") == "[SavedHistory]"
     assert detect_header("  [SavedDialogHistory]\n") == "[SavedDialogHistory]"
     assert detect_header("x") is None
+    assert detect_header("[SavedDialogHistory/Copy]\n") is None
+
+def test_read_header_looks_at_prefix_only_and_restores_position():
+    text = "[SavedFolderHistory]\nLines=\"" + "x" * 10000 + "\"\n"
+    fp = io.StringIO(text)
+    assert read_header(fp, max_bytes=64) == "[SavedFolderHistory]"
+    assert fp.tell() == 0
+    raw = io.BytesIO(("\n" * 10 + "[SavedViewHistory]\n").encode("utf-8"))
+    raw.seek(5)
+    assert read_header(raw) == "[SavedViewHistory]"
+    assert raw.tell() == 5
+    # Header beyond the prefix, or cut off by it, is not found
+    assert read_header(io.StringIO("\n" * 100 + "[SavedHistory]\n"), max_bytes=50) is None
+    assert read_header(io.StringIO("[SavedHistory]\nLines=...\n"), max_bytes=14) is None
+
+def test_scan_keys_indexes_sections_and_spans():
+    text = (
+        "[SavedDialogHistory]\n"
+        "HistoryCount=2\n\n"
+        "[SavedDialogHistory/Copy]\n"
+        'Lines="/a\\n/b"\n'
+        "Locks=\n"
+        "Position=-1\n"
+    )
+    sections = scan_keys(text)
+    assert [s.name for s in sections] == ["SavedDialogHistory", "SavedDialogHistory/Copy"]
+    assert list(sections[1].keys) == ["Lines", "Locks", "Position"]
+    span = sections[1].keys["Position"]
+    assert text[span.value_start:span.line_end] == "-1"
+    assert sections[0].end == sections[1].start
+
+
+def test_document_matches_extract_helpers():
+    """HstDocument values must equal what the remainder-based helpers return."""
+    text = (
+        '[SavedHistory]\n'
+        'Extras="/a/b\\n/c/d"\n'
+        'HistoryCount=2\n'
+        'Lines="say "hi"\\ncmd2"\n'
+        'Locks=\n'
+        'Position=-1\n'
+        'Times=aa bb\n'
+    )
+    doc = HstDocument(text)
+    for key in ("Extras", "Lines"):
+        assert doc.quoted(key) == extract_quoted_block(text, key)[0]
+    for key in ("HistoryCount", "Locks", "Position", "Times", "Missing"):
+        assert doc.simple(key) == extract_simple_pair(text, key)[0]
+    assert doc.quoted("Lines") == r'say "hi"\ncmd2'
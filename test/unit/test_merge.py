@@ -0,0 +1,96 @@
+"""Unit tests for the k-way merge of history files."""
+import pytest
+
+from far_history_toolset.core.filetime import filetime_int_to_hex_le
+from far_history_toolset.services.commands import CommandsHistory
+from far_history_toolset.services.dialogs import DialogsHistory
+from far_history_toolset.services.folders import FoldersHistory
+from far_history_toolset.services.merge import merge_histories
+
+
+def _times(*ts):
+    return " ".join(filetime_int_to_hex_le(134040708000000000 + t) for t in ts)
+
+
+def _commands(entries):
+    dirs = "\\n".join(d for d, _, _ in entries)
+    cmds = "\\n".join(c for _, c, _ in entries)
+    return (f'[SavedHistory]\nExtras="{dirs}"\nHistoryCount={len(entries)}\nLines="{cmds}"\n'
+            f"Locks=\nPosition=0\nTimes={_times(*(t for _, _, t in entries))}\n")
+
+
+def _folders(entries, locks):
+    paths = "\\n".join(p for p, _ in entries)
+    return (f'[SavedFolderHistory]\nHistoryCount={len(entries)}\nLines="{paths}"\nLocks={locks}\n'
+            f"Position=0\nTimes={_times(*(t for _, t in entries))}\nTypes={'0' * len(entries)}\n")
+
+
+def _lines(svc, text):
+    return [(cat, rec[svc.LINE_FIELD]) for cat, rec in svc.iter_records(text, iso=False)]
+
+
+def test_merge_orders_by_time_and_keeps_newest_duplicate():
+    a = _commands([("/a", "make", 10), ("/a", "ls", 30), ("/b", "git pull", 50)])
+    b = _commands([("/a", "make", 20), ("/c", "top", 40), ("/a", "ls", 60)])
+    result = merge_histories([a, b])
+    svc = CommandsHistory()
+    recs = [rec for _, rec in svc.iter_records(result.text, iso=False)]
+    assert [(r["dir"], r["command"]) for r in recs] == [("/a", "make"), ("/c", "top"), ("/b", "git pull"), ("/a", "ls")]
+    assert recs[0]["timeHex"] == filetime_int_to_hex_le(134040708000000020)
+    assert (result.entries_in, result.entries_out) == (6, 4)
+    assert svc.export(result.text)["Position"] == -1
+
+    no_dedup = merge_histories([a, b], dedup=False)
+    assert no_dedup.entries_out == 6
+    # Same command in another directory is not a duplicate
+    c = _commands([("/z", "make", 70)])
+    assert merge_histories([a, c]).entries_out == 4
+
+
+def test_merge_limit_and_locks():
+    a = _folders([("/a", 1), ("/b", 3)], locks="10")
+    b = _folders([("/c", 2), ("/d", 4)], locks="01")
+    svc = FoldersHistory()
+    merged = merge_histories([a, b])
+    assert _lines(svc, merged.text) == [(None, "/a"), (None, "/c"), (None, "/b"), (None, "/d")]
+    assert svc.export(merged.text)["Locks"] == "1001"
+
+    newest = merge_histories([a, b], limit=2)
+    assert _lines(svc, newest.text) == [(None, "/b"), (None, "/d")]
+    assert svc.export(newest.text)["Locks"] == "01"
+
+    # Locks not aligned in one input: flags are dropped rather than misassigned
+    assert svc.export(merge_histories([a, _folders([("/e", 5)], locks="")]).text)["Locks"] == ""
+
+
+def test_merge_dialog_categories():
+    a = ("[SavedDialogHistory]\nHistoryCount=2\n\n"
+         f'[SavedDialogHistory/Copy]\nLines="/x\\n/y"\nLocks=\nPosition=-1\nTimes={_times(1, 5)}\n')
+    b = ("[SavedDialogHistory]\nHistoryCount=2\n\n"
+         f'[SavedDialogHistory/Find]\nLines="foo"\nLocks=\nPosition=-1\nTimes={_times(2)}\n\n'
+         f'[SavedDialogHistory/Copy]\nLines="/x"\nLocks=\nPosition=-1\nTimes={_times(3)}\n')
+    svc = DialogsHistory()
+    result = merge_histories([a, b], limit=1)
+    assert sorted(_lines(svc, result.text)) == [("Copy", "/y"), ("Find", "foo")]
+    assert [c["name"] for c in svc.export(result.text)["Categories"]] == ["Copy", "Find"]
+
+
+def test_merge_rejects_mixed_headers():
+    with pytest.raises(ValueError):
+        merge_histories([_commands([("/a", "ls", 1)]), _folders([("/a", 1)], locks="")])
+    with pytest.raises(ValueError):
+        merge_histories([])
+
+
+def test_merge_skips_extras_past_end_of_lines():
+    a = ('[SavedHistory]\nExtras="/a\\n/b\\n/extra"\nHistoryCount=2\nLines="make\\nls"\n'
+         f"Locks=\nPosition=0\nTimes={_times(10, 30)}\n")
+    b = _commands([("/c", "top", 20)])
+    result = merge_histories([a, b])
+    recs = [rec for _, rec in CommandsHistory().iter_records(result.text, iso=False)]
+    assert [(r["dir"], r["command"], r["timeHex"]) for r in recs] == [
+        ("/a", "make", filetime_int_to_hex_le(134040708000000010)),
+        ("/c", "top", filetime_int_to_hex_le(134040708000000020)),
+        ("/b", "ls", filetime_int_to_hex_le(134040708000000030)),
+    ]
+    assert (result.entries_in, result.entries_out) == (3, 3)
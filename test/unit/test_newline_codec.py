@@ -3,7 +3,39 @@
 Ensures that encoded literal backslash-n sequences are normalized correctly.
 Expected: splitting and joining behave predictably.
 """
-from far_history_toolset.core.newline_codec import smart_split_multiline, encode_literal_backslash_n
+import random
+
+import pytest
+
+from far_history_toolset.core import newline_codec
+from far_history_toolset.core.newline_codec import (
+    smart_split_multiline,
+    iter_split_multiline,
+    encode_literal_backslash_n,
+    iter_item_spans,
+)
+
+
+def _reference_split(value):
+    """The original fixpoint decoder, kept as the specification."""
+    if not value:
+        return []
+    s = value.replace("\r\n", "\n").replace("\r", "\n")
+    prev = None
+    while prev != s:
+        prev = s
+        s = s.replace("\\\\n", "\\n")
+    s = s.replace("\\n", "\n")
+    return [x for x in s.split("\n") if x != ""]
+
+
+def _reference_split_positional(value):
+    """Positional items: every separator token ends one item; trailing empties dropped."""
+    items = newline_codec._ITEM_SEP_RE.split(value)
+    while items and items[-1] == "":
+        items.pop()
+    return items
+
 
 def test_smart_split_basic():
     """A simple '\\n'-encoded list should split into three items."""
@@ -19,3 +51,42 @@ def test_encode_literal_backslash_n():
     items = ["one", "two", "three"]
     s = encode_literal_backslash_n(items)
     assert s == r"one\ntwo\nthree"
+
+def test_keep_empty_items_are_positional():
+    assert smart_split_multiline(r"\n/src\n\n", keep_empty=True) == ["", "/src"]
+    assert smart_split_multiline(r"a\n\nb", keep_empty=True) == ["a", "", "b"]
+    assert encode_literal_backslash_n(["", "b", ""]) == r"\nb\n"
+
+def test_iter_item_spans_offsets():
+    text = 'Lines="a\\n\\nbb\\\\ncc"'
+    start, end = text.index('"') + 1, len(text) - 1
+    assert [text[a:b] for a, b in iter_item_spans(text, start, end)] == smart_split_multiline(text[start:end])
+
+@pytest.mark.parametrize("chunk", [3, 7, 1 << 16])
+def test_single_pass_decoders_match_reference(monkeypatch, chunk):
+    monkeypatch.setattr(newline_codec, "_STREAM_CHUNK", chunk)
+    rng = random.Random(chunk)
+    alphabet = ["a", "n", "\\", "\\n", "\\\\n", "\\\\\\", "\n", "\r", "é"]
+    for _ in range(2000):
+        value = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        expected = _reference_split(value)
+        assert smart_split_multiline(value) == expected, value
+        assert list(iter_split_multiline(value)) == expected, value
+        assert [value[a:b] for a, b in iter_item_spans(value)] == expected, value
+        positional = _reference_split_positional(value)
+        assert smart_split_multiline(value, keep_empty=True) == positional, value
+        assert list(iter_split_multiline(value, keep_empty=True)) == positional, value
+        assert [value[a:b] for a, b in iter_item_spans(value, keep_empty=True)] == positional, value
+        assert [x for x in positional if x] == expected
+
+def test_deep_nesting_is_linear():
+    # The fixpoint loop needed one full copy per nesting level here
+    value = "a" + "\\" * 200_000 + "nb" + "\\" * 200_000 + "x"
+    assert smart_split_multiline(value) == ["a", "b" + "\\" * 200_000 + "x"]
+    assert list(iter_split_multiline(value)) == ["a", "b" + "\\" * 200_000 + "x"]
+
+def test_encode_into_shared_buffer():
+    out = ['Lines="']
+    s = encode_literal_backslash_n(["one", "two\nlines", ""], out)
+    assert s == "\\n".join(["one", "two", "lines", ""]) == r"one\ntwo\nlines\n"
+    assert out == ['Lines="', s]
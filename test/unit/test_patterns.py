@@ -0,0 +1,95 @@
+"""Unit tests for PatternSet and multi-pattern redaction.
+
+Covers pattern-file parsing, attribution of matches to patterns, and redact()
+in mask and drop mode. Expected: every match is attributed to the pattern an
+individual search would report, and redaction only touches matching entries.
+"""
+import re
+
+import pytest
+
+from far_history_toolset.core.patterns import PatternSet
+from far_history_toolset.services.commands import CommandsHistory
+from far_history_toolset.services.dialogs import DialogsHistory
+from far_history_toolset.services.redact import redact
+
+CMDS = (
+    "[SavedHistory]\n"
+    'Extras="/home/alice/acme\\n/tmp\\n/srv"\n'
+    "HistoryCount=3\n"
+    'Lines="ssh db1.acme.internal\\nls\\nexport TOKEN=abc123"\n'
+    "Locks=\n"
+    "Position=-1\n"
+    "Times=0028c8515035dc01 80be60525035dc01 0055f9525035dc01\n"
+)
+
+def test_from_lines_parses_prefixes_and_comments():
+    ps = PatternSet.from_lines(["# comment", "", "lit:a.b", "re:x+", "y?z"])
+    assert ps.names == ["x+", "y?z", "a.b"]
+
+def test_matches_are_attributed_like_single_searches():
+    regexes = [r"(?i)token=\S+", r"(a)(b)c", r"\d{3}"]
+    literals = ["prod.example.com", "prod", "secret"]
+    ps = PatternSet(regexes, literals)
+    text = "TOKEN=xyz abc 123 prod.example.com prod secretive"
+    found = [(ps.names[pid], m.group()) for pid, m in ps.finditer(text)]
+    assert found == [
+        (r"(?i)token=\S+", "TOKEN=xyz"), (r"(a)(b)c", "abc"), (r"\d{3}", "123"),
+        ("prod.example.com", "prod.example.com"), ("prod", "prod"), ("secret", "secret"),
+    ]
+    for name, matched in found:
+        single = re.escape(name) if name in literals else name
+        assert re.fullmatch(single, matched)
+
+def test_literal_trie_prefers_longest_and_ignores_case():
+    ps = PatternSet(literals=["ab", "abc", "b"], ignore_case=True)
+    hits = [0, 0, 0]
+    assert ps.sub("ABC ab b", "#", hits) == "# # #"
+    assert hits == [1, 1, 1]
+    with pytest.raises(ValueError):
+        PatternSet(["("])
+
+def test_literal_ids_follow_unicode_case_rules():
+    # re matches these case-insensitively although str.lower() differs
+    ps = PatternSet(["z"], ["\u017f", "\u00df", "\u0130"], ignore_case=True)
+    assert [(pid, m.group()) for pid, m in ps.finditer("x S \u1e9e i")] == [(1, "S"), (2, "\u1e9e"), (3, "i")]
+
+def test_groups_backreferences_and_names_stay_per_pattern():
+    ps = PatternSet(["(x)y", r"(a)\1", r"(?P<q>['\"]).*?(?P=q)", r"(?P<q>\d)(?(q)z)", r"(?x) b+ # comment"])
+    assert ps.search("aa") == 1
+    assert ps.search("say 'hi'") == 2
+    assert ps.search("1z") == 3
+    assert ps.search("bbb") == 4
+    assert ps.search("ay") is None
+    # Numbered references beyond group 99 of the combined regex still work
+    many = PatternSet([f"(x{i})(y)\\2" for i in range(60)] + [r"(k)\1"])
+    assert many.search("kk") == 60
+    assert [pid for pid, _ in many.finditer("x7yy x59yy")] == [7, 59]
+
+def test_redact_masks_only_matching_fields():
+    svc = CommandsHistory()
+    ps = PatternSet([r"TOKEN=\S+"], ["acme"])
+    out, report = redact(svc, CMDS, ps)
+    hist = svc.export(out)["History"]
+    assert [r["dir"] for r in hist] == ["/home/alice/[REDACTED]", "/tmp", "/srv"]
+    assert [r["command"] for r in hist] == ["ssh db1.[REDACTED].internal", "ls", "export [REDACTED]"]
+    assert (report.entries, report.matched, report.dropped) == (3, 2, 0)
+    assert dict(report.top_hits()) == {"acme": 2, r"TOKEN=\S+": 1}
+
+def test_redact_drop_mode_per_category():
+    svc = DialogsHistory()
+    text = (
+        "[SavedDialogHistory]\nHistoryCount=3\n\n"
+        "[SavedDialogHistory/Copy]\n"
+        'Lines="/mnt/acme\\n/tmp"\n'
+        "Locks=\nPosition=-1\n"
+        "Times=0028c8515035dc01 80be60525035dc01\n\n"
+        "[SavedDialogHistory/Find]\n"
+        'Lines="acme"\n'
+        "Locks=\nPosition=-1\n"
+        "Times=0055f9525035dc01\n\n"
+    )
+    out, report = redact(svc, text, PatternSet(literals=["acme"]), drop=True)
+    assert [(c, r["line"]) for c, r in svc.iter_records(out)] == [("Copy", "/tmp")]
+    assert report.dropped == 2
+    assert "HistoryCount=1\n" in out
@@ -0,0 +1,86 @@
+"""Unit tests for export phase hooks and PhaseProfiler."""
+from far_history_toolset.services.commands import CommandsHistory
+from far_history_toolset.services.dialogs import DialogsHistory
+from far_history_toolset.services.profiling import PhaseHooks, PhaseProfiler
+
+COMMANDS = (
+    "[SavedHistory]\n"
+    'Extras="/src\\n/tmp"\nHistoryCount=2\nLines="make\\nls -la"\n'
+    "Locks=00\nPosition=1\nTimes=0028c8515035dc01 80be60525035dc01\n"
+)
+
+DIALOGS = (
+    "[SavedDialogHistory]\nHistoryCount=3\n\n"
+    '[SavedDialogHistory/Copy]\nLines="/a\\n/b"\nLocks=00\nPosition=-1\nTimes=0028c8515035dc01 80be60525035dc01\n\n'
+    '[SavedDialogHistory/Find]\nLines="*.py"\nLocks=0\nPosition=-1\nTimes=0028c8515035dc01\n'
+)
+
+
+class Recorder(PhaseHooks):
+    def __init__(self):
+        self.calls = []
+
+    def phase_start(self, phase):
+        self.calls.append(("start", phase))
+
+    def phase_end(self, phase, entries):
+        self.calls.append(("end", phase, entries))
+
+
+def test_hooks_see_sequential_phases_with_counts_and_same_result():
+    svc = CommandsHistory()
+    plain = svc.export(COMMANDS)
+    svc.hooks = rec = Recorder()
+    assert svc.export(COMMANDS) == plain
+    assert rec.calls == [
+        ("start", "lex"), ("end", "lex", 6),
+        ("start", "split"), ("end", "split", 2),
+        ("start", "split"), ("end", "split", 2),
+        ("start", "times"), ("end", "times", 2),
+        ("start", "build"), ("end", "build", 2),
+    ]
+
+
+def test_dialogs_report_phases_per_category():
+    svc = DialogsHistory()
+    plain = svc.export(DIALOGS, iso=False)
+    svc.hooks = rec = Recorder()
+    assert svc.export(DIALOGS, iso=False) == plain
+    builds = [c[2] for c in rec.calls if c[:2] == ("end", "build")]
+    assert builds == [2, 1]
+
+
+def test_profiler_accumulates_phases_and_memory_peaks():
+    svc = DialogsHistory()
+    with PhaseProfiler(memory=True) as prof:
+        svc.hooks = prof
+        with prof.phase("read"):
+            text = DIALOGS
+        svc.export(text)
+    stats = {s.name: s for s in prof.report()}
+    assert list(stats) == ["read", "lex", "split", "times", "build"]
+    assert (stats["split"].calls, stats["split"].entries) == (2, 3)
+    assert all(s.peak_bytes is not None and s.peak_bytes >= 0 for s in stats.values())
+    assert prof.total >= sum(s.seconds for s in stats.values())
+
+    report = prof.format_report()
+    assert report.splitlines()[0].split() == ["phase", "calls", "seconds", "share", "entries", "entries/s", "peak", "MB"]
+    assert "(other)" in report and report.splitlines()[-1].startswith("total")
+
+
+def test_profiler_without_memory_reports_no_peaks():
+    with PhaseProfiler() as prof:
+        with prof.phase("json.dump", entries=5):
+            pass
+    (stats,) = prof.report()
+    assert (stats.calls, stats.entries, stats.peak_bytes) == (1, 5, None)
+    assert stats.as_dict()["phase"] == "json.dump"
+
+
+def test_profiler_memory_needs_reset_peak(monkeypatch):
+    # Python 3.8 has no tracemalloc.reset_peak(): peaks stay empty instead of failing
+    monkeypatch.setattr("far_history_toolset.services.profiling._reset_peak", None)
+    with PhaseProfiler(memory=True) as prof:
+        with prof.phase("read"):
+            pass
+    assert prof.report()[0].peak_bytes is None
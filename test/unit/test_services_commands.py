@@ -3,7 +3,12 @@
 Covers export structure and import roundtrip. Expected: parsed dict matches
 fields and roundtrip reproduces identical text.
 """
-from far_history_toolset.services.commands import CommandsHistory
+import io
+import json
+
+from far_history_toolset.core.filetime import filetime_hex_to_int_le
+
+from far_history_toolset.services.commands import CommandsHistory, append_command
 
 # FILETIME hex for 2025-10-04T17:00:00..+0/1/2s
 HX0 = "0028c8515035dc01"
@@ -42,3 +47,124 @@ def test_import_roundtrip():
     data = svc.export(hst)
     rebuilt = svc.import_(data)
     assert rebuilt == hst
+
+def test_iter_records_matches_export():
+    svc = CommandsHistory()
+    hst = _mock_hst()
+    streamed = list(svc.iter_records(io.StringIO(hst)))
+    assert all(cat is None for cat, _ in streamed)
+    assert [rec for _, rec in streamed] == svc.export(hst)["History"]
+
+def test_export_meta_and_import_records_roundtrip():
+    svc = CommandsHistory()
+    hst = _mock_hst()
+    meta = svc.export_meta(hst)
+    assert "History" not in meta
+    assert meta["_meta"]["historyCount"] == 3
+    assert svc.import_records(meta, svc.iter_records(hst)) == hst
+
+def test_export_iso_modes():
+    svc = CommandsHistory()
+    hst = _mock_hst()
+    eager = svc.export(hst)
+    lazy = svc.export(hst, iso="lazy")
+    assert "timeISO" not in dict.keys(lazy["History"][0])
+    assert lazy["History"][1]["timeISO"] == eager["History"][1]["timeISO"]
+    assert json.dumps(lazy) == json.dumps(eager)
+    assert json.dumps(lazy, indent=2) == json.dumps(eager, indent=2)
+    bare = svc.export(hst, iso=False)
+    assert all("timeISO" not in rec for rec in bare["History"])
+    assert svc.import_(bare) == hst
+
+def test_append_matches_full_rewrite():
+    svc = CommandsHistory()
+    hst = _mock_hst()
+    out = svc.append(hst, "/tmp", "ls -la", filetime_hex_to_int_le(HX2))
+    data = svc.export(hst)
+    data["History"].append({"dir": "/tmp", "command": "ls -la", "timeHex": HX2})
+    assert out == svc.import_(data)
+    assert svc.export(out)["_meta"]["historyCount"] == 4
+
+def test_append_keeps_crlf_and_locks_aligned():
+    svc = CommandsHistory()
+    hst = _mock_hst().replace("Locks=", "Locks=010").replace("\n", "\r\n")
+    out = svc.append(hst, "", "make", filetime_hex_to_int_le(HX0))
+    assert out.count("\r\n") == hst.count("\r\n")
+    assert "HistoryCount=4\r\n" in out
+    assert "Locks=0100\r\n" in out
+    assert out.endswith(f"{HX2} {HX0}\r\n")
+    last = svc.export(out)["History"][-1]
+    assert (last["dir"], last["command"]) == ("", "make")
+
+def test_append_falls_back_when_misaligned():
+    svc = CommandsHistory()
+    hst = _mock_hst().replace(f" {HX2}", "")  # 3 entries, 2 times
+    out = svc.append(hst, "/tmp", "ls", filetime_hex_to_int_le(HX0))
+    hist = svc.export(out)["History"]
+    assert len(hist) == 4
+    assert (hist[-1]["command"], hist[-1]["timeHex"]) == ("ls", HX0)
+
+def test_append_empty_dir_keeps_extras_aligned():
+    svc = CommandsHistory()
+    out = svc.append(_mock_hst(), "", "make", filetime_hex_to_int_le(HX0))
+    out = svc.append(out, "/src", "ls", filetime_hex_to_int_le(HX1))
+    hist = svc.export(out)["History"]
+    assert [(r["dir"], r["command"]) for r in hist[-2:]] == [("", "make"), ("/src", "ls")]
+    assert svc.import_(svc.export(out)) == out
+    # A rewrite keeps the empty slot too
+    data = svc.export(out)
+    data["History"].append({"dir": "/x", "command": "pwd", "timeHex": HX2})
+    assert [r["dir"] for r in svc.export(svc.import_(data))["History"][-3:]] == ["", "/src", "/x"]
+
+def test_append_command_file(tmp_path):
+    path = tmp_path / "commands.hst"
+    append_command(path, "/tmp", "ls", filetime_hex_to_int_le(HX0))
+    append_command(path, "/src", "make", filetime_hex_to_int_le(HX1))
+    hist = CommandsHistory().export(path.read_text(encoding="utf-8"))["History"]
+    assert [(r["dir"], r["command"], r["timeHex"]) for r in hist] == [("/tmp", "ls", HX0), ("/src", "make", HX1)]
+
+def test_patch_matches_json_roundtrip():
+    svc = CommandsHistory()
+    hst = _mock_hst().replace("Locks=", "Locks=010").replace("Position=-1", "Position=2")
+    out = svc.patch(hst, delete=[1], replace={0: "pwd"})
+    data = svc.export(hst)
+    del data["History"][1]
+    data["History"][0]["command"] = "pwd"
+    data["Locks"], data["Position"] = "00", 1
+    assert out == svc.import_(data)
+
+def test_patch_where_predicate():
+    svc = CommandsHistory()
+    out = svc.patch(_mock_hst(), where=lambda _cat, rec: rec["command"].startswith("python3"))
+    assert [(r["command"], r["timeHex"]) for r in svc.export(out)["History"]] == [("pwd | pbcopy", HX0)]
+    assert "HistoryCount=1\n" in out
+
+def test_patch_where_ignores_unpaired_extras():
+    svc = CommandsHistory()
+    hst = _mock_hst().replace('Extras="', 'Extras="/a\\n/b\\n/c\\n')  # 6 dirs, 3 commands
+    # The last dir has no command: it matches but is not an entry
+    out = svc.patch(hst, where=lambda _cat, rec: rec["dir"] in ("/a", "/c") or rec["dir"].endswith("Downloads"))
+    assert [r["command"] for r in svc.export(out)["History"] if r["command"]] == ["python3 far_history_toolset export"]
+    assert "HistoryCount=1\n" in out
+
+def test_patch_where_ignores_unpaired_extras():
+    svc = CommandsHistory()
+    hst = _mock_hst().replace('Extras="', 'Extras="/a\\n/b\\n/c\\n')  # 6 dirs, 3 commands
+    # The last dirs have no command: they are not entries, whatever the predicate says
+    out = svc.patch(hst, where=lambda _cat, rec: rec["dir"] in ("/a", "/c") or rec["dir"].endswith("Downloads"))
+    assert [r["command"] for r in svc.export(out)["History"] if r["command"]] == ["python3 far_history_toolset export"]
+    assert "HistoryCount=1\n" in out
+    # Repeated unpaired dirs are no duplicate entries either
+    extra = _mock_hst().replace('Downloads"', 'Downloads\\n/z\\n/z"')
+    assert svc.duplicate_indices(extra) == [] and svc.dedup(extra) == extra
+
+def test_duplicate_indices_use_dir_and_command():
+    svc = CommandsHistory()
+    hst = svc.import_({"Locks": "", "Position": -1, "History": [
+        {"dir": "/a", "command": "make", "timeHex": HX1},
+        {"dir": "/b", "command": "make", "timeHex": HX0},
+        {"dir": "/a", "command": "make", "timeHex": HX0},
+    ]})
+    assert svc.duplicate_indices(hst) == [2]  # the later entry is older by FILETIME
+    assert svc.duplicate_indices(hst, keep="oldest") == [0]
+    assert [r["dir"] for r in svc.export(svc.dedup(hst))["History"]] == ["/a", "/b"]
@@ -3,6 +3,8 @@
 Covers multi-section parsing and roundtrip. Expected: categories and their
 entries are preserved exactly through export/import.
 """
+import pytest
+
 from far_history_toolset.services.dialogs import DialogsHistory
 
 # Two small subsections, each with 2 entries
@@ -52,3 +54,82 @@ def test_import_roundtrip():
     data = svc.export(hst)
     rebuilt = svc.import_(data)
     assert rebuilt == hst
+
+def test_iter_records_yields_category_and_record():
+    svc = DialogsHistory()
+    streamed = list(svc.iter_records(_mock_hst()))
+    assert [cat for cat, _ in streamed] == ["NewFolder", "NewFolder", "Copy", "Copy"]
+    assert streamed[2][1] == {
+        "line": "/path/A",
+        "timeHex": HX_B0,
+        "timeISO": svc.export(_mock_hst())["Categories"][1]["History"][0]["timeISO"],
+    }
+
+def test_import_records_groups_by_category():
+    svc = DialogsHistory()
+    hst = _mock_hst()
+    meta = svc.export_meta(hst)
+    assert [set(c) for c in meta["Categories"]] == [{"name", "Locks", "Position"}] * 2
+    # Records arriving interleaved still land in their own sections
+    records = sorted(svc.iter_records(hst), key=lambda cr: cr[1]["line"])
+    assert svc.import_records(meta, records).count("[SavedDialogHistory/") == 2
+    assert svc.import_records(meta, svc.iter_records(hst)) == hst
+
+def test_repeated_sections_kept_by_import_merged_by_import_records():
+    svc = DialogsHistory()
+    copy = _mock_hst()[_mock_hst().index("[SavedDialogHistory/Copy]"):]
+    hst = _mock_hst() + copy.replace("/path/A", "/path/C")
+    assert svc.import_(svc.export(hst)) == hst
+    merged = svc.import_records(svc.export_meta(hst), svc.iter_records(hst))
+    assert merged.count("[SavedDialogHistory/Copy]") == 1
+    assert [e["line"] for e in svc.export(merged)["Categories"][1]["History"]] == ["/path/A", "/path/B", "/path/C", "/path/B"]
+
+def test_patch_per_category():
+    svc = DialogsHistory()
+    out = svc.patch(_mock_hst(), delete=[("Copy", 0)], replace={("NewFolder", 1): "Music"})
+    data = svc.export(out)
+    assert data["HistoryCount"] == 3
+    assert [e["line"] for e in data["Categories"][0]["History"]] == ["Audiobooks", "Music"]
+    assert [(e["line"], e["timeHex"]) for e in data["Categories"][1]["History"]] == [("/path/B", HX_B1)]
+    with pytest.raises(ValueError):
+        svc.patch(_mock_hst(), delete=[0])
+    with pytest.raises(ValueError):
+        svc.patch(_mock_hst(), delete=[("Missing", 0)])
+
+def test_selected_categories_decode_only_those_and_carry_the_rest_raw():
+    svc = DialogsHistory()
+    # Non-canonical spacing in the untouched section must survive as is
+    text = _mock_hst().replace("Locks=000\n", "Locks=000   \n")
+    data = svc.export(text, categories=["Copy"])
+    new_folder, copy = data["Categories"]
+    assert set(new_folder) == {"name", "Raw"}
+    assert new_folder["Raw"].startswith("[SavedDialogHistory/NewFolder]\n") and "Locks=000   \n" in new_folder["Raw"]
+    assert [e["line"] for e in copy["History"]] == ["/path/A", "/path/B"]
+    assert svc.import_(data) == text
+
+    spans = svc.category_spans(text)
+    assert list(spans) == ["NewFolder", "Copy"]
+    assert text[slice(*spans["NewFolder"])] == new_folder["Raw"]
+
+    meta = svc.export_meta(text, categories=["Copy"])
+    records = list(svc.iter_records(text, iso=False, categories=["Copy"]))
+    assert {name for name, _ in records} == {"Copy"}
+    assert svc.import_records(meta, records) == text
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_pooled_export_matches_serial(pool):
+    svc = DialogsHistory()
+    text = _mock_hst()
+    for iso in (True, "lazy", False):
+        serial = svc.export(text, iso=iso)
+        pooled = svc.export(text, iso=iso, workers=2, pool=pool)
+        assert pooled == serial
+        assert [c["name"] for c in pooled["Categories"]] == ["NewFolder", "Copy"]
+    assert svc.export(text, workers=2, pool=pool, categories=["Copy"]) == svc.export(text, categories=["Copy"])
+
+
+def test_pooled_export_rejects_bad_options():
+    with pytest.raises(ValueError):
+        DialogsHistory().export(_mock_hst(), workers=0)
+    with pytest.raises(ValueError):
+        DialogsHistory().export(_mock_hst(), workers=2, pool="fiber")
@@ -35,3 +35,32 @@ def test_import_roundtrip():
     data = svc.export(hst)
     rebuilt = svc.import_(data)
     assert rebuilt == hst
+
+def test_iter_records_matches_export():
+    svc = FoldersHistory()
+    hst = _mock_hst()
+    assert [rec for _, rec in svc.iter_records(hst)] == svc.export(hst)["History"]
+
+def test_patch_keeps_types_and_locks_aligned():
+    svc = FoldersHistory()
+    out = svc.patch(_mock_hst(), delete=[0])
+    assert "Types=01\n" in out and "Locks=00\n" in out and "HistoryCount=2\n" in out
+    assert [r["path"] for r in svc.export(out)["History"]] == ["/b", "/c"]
+
+def test_dedup_keeps_newest_and_aligns_columns():
+    svc = FoldersHistory()
+    hst = (
+        "[SavedFolderHistory]\n"
+        "HistoryCount=4\n"
+        'Lines="/a\\n/b\\n/a\\n/c"\n'
+        "Locks=0100\n"
+        "Position=-1\n"
+        "Times=0028c8515035dc01 80be60525035dc01 0055f9525035dc01 00ec924e5035dc01\n"
+        "Types=1203\n"
+    )
+    newest = svc.dedup(hst)
+    assert [r["path"] for r in svc.export(newest)["History"]] == ["/b", "/a", "/c"]
+    assert "Types=203\n" in newest and "Locks=100\n" in newest and "HistoryCount=3\n" in newest
+    oldest = svc.dedup(hst, keep="oldest")
+    assert [(r["path"], r["typeFlag"]) for r in svc.export(oldest)["History"]] == [("/a", 1), ("/b", 2), ("/c", 3)]
+    assert svc.dedup(oldest) == oldest
@@ -3,7 +3,9 @@
 Ensures that the REGISTRY contains all known headers and that get_service_for_header
 returns instances of the correct concrete service classes.
 """
-from far_history_toolset.services import REGISTRY, get_service_for_header
+import io
+
+from far_history_toolset.services import REGISTRY, detect_header_stream, get_service_for_header
 from far_history_toolset.services.commands import CommandsHistory
 from far_history_toolset.services.dialogs import DialogsHistory
 from far_history_toolset.services.folders import FoldersHistory
@@ -21,3 +23,12 @@ def test_get_service_for_header_instances():
     assert isinstance(get_service_for_header(DialogsHistory.HEADER), DialogsHistory)
     assert isinstance(get_service_for_header(FoldersHistory.HEADER), FoldersHistory)
     assert isinstance(get_service_for_header(ViewHistory.HEADER), ViewHistory)
+
+def test_detect_header_stream_returns_service_class(tmp_path):
+    path = tmp_path / "dialogs.hst"
+    path.write_text("[SavedDialogHistory]\nHistoryCount=0\n", encoding="utf-8")
+    with path.open("rb") as f:
+        assert detect_header_stream(f) is DialogsHistory
+        assert f.read().startswith(b"[SavedDialogHistory]")
+    assert detect_header_stream(io.StringIO("[SavedHistory]\n")) is CommandsHistory
+    assert detect_header_stream(io.StringIO("not a history\n")) is None
@@ -0,0 +1,94 @@
+"""Unit tests for the SQLite history store: normalized rows and exact rebuilds."""
+import re
+
+import pytest
+
+from far_history_toolset.core.errors import SchemaError
+from far_history_toolset.core.hst_lexer import detect_header
+from far_history_toolset.services import get_service_for_header
+from far_history_toolset.services.sqlite_store import HistoryDatabase
+
+COMMANDS = (
+    "[SavedHistory]\n"
+    'Extras="/home/u\\n/tmp"\nHistoryCount=2\nLines="ls -la\\nmake test"\n'
+    "Locks=\nPosition=-1\nTimes=0028c8515035dc01 ffffffffffffffff\n"
+)
+DIALOGS = (
+    "[SavedDialogHistory]\nHistoryCount=3\n\n"
+    '[SavedDialogHistory/Copy]\nLines="/mnt/a\\n/mnt/b"\nLocks=00\nPosition=-1\n'
+    "Times=0028c8515035dc01 80be60525035dc01\n\n"
+    '[SavedDialogHistory/NewFolder]\nLines="assets"\nLocks=\nPosition=0\nTimes=0055f9525035dc01\n'
+)
+FOLDERS = (
+    "[SavedFolderHistory]\n"
+    'HistoryCount=2\nLines="/a\\n/b"\nLocks=00\nPosition=1\n'
+    "Times=0028c8515035dc01 80be60525035dc01\nTypes=10\n"
+)
+
+
+def _json_roundtrip(text):
+    svc = get_service_for_header(detect_header(text))
+    return svc.import_(svc.export(text))
+
+
+@pytest.mark.parametrize("text", [COMMANDS, DIALOGS, FOLDERS])
+def test_rebuild_matches_json_roundtrip(text):
+    with HistoryDatabase(":memory:") as db:
+        db.add_text("x.hst", text)
+        assert db.build_text("x.hst") == _json_roundtrip(text)
+        assert db.build_text() == _json_roundtrip(text)
+
+
+def test_rows_are_normalized_and_reloads_replace():
+    with HistoryDatabase(":memory:") as db:
+        assert db.add_text("commands.hst", COMMANDS) == 2
+        assert db.add_text("dialogs.hst", DIALOGS) == 3
+        assert db.add_text("folders.hst", FOLDERS) == 2
+        assert db.add_text("folders.hst", FOLDERS) == 2
+        assert db.files() == ["commands.hst", "dialogs.hst", "folders.hst"]
+
+        rows = db.conn.execute(
+            "SELECT file, category, idx, line, dir, type_flag FROM history ORDER BY file, category, idx"
+        ).fetchall()
+        assert rows == [
+            ("commands.hst", None, 0, "ls -la", "/home/u", None),
+            ("commands.hst", None, 1, "make test", "/tmp", None),
+            ("dialogs.hst", "Copy", 0, "/mnt/a", None, None),
+            ("dialogs.hst", "Copy", 1, "/mnt/b", None, None),
+            ("dialogs.hst", "NewFolder", 0, "assets", None, None),
+            ("folders.hst", None, 0, "/a", None, 1),
+            ("folders.hst", None, 1, "/b", None, 0),
+        ]
+        newest = db.conn.execute("SELECT line FROM history ORDER BY filetime DESC LIMIT 1").fetchone()
+        assert newest == ("assets",)
+        assert db.count("dialogs.hst") == 3
+
+        with pytest.raises(SchemaError):
+            db.build_text()
+        with pytest.raises(SchemaError):
+            db.build_text("missing.hst")
+
+
+@pytest.mark.parametrize("text", [
+    COMMANDS.replace("ffffffffffffffff", "0000000000000000 zz").replace("make test", "make test\\nfree"),
+    DIALOGS.replace("80be60525035dc01", "80BE60525035DC01"),
+    FOLDERS.replace("80be60525035dc01", "bogus").replace('/b"', '/b\\n/c"').replace("Types=10", "Types=100"),
+    FOLDERS.replace(" 80be60525035dc01", ""),
+])
+def test_rebuild_keeps_times_tokens_verbatim(text):
+    with HistoryDatabase(":memory:") as db:
+        db.add_text("x.hst", text)
+        rebuilt = db.build_text("x.hst")
+    assert rebuilt != _json_roundtrip(text)
+    assert re.findall("Times=.*", rebuilt) == re.findall("Times=.*", text)
+
+
+def test_rebuild_of_rows_without_time_hex(tmp_path):
+    # databases written before entry.time_hex existed are migrated and rebuild as before
+    path = tmp_path / "old.db"
+    with HistoryDatabase(path) as db:
+        db.add_text("x.hst", FOLDERS)
+        with db.conn:
+            db.conn.execute("UPDATE entry SET time_hex = NULL")
+    with HistoryDatabase(path) as db:
+        assert db.build_text() == _json_roundtrip(FOLDERS)
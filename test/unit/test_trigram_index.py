@@ -0,0 +1,59 @@
+"""Unit tests for the trigram search index.
+
+Covers building over several history types, the on-disk roundtrip, and search
+results. Expected: search returns exactly the entries a linear substring scan
+finds, with file, service header, category, index and FILETIME.
+"""
+import pytest
+
+from far_history_toolset.services.commands import CommandsHistory
+from far_history_toolset.services.trigram_index import TrigramIndex
+
+HX = "0028c8515035dc01"
+
+def _write_histories(root):
+    cmds = CommandsHistory()
+    history = [{"dir": f"/srv/app{i % 7}", "command": f"make target{i}", "timeHex": HX} for i in range(100)]
+    history[40] = {"dir": "/prod/api", "command": "kubectl delete pod web-1", "timeHex": HX}
+    history[41] = {"dir": "/staging/api", "command": "kubectl delete pod web-2", "timeHex": HX}
+    (root / "alice").mkdir()
+    (root / "alice" / "commands.hst").write_text(cmds.import_({"Locks": "", "Position": -1, "History": history}))
+    (root / "bob").mkdir()
+    (root / "bob" / "dialogs.hst").write_text(
+        "[SavedDialogHistory]\nHistoryCount=2\n\n"
+        "[SavedDialogHistory/Find]\n"
+        'Lines="TODO\\nKubectl Delete"\n'
+        "Locks=\nPosition=-1\n"
+        f"Times={HX} {HX}\n\n"
+    )
+    return history
+
+def test_search_matches_linear_scan(tmp_path):
+    history = _write_histories(tmp_path)
+    idx = TrigramIndex.build([tmp_path])
+    idx.save(tmp_path / "h.idx")
+    loaded = TrigramIndex.load(tmp_path / "h.idx")
+    assert len(loaded) == len(history) + 2
+
+    for terms in (["target1"], ["/srv/app3", "target"], ["kubectl delete", "/prod"], ["nope"], ["ma"]):
+        expected = [i for i, r in enumerate(history) if all(t in r["dir"] + "\n" + r["command"] for t in terms)]
+        hits = loaded.search(terms)
+        assert [h.index for h in hits] == expected
+        assert all(h.header == "[SavedHistory]" and h.category is None for h in hits)
+
+    hit, = loaded.search(["kubectl delete", "/prod"])
+    assert hit.path.endswith("commands.hst") and hit.filetime == int.from_bytes(bytes.fromhex(HX), "little")
+    assert hit.text == "/prod/api\nkubectl delete pod web-1"
+
+def test_search_ignore_case_and_categories(tmp_path):
+    _write_histories(tmp_path)
+    idx = TrigramIndex.build([tmp_path])
+    hits = idx.search(["kubectl delete"], ignore_case=True)
+    assert [(h.category, h.index) for h in hits] == [(None, 40), (None, 41), ("Find", 1)]
+    assert hits[-1].header == "[SavedDialogHistory]"
+    assert len(idx.search(["kubectl delete"], limit=1)) == 1
+
+def test_load_rejects_other_files(tmp_path):
+    (tmp_path / "x.idx").write_bytes(b"not an index")
+    with pytest.raises(ValueError):
+        TrigramIndex.load(tmp_path / "x.idx")
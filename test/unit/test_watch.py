@@ -0,0 +1,46 @@
+"""Unit tests for HistoryWatcher: change detection and tail-only deltas."""
+from far_history_toolset.services.commands import append_command
+from far_history_toolset.services.watch import HistoryWatcher
+
+FOLDERS = (
+    "[SavedFolderHistory]\n"
+    'HistoryCount=2\nLines="/a\\n/b"\nLocks=00\nPosition=1\n'
+    "Times=0028c8515035dc01 80be60525035dc01\nTypes=10\n"
+)
+
+
+def test_first_poll_reports_everything_then_only_new_entries(tmp_path):
+    cmds = tmp_path / "commands.hst"
+    append_command(cmds, "/src", "make", filetime=134040708000000000)
+    (tmp_path / "folders.hst").write_text(FOLDERS, encoding="utf-8")
+    watcher = HistoryWatcher(tmp_path, iso=False)
+
+    first = watcher.poll()
+    assert sorted(ev.path[len(str(tmp_path)) + 1:] for ev in first) == ["commands.hst", "folders.hst", "folders.hst"]
+    assert watcher.poll() == []
+
+    append_command(cmds, "/src", "make test", filetime=134040708010000000)
+    events = watcher.poll()
+    assert [(ev.category, ev.record["command"]) for ev in events] == [(None, "make test")]
+    assert "timeISO" not in events[0].record
+
+
+def test_rewritten_file_reports_only_later_times(tmp_path):
+    path = tmp_path / "folders.hst"
+    path.write_text(FOLDERS, encoding="utf-8")
+    watcher = HistoryWatcher(path)
+    assert [ev.record["path"] for ev in watcher.poll()] == ["/a", "/b"]
+
+    # Oldest entry expired, "/a" re-used (moved to the end with a new time), "/c" added
+    path.write_text(
+        FOLDERS.replace('"/a\\n/b"', '"/b\\n/a\\n/c"').replace("HistoryCount=2", "HistoryCount=3")
+        .replace("Times=0028c8515035dc01 80be60525035dc01",
+                 "Times=80be60525035dc01 0055f9525035dc01 00ec924e5035dc02").replace("Types=10", "Types=101"),
+        encoding="utf-8",
+    )
+    events = watcher.poll()
+    assert [ev.record["path"] for ev in events] == ["/a", "/c"]
+    assert events[0].record["timeISO"].startswith("2025-10-04T17:00:02")
+
+    path.unlink()
+    assert watcher.poll() == []